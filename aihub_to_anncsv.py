@@ -6,9 +6,28 @@
 """
 
 import cv2 
-import json, csv 
+import csv 
 import os, glob 
 import re 
+import sys
+import time
+import argparse
+
+from video_frames import EXTRACT_MODES, FrameReader, check_seek_matching, merge_frame_ranges
+from batch_jobs import run_label_jobs, print_failures
+from image_writer import ENCODE_MODES, ImageWriterPool
+from build_manifest import BuildManifest
+from label_stream import load_label_json
+from label_cache import load_parsed_label
+from annotation_columnar import csv_to_npy
+from annotation_writer import AnnotationCsvWriter, OrderedRows
+from frame_boxes import FrameBoxes
+from run_stats import RunStats, ProgressReporter, write_run_report, profile_call, profile_file_for
+from tar_shards import OUTPUT_MODES, SHARD_MAX_BYTES, SHARD_INDEX_NAME, TarShardWriter, ShardIndex, shard_index_file, merge_shard_indexes
+from frame_resize import RESIZE_SIDES, INTERPOLATIONS, make_resizer
+from dataset_validator import ValidationReport, check_pairs, scan_dir
+from workload_planner import plan_workload, print_workload
+from work_shards import parse_shard, select_shard, shard_file, write_work_shard
 
 # data path / class name settings 
 
@@ -17,7 +36,16 @@ RAW_LABEL_PATH = "raw_data/label/"
 PROCESSED_IMAGE_PATH = "processed_data/images/"
 PROCESSED_ANNOTATION_PATH = "processed_data/annotation/"
 PROCESSED_ANNOTATION_NAME = "annotation.csv"
+PROCESSED_SHARD_PATH = "processed_data/shards/"
+PROCESSED_MANIFEST_FILE = "processed_data/manifest_anncsv.json"
+PROCESSED_REPORT_FILE = "processed_data/run_report_anncsv.json"
+PROCESSED_WORK_SHARD_FILE = "processed_data/work_shards_anncsv.json"
+LABEL_CACHE_PATH = "processed_data/label_cache/"  # parse 한 label 의 .npz cache (label 이 바뀌지 않았으면 json 을 읽지 않음)
 CLASS_NAME = "smokingPerson"
+EXTRACT_MODE = "seek"  # "seek" : event 범위만 decode / "full" : 모든 frame decode
+ENCODE_WORKERS = 2  # png encoding/writing worker 수 (0 : decode loop 안에서 바로 저장)
+ENCODE_MODE = "thread"  # "thread" / "process" (shared memory 로 frame 전달)
+OUTPUT_MODE = "files"  # "files" : png 낱개 file / "shards" : video 별 tar shard + index (annotation.csv 의 image_name 으로 찾음)
 
 # raw json parsers 
 
@@ -33,7 +61,8 @@ def events_parser(events):
             ev_start_frame = event["ev_start_frame"]
             ev_end_frame = event["ev_end_frame"]
             event_frames.append([ev_start_frame, ev_end_frame])
-    return event_frames
+    # 정렬 후 겹치는 범위 병합 
+    return merge_frame_ranges(event_frames)
 
 def annotation_parser(annotation): 
     cur_frame = annotation["cur_frame"] 
@@ -46,13 +75,13 @@ def annotation_parser(annotation):
     return cur_frame, bbox
 
 def annotations_parser(annotations):
+    """ returns : FrameBoxes (frame 번호 순 정렬, frame -> boxes 조회) """
     bboxes = []
     annotations = [annotation for annotation in annotations if annotation["class_name"]=="smoking"]
-    annotations = sorted(annotations, key=lambda x: x["cur_frame"])  
     for annotation in annotations:
         cur_frame, bbox = annotation_parser(annotation)
         bboxes.append([cur_frame, bbox])
-    return bboxes
+    return FrameBoxes.from_pairs(bboxes)
 
 # processing  
 
@@ -71,16 +100,24 @@ def generate_image_name_base(video_name):
         print(f"{video_name}에서 '17-16-00_b'와 같은 식별 코드를 찾을 수 없습니다. ")
         return None 
 
-def process_annotation(video_name, frame_size, bboxes):
+def process_annotation(video_name, frame_size, bboxes, resizer=None):
+    # resizer : 저장하는 image 를 줄이는 경우 (frame_resize.FrameResizer), box 와 image 크기도 같은 비율로 변환 
     processed_annotations = [] 
     
     image_name_base = generate_image_name_base(video_name) 
     image_width, image_height = frame_size
+    scale_x, scale_y = 1, 1
+    if resizer is not None:
+        scale_x, scale_y = resizer.scale(frame_size)
+        image_width, image_height = resizer.target_size(frame_size)
     label_name = CLASS_NAME 
     
     for cur_frame, bbox in bboxes: 
         image_name = f"{image_name_base}_{cur_frame}.png" 
         bbox_x_center, bbox_y_center, bbox_width, bbox_height = bbox 
+        if resizer is not None:
+            bbox_x_center, bbox_y_center = bbox_x_center*scale_x, bbox_y_center*scale_y
+            bbox_width, bbox_height = bbox_width*scale_x, bbox_height*scale_y
         bbox_x, bbox_y = bbox_x_center-bbox_width/2, bbox_y_center-bbox_height/2
 
         frame_annotation = {
@@ -100,82 +137,258 @@ def process_annotation(video_name, frame_size, bboxes):
 # saving 
 
 def save_annotation(processed_annotations):
-    output_annotation_filename = PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME
-    with open(output_annotation_filename, mode='w', newline='') as outputfile:
-        writer = csv.DictWriter(outputfile, fieldnames=['label_name', 'bbox_x', 'bbox_y', 'bbox_width', 'bbox_height', 'image_name', 'image_width', 'image_height'])
-        writer.writeheader() 
-        for row in processed_annotations:
-            writer.writerow(row) 
-    print(f"annotation saved! : {output_annotation_filename}") 
-
-def save_images(video_name, event_frames): 
-    cap = cv2.VideoCapture(RAW_VIDEO_PATH + video_name) 
-    
-    if not cap.isOpened():
-        print(f"Cannot open '{video_name}' file.")
-        exit() 
-
-    while True: 
-        ret, frame = cap.read()
-        if not ret: 
-            break
-        cur_frame_num = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-        if any(start <= cur_frame_num <= end for start, end in event_frames):
-            OUTPUTIMG_BASENAME = generate_image_name_base(video_name)
-            output_image_name = f"{OUTPUTIMG_BASENAME}_{cur_frame_num}.png"
-            cv2.imwrite(PROCESSED_IMAGE_PATH + output_image_name, frame)
+    # 임시 file 에 chunk 단위로 쓴 뒤 교체 (main 에서는 video 가 끝날 때마다 바로 씀) 
+    with AnnotationCsvWriter(PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME) as annotation_writer:
+        annotation_writer.write_rows(processed_annotations)
+
+def save_images(video_name, event_frames, extract_mode=EXTRACT_MODE, encode_workers=ENCODE_WORKERS, encode_mode=ENCODE_MODE,
+                stats=None, shard_writer=None, resize=None): 
+    # resize : (width, height, interpolation) 이면 encoding 전에 줄여서 저장 (FrameResizer.writer_resize) 
+    if stats is None:
+        stats = RunStats(video_name)
+    # image 이름 앞부분은 video 마다 한 번만 만듦 
+    output_image_prefix = f"{PROCESSED_IMAGE_PATH}{generate_image_name_base(video_name)}_"
+
+    # decode 는 이 loop 에서, png encoding/writing 은 image_writer worker 에서 겹쳐 실행 
+    # frame 은 미리 할당한 buffer 에 decode (worker 가 encoding 을 끝내고 release 한 buffer 만 다시 씀) 
+    saved_image_files = []
+    with ImageWriterPool(encode_workers, encode_mode, sink=shard_writer, resize=resize) as image_writer, \
+         FrameReader(RAW_VIDEO_PATH + video_name, event_frames, extract_mode, image_writer.max_pending + 2) as reader:
+        for cur_frame_num, frame in stats.timed(reader, "decode"):
+            stats.count("frames")
+            output_image_file = f"{output_image_prefix}{cur_frame_num}.png"
+            image_writer.submit(output_image_file, frame, release=reader.retain())
+            saved_image_files.append(output_image_file)
+    stats.add_writer(image_writer)
+    stats.count("frame_allocations", reader.buffers.allocations)
 
     print(f"images all saved! : from {video_name}, frame range {event_frames}") 
-    cap.release()    
+    return saved_image_files
+
+def parse_label_file(raw_label_file, stats=None):
+    """ json label -> {"video_name", "frame_size", "event_frames", "bboxes"(FrameBoxes)} """
+    if stats is None:
+        stats = RunStats(os.path.basename(raw_label_file))
+    with stats.stage("parse"):
+        # streaming parse : smoking annotation 만 메모리에 남김 (json.load 결과와 같은 형태) 
+        raw_label_json = load_label_json(raw_label_file, class_name="smoking")
+        video_name, frame_size = info_parser(raw_label_json["info"])
+    with stats.stage("filter"):
+        event_frames = events_parser(raw_label_json["events"])
+        bboxes = annotations_parser(raw_label_json["annotations"]) 
+    return {"video_name": video_name, "frame_size": frame_size, "event_frames": event_frames, "bboxes": bboxes}
+
+def load_label_file(raw_label_file, stats, label_cache=LABEL_CACHE_PATH):
+    """
+        label_cache 폴더에 유효한 cache 가 있으면 json 대신 cache 에서 읽음 (None : cache 사용 안 함)
+        - returns : (parse_label_file 결과, cache 사용 여부)
+    """
+    started = time.perf_counter()
+    parsed_label, cached = load_parsed_label(raw_label_file, lambda label_file: parse_label_file(label_file, stats), label_cache, "anncsv")
+    if cached:
+        stats.add_seconds("parse", time.perf_counter() - started)
+        stats.count("label_cache_hits")
+    return parsed_label, cached
+
+def process_label_file(raw_label_file, extract_mode=EXTRACT_MODE, check_seek=False, encode_workers=ENCODE_WORKERS, encode_mode=ENCODE_MODE,
+                       skip_images=False, profile_dir=None, output=OUTPUT_MODE, shard_size=SHARD_MAX_BYTES, resizer=None,
+                       label_cache=LABEL_CACHE_PATH):
+    """ returns : (annotation rows, 저장한 image(shards 이면 shard, index) file 목록 (skip_images 이면 None), RunStats dict) """
+    if profile_dir is not None:
+        # video 하나를 cProfile 로 실행 : <profile_dir>/<label name>.prof 
+        return profile_call(profile_file_for(profile_dir, raw_label_file), process_label_file, raw_label_file,
+                            extract_mode, check_seek, encode_workers, encode_mode, skip_images, None, output, shard_size, resizer,
+                            label_cache)
+    print(f"## now processing {os.path.basename(raw_label_file)} file ##")
+    stats = RunStats(os.path.basename(raw_label_file))
+    # parse json raw label file (label 이 바뀌지 않았으면 .npz cache 에서) 
+    parsed_label, _ = load_label_file(raw_label_file, stats, label_cache)
+    video_name, frame_size = parsed_label["video_name"], parsed_label["frame_size"]
+    event_frames, bboxes = parsed_label["event_frames"], parsed_label["bboxes"]
+    with stats.stage("filter"):
+        # process annotation 
+        processed_annotations = process_annotation(video_name, frame_size, bboxes, resizer)
+    stats.count("annotations", len(processed_annotations))
+    if skip_images:
+        # 이전 실행의 image 가 그대로 유효함 (build manifest) 
+        return processed_annotations, None, stats.finish().to_dict()
+    if check_seek:
+        check_seek_matching(RAW_VIDEO_PATH + video_name, event_frames)
+    # save event images 
+    resize = resizer.writer_resize(frame_size) if resizer is not None else None
+    if output == "shards":
+        shard_writer = TarShardWriter(PROCESSED_SHARD_PATH, os.path.splitext(os.path.basename(raw_label_file))[0], shard_size)
+        try:
+            save_images(video_name, event_frames, extract_mode, encode_workers, encode_mode, stats, shard_writer, resize)
+        finally:
+            saved_image_files = shard_writer.close()
+    else:
+        saved_image_files = save_images(video_name, event_frames, extract_mode, encode_workers, encode_mode, stats, resize=resize)
+    return processed_annotations, saved_image_files, stats.finish().to_dict()
+
+def matching_video_file(raw_label_file):
+    return RAW_VIDEO_PATH + os.path.splitext(os.path.basename(raw_label_file))[0] + ".mp4"
 
 # check file matching 
 
+# (box 범위, image 크기, frame 번호 등 자세한 검사는 dataset_validator.py) 
+
 def check_rawfiles_matching():
-    label_files = glob.glob(RAW_LABEL_PATH+'*.json')
-    label_filenames = [os.path.splitext(os.path.basename(f))[0] for f in label_files] 
-    video_files = glob.glob(RAW_VIDEO_PATH+'*.mp4')
-    video_filenames = [os.path.splitext(os.path.basename(f))[0] for f in video_files] 
-    if set(label_filenames) == set(video_filenames) :
+    report = ValidationReport()
+    check_pairs(report, "raw orphans", scan_dir(RAW_LABEL_PATH, (".json",)), scan_dir(RAW_VIDEO_PATH, (".mp4",)), "label", "video")
+    if not report.problems:
         print("check : raw_labels and raw_videos are matching correctly!", end="\n.\n.\n")
     else:
+        report.print_problems()
         print("check : raw_labels and raw_videos are not matching...", end="\n.\n.\n")
 
-def check_savefiles_matching():
-    saved_image_files = glob.glob(PROCESSED_IMAGE_PATH+'*.png')
-    saved_image_filenames = [os.path.basename(f) for f in saved_image_files] 
+def check_savefiles_matching(output=OUTPUT_MODE):
+    if output == "shards":
+        # 폴더 glob 대신 shard index 의 member 이름과 비교 
+        saved_image_filenames = [name for name in ShardIndex(PROCESSED_SHARD_PATH + SHARD_INDEX_NAME).names() if name.endswith(".png")]
+    else:
+        saved_image_filenames = list(scan_dir(PROCESSED_IMAGE_PATH, (".png",)))
     saved_annotation_filename = PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME
     with open(saved_annotation_filename) as annfile:
         ann_reader = csv.DictReader(annfile)
-        ann_image_filenames = [row["image_name"] for row in ann_reader]
-    if set(saved_image_filenames) == set(ann_image_filenames) :
+        ann_image_filenames = set(row["image_name"] for row in ann_reader)
+    report = ValidationReport()
+    check_pairs(report, "annotation orphans", saved_image_filenames, ann_image_filenames, "image", "annotation row")
+    if not report.problems:
         print("check : images and annotation image names are matching correctly!", end="\n.\n.\n")
     else:
+        report.print_problems()
         print("check : images and annotation image names are not matching...", end="\n.\n.\n")
 
 # main
 
 if __name__=="__main__": 
+    parser = argparse.ArgumentParser(description="aihub video/json label to dino annotation.csv")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default=EXTRACT_MODE,
+                        help="seek : event 범위만 decode / full : 모든 frame decode")
+    parser.add_argument("--check-seek", action="store_true",
+                        help="각 video 에 대해 seek 추출 결과가 full 추출 결과와 같은지 먼저 확인")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="label file(video) 들을 나누어 처리할 process 수")
+    parser.add_argument("--encode-workers", type=int, default=ENCODE_WORKERS,
+                        help="video 당 png encoding/writing worker 수 (0 : decode loop 안에서 바로 저장)")
+    parser.add_argument("--encode-mode", choices=ENCODE_MODES, default=ENCODE_MODE,
+                        help="thread : thread pool / process : shared memory 로 frame 을 넘기는 process pool")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="build manifest 를 무시하고 모든 video 의 image 를 다시 생성")
+    parser.add_argument("--columnar", action="store_true",
+                        help="annotation.csv 옆에 memory-map 으로 읽을 수 있는 annotation.npy / annotation.index.npy 도 저장")
+    parser.add_argument("--output", choices=OUTPUT_MODES, default=OUTPUT_MODE,
+                        help="files : png 낱개 file / shards : video 별 tar shard (WebDataset 형식) + index.csv")
+    parser.add_argument("--shard-size", type=int, default=SHARD_MAX_BYTES >> 20,
+                        help="shard 하나의 최대 크기 (MB)")
+    parser.add_argument("--report", default=PROCESSED_REPORT_FILE,
+                        help="stage 별 시간, fps, 건너뜀/실패 수를 담은 실행 보고서(json) 경로")
+    parser.add_argument("--profile-dir", default=None,
+                        help="지정하면 video 마다 cProfile 결과를 <profile-dir>/<label name>.prof 로 저장")
+    parser.add_argument("--resize", type=int, default=None,
+                        help="지정하면 image 의 짧은 변(--resize-side long : 긴 변)을 이 크기로 줄여서 저장 (box, image 크기도 같이 변환)")
+    parser.add_argument("--resize-side", choices=RESIZE_SIDES, default="short",
+                        help="--resize 를 맞출 변")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default="area",
+                        help="resize interpolation")
+    parser.add_argument("--no-label-cache", action="store_true",
+                        help=f"parse 한 label 의 .npz cache ({LABEL_CACHE_PATH}) 를 사용하지 않고 항상 json 을 parse")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="frame 을 decode 하지 않고 decode / 저장할 frame 수, 예상 bytes, 예상 시간만 출력 (workload_planner.py)")
+    parser.add_argument("--calibration", default=None,
+                        help="--dry-run 의 예상 시간에 사용할 benchmarks/run_benchmarks.py 결과 json")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="i/N : label file 이름의 hash 로 나눈 N 개 중 i 번째 (0 부터) 만 처리. 여러 machine 의 결과는 python work_shards.py 로 합침")
+    args = parser.parse_args()
+    if args.shard is not None and args.columnar:
+        parser.error("--columnar can not be used with --shard (use python work_shards.py --columnar after all shards finish)")
+    resizer = make_resizer(args.resize, args.resize_side, args.interpolation)
+    if args.dry_run:
+        workload = plan_workload(select_shard(sorted(glob.glob(RAW_LABEL_PATH + '*.json')), args.shard), "anncsv", args.extract_mode, resizer=resizer,
+                                 calibration_file=args.calibration, workers=args.workers,
+                                 label_cache=None if args.no_label_cache else LABEL_CACHE_PATH, video_path=RAW_VIDEO_PATH)
+        print_workload(workload)
+        sys.exit(0)
+    run_started = time.perf_counter()
+
     # check raw_data file matching : label - video 
     check_rawfiles_matching()
     
-    # load raw label files 
-    processed_annotations = []
-    raw_label_files = glob.glob(RAW_LABEL_PATH + '*.json')
-    for raw_label_file in raw_label_files:
-        print(f"## now processing {os.path.basename(raw_label_file)} file ##")
-        with open(raw_label_file, "r", encoding="utf-8") as jsonfile: 
-            raw_label_json = json.load(jsonfile) 
-
-        # parse json raw label file 
-        video_name, frame_size = info_parser(raw_label_json["info"])
-        event_frames = events_parser(raw_label_json["events"])
-        bboxes = annotations_parser(raw_label_json["annotations"]) 
+    # load raw label files, process annotation & save event images 
+    raw_label_files = select_shard(sorted(glob.glob(RAW_LABEL_PATH + '*.json')), args.shard)
+    # --shard : shard 끼리 겹치는 결과 file 은 이름에 shard 를 붙임 (image / tar shard 는 video 마다 이름이 다름) 
+    annotation_file = shard_file(PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME, args.shard)
+    manifest_params = {"format": "png", "class_name": CLASS_NAME}
+    if args.output == "shards":
+        manifest_params.update({"output": args.output, "shard_size": args.shard_size})
+    if resizer is not None:
+        manifest_params.update(resizer.params())
+    with BuildManifest(shard_file(PROCESSED_MANIFEST_FILE, args.shard), manifest_params) as manifest:
+        # 사라진 label 의 image 삭제, 바뀌지 않은 video 는 image 생성 생략 (annotation 은 label 에서 다시 생성) 
+        removed_keys = manifest.remove_missing(os.path.basename(f) for f in raw_label_files)
+        skip_flags = [not args.rebuild and manifest.is_up_to_date(os.path.basename(f), f, matching_video_file(f))
+                      for f in raw_label_files]
+        for raw_label_file, skip_images in zip(raw_label_files, skip_flags):
+            if not skip_images:
+                manifest.begin(os.path.basename(raw_label_file), raw_label_file, matching_video_file(raw_label_file))
+        print(f"build manifest : {sum(skip_flags)} videos unchanged, {len(skip_flags)-sum(skip_flags)} videos to process, {len(removed_keys)} removed")
 
-        # process annotation & save event images  
-        processed_annotations.extend(process_annotation(video_name, frame_size, bboxes)) 
-        save_images(video_name, event_frames)
+        progress = ProgressReporter(len(raw_label_files))
+        label_indices = {raw_label_file: idx for idx, raw_label_file in enumerate(raw_label_files)}
+        video_stats, succeeded_files, label_rows, csv_seconds = {}, set(), {}, 0.0
+        # annotation 은 video 가 끝날 때마다 label file 순서대로 바로 씀 (worker 수와 관계없이 같은 annotation) 
+        annotation_writer = AnnotationCsvWriter(annotation_file)
+        ordered_rows = OrderedRows(annotation_writer)
+        def on_done(raw_label_file, succeeded, outcome):
+            global csv_seconds
+            key = os.path.basename(raw_label_file)
+            progress.update(key, succeeded, outcome[2] if succeeded else None)
+            csv_started = time.perf_counter()
+            ordered_rows.put(label_indices[raw_label_file], outcome[0] if succeeded else None)
+            csv_seconds += time.perf_counter() - csv_started
+            if not succeeded:
+                manifest.fail(key)
+                return
+            succeeded_files.add(raw_label_file)
+            label_rows[key] = len(outcome[0])
+            if outcome[1] is not None:
+                manifest.finish(key, outcome[1])
+                video_stats[raw_label_file] = outcome[2]
+
+        with annotation_writer:
+            _, failures = run_label_jobs(process_label_file, raw_label_files, args.workers, on_done=on_done, keep_results=False,
+                                         file_kwargs=[{"skip_images": skip_images} for skip_images in skip_flags],
+                                         extract_mode=args.extract_mode, check_seek=args.check_seek,
+                                         encode_workers=args.encode_workers, encode_mode=args.encode_mode,
+                                         profile_dir=args.profile_dir, output=args.output, shard_size=args.shard_size << 20,
+                                         resizer=resizer, label_cache=None if args.no_label_cache else LABEL_CACHE_PATH)
+    print_failures(failures, len(raw_label_files))
     
-    # save annotation 
-    save_annotation(processed_annotations)    
-    # check processed data file matching : annotation - images 
-    check_savefiles_matching()
+    csv_started = time.perf_counter()
+    if args.columnar:
+        csv_to_npy(annotation_file)
+    if args.output == "shards":
+        # video 별 index 를 label file 순서대로 합침 (image_name -> shard, offset) 
+        merge_shard_indexes([shard_index_file(PROCESSED_SHARD_PATH, os.path.splitext(os.path.basename(f))[0])
+                             for f in raw_label_files if f in succeeded_files],
+                            shard_file(PROCESSED_SHARD_PATH + SHARD_INDEX_NAME, args.shard))
+    csv_seconds += time.perf_counter() - csv_started
+    # run report : image 를 새로 만든 video 만 video 별 결과에 포함 
+    video_stats = [video_stats[f] for f in raw_label_files if f in video_stats]
+    skipped_count = sum(1 for f, skip_images in zip(raw_label_files, skip_flags) if f in succeeded_files and skip_images)
+    write_run_report(shard_file(args.report, args.shard), video_stats, failures, skipped_count, time.perf_counter() - run_started,
+                     extra_stages={"csv": csv_seconds},
+                     params={"extract_mode": args.extract_mode, "workers": args.workers,
+                             "encode_workers": args.encode_workers, "encode_mode": args.encode_mode,
+                             **(resizer.params() if resizer is not None else {})})
+    if args.shard is not None:
+        # 다른 shard 의 image 도 같은 폴더에 있으므로 annotation - images 확인은 합친 뒤에 
+        write_work_shard(PROCESSED_WORK_SHARD_FILE, args.shard,
+                         [(os.path.basename(f), label_rows[os.path.basename(f)]) for f in raw_label_files if f in succeeded_files],
+                         failed=[os.path.basename(f) for f in raw_label_files if f not in succeeded_files],
+                         annotation=PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME,
+                         shard_index=PROCESSED_SHARD_PATH + SHARD_INDEX_NAME if args.output == "shards" else None)
+    else:
+        # check processed data file matching : annotation - images 
+        check_savefiles_matching(args.output)
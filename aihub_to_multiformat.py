@@ -0,0 +1,271 @@
+"""
+    ai hub dataset (video(mp4) / label(json)) 을 여러 형식으로 한 번에 변환
+    - label 은 한 번만 parsing, video 는 한 번만 decode
+    - 선택된 frame 마다 image 를 한 번만 encoding 하고, 그 image 를 각 format writer 가 같이 사용
+        - anncsv : dino finetuning annotation.csv row (image_name 은 공유 image 의 이름)
+        - yolo   : YOLOv8 txt label (image 와 같은 이름의 .txt)
+    - image 이름은 <video 이름>_<frame 번호>.<png|jpg> (모든 format 공통)
+    - annotation.csv 는 video 별 part csv 를 label file 순서대로 합쳐 만듦 (바뀌지 않은 video 는 이전 part 를 그대로 사용)
+"""
+
+import os, glob
+import time
+import argparse
+
+from video_frames import EXTRACT_MODES, FrameReader, check_seek_matching, frames_as_intervals
+from batch_jobs import run_label_jobs, print_failures
+from image_writer import ENCODE_MODES, ImageWriterPool
+from build_manifest import BuildManifest
+from run_stats import RunStats, ProgressReporter, write_run_report, profile_call, profile_file_for
+from tar_shards import OUTPUT_MODES, SHARD_MAX_BYTES, SHARD_INDEX_NAME, TarShardWriter, shard_index_file, merge_shard_indexes
+from frame_sampler import SAMPLING_MODES, build_frame_plan, plan_digest
+from frame_resize import RESIZE_SIDES, INTERPOLATIONS, make_resizer
+from annotation_writer import AnnotationCsvWriter, merge_annotation_csvs
+from aihub_to_anncsv import LABEL_CACHE_PATH, load_label_file
+from work_shards import parse_shard, select_shard, shard_file, write_work_shard
+
+# data path / class settings
+
+RAW_VIDEO_PATH = "raw_data/video/"
+RAW_LABEL_PATH = "raw_data/label/"
+RESULT_IMAGES_PATH = "processed_data/images/"
+RESULT_LABEL_PATH = "processed_data/label/"
+RESULT_ANNOTATION_PATH = "processed_data/annotation/"
+RESULT_ANNOTATION_NAME = "annotation.csv"
+RESULT_PARTS_PATH = "processed_data/annotation/parts/"
+RESULT_SHARD_PATH = "processed_data/shards_multi/"
+RESULT_MANIFEST_FILE = "processed_data/manifest_multiformat.json"
+RESULT_REPORT_FILE = "processed_data/run_report_multiformat.json"
+RESULT_FRAME_PLAN_FILE = "processed_data/frame_plan_multiformat.json"
+RESULT_WORK_SHARD_FILE = "processed_data/work_shards_multiformat.json"
+FORMATS = ("anncsv", "yolo")
+IMAGE_FORMATS = ("png", "jpg")
+CLASS_NAME = "smokingPerson"  # anncsv label_name
+CLASS_ID = 0  # yolo class id
+EXTRACT_STEP = 1  # event frame 중 몇 frame 마다 하나씩 저장할지 (1 : 모든 event frame)
+EXTRACT_MODE = "seek"
+ENCODE_WORKERS = 2
+ENCODE_MODE = "thread"
+
+# format writers : frame 하나(공유 image) 에 대한 각 format 의 결과
+
+def anncsv_rows(image_name, frame_size, boxes, label_name=CLASS_NAME):
+    """ boxes : [[x_center, y_center, width, height], ..] (절대 좌표) -> annotation.csv row 목록 """
+    image_width, image_height = frame_size
+    rows = []
+    for bbox_x_center, bbox_y_center, bbox_width, bbox_height in boxes:
+        rows.append({
+            "label_name": label_name,
+            "bbox_x": int(bbox_x_center-bbox_width/2),
+            "bbox_y": int(bbox_y_center-bbox_height/2),
+            "bbox_width": int(bbox_width),
+            "bbox_height": int(bbox_height),
+            "image_name": image_name,
+            "image_width": image_width,
+            "image_height": image_height
+        })
+    return rows
+
+def yolo_txt(frame_size, boxes, class_id=CLASS_ID):
+    """ boxes (절대 좌표 center xywh) -> YOLOv8 txt 내용 (box 하나당 한 줄, 상대 좌표 소수 2자리) """
+    frame_w, frame_h = frame_size
+    lines = []
+    for x_center, y_center, width, height in boxes:
+        bbox = [x_center/frame_w, y_center/frame_h, width/frame_w, height/frame_h]
+        lines.append(' '.join(map(str, [class_id]+[round(num, 2) for num in bbox])))
+    return '\n'.join(lines)
+
+def part_csv_file(label_file):
+    return RESULT_PARTS_PATH + os.path.splitext(os.path.basename(label_file))[0] + ".csv"
+
+# a label file -> images + 각 format 결과 (process pool worker 에서도 실행됨)
+
+def convert_label_file(label_file, formats=FORMATS, image_format="png", extract_step=EXTRACT_STEP, extract_mode=EXTRACT_MODE,
+                       check_seek=False, encode_workers=ENCODE_WORKERS, encode_mode=ENCODE_MODE, output="files",
+                       shard_size=SHARD_MAX_BYTES, profile_dir=None, frame_nums=None, resizer=None, label_cache=LABEL_CACHE_PATH):
+    """
+        returns : (저장한 file 목록, RunStats dict)
+        - frame_nums : frame sampling plan 의 이 video 몫 (있으면 extract_step 대신 이 frame 들만 decode)
+        - resizer : image 를 줄여서 저장 (frame_resize.FrameResizer). anncsv box / image 크기는 같은 비율로, yolo 상대 좌표는 그대로
+    """
+    if profile_dir is not None:
+        return profile_call(profile_file_for(profile_dir, label_file), convert_label_file, label_file, formats, image_format,
+                            extract_step, extract_mode, check_seek, encode_workers, encode_mode, output, shard_size, None, frame_nums,
+                            resizer, label_cache)
+    print(f"## now processing {os.path.basename(label_file)} file ##")
+    stats = RunStats(os.path.basename(label_file))
+    # aihub_to_anncsv 와 같은 parser, 같은 .npz cache 사용 
+    parsed_label, _ = load_label_file(label_file, stats, label_cache)
+    video_name, frame_size, event_frames = parsed_label["video_name"], parsed_label["frame_size"], parsed_label["event_frames"]
+    # FrameBoxes : frame 번호 -> boxes (한 frame 에 box 가 여러 개일 수 있음)
+    frame_boxes = parsed_label["bboxes"]
+    video_file = RAW_VIDEO_PATH + video_name
+    if check_seek:
+        check_seek_matching(video_file, event_frames)
+    if frame_nums is not None:
+        event_frames, extract_step = frames_as_intervals(frame_nums), 1
+
+    name_base = os.path.splitext(video_name)[0]
+    # 저장 file 이름 앞부분은 video 마다 한 번만 만듦
+    image_name_prefix, label_file_prefix = f"{name_base}_", f"{RESULT_LABEL_PATH}{name_base}_"
+    shard_writer = None
+    if output == "shards":
+        shard_writer = TarShardWriter(RESULT_SHARD_PATH, os.path.splitext(os.path.basename(label_file))[0], shard_size)
+    saved_files, rows = [], []
+    try:
+        resize = resizer.writer_resize(frame_size) if resizer is not None else None
+        image_size = resizer.target_size(frame_size) if resizer is not None else frame_size
+        # 저장하지 않는 frame 과 encoding 이 끝난 frame 의 buffer 는 다음 decode 에 다시 씀
+        with ImageWriterPool(encode_workers, encode_mode, sink=shard_writer, resize=resize) as image_writer, \
+             FrameReader(video_file, event_frames, extract_mode, image_writer.max_pending + 2) as reader:
+            saving_count = 0
+            for cur_frame_num, frame in stats.timed(reader, "decode"):
+                stats.count("frames")
+                if saving_count % extract_step == 0:
+                    # image 는 한 번만 encoding, 각 format 은 같은 image 이름을 사용
+                    image_name = f"{image_name_prefix}{cur_frame_num}.{image_format}"
+                    boxes = frame_boxes.boxes(cur_frame_num).tolist()
+                    extra_files = {}
+                    if "yolo" in formats:
+                        extra_files[f"{label_file_prefix}{cur_frame_num}.txt"] = yolo_txt(frame_size, boxes).encode()
+                    if "anncsv" in formats:
+                        image_boxes = resizer.scale_boxes(boxes, frame_size) if resizer is not None else boxes
+                        rows.extend(anncsv_rows(image_name, image_size, image_boxes))
+                    image_writer.submit(RESULT_IMAGES_PATH + image_name, frame, extra_files=extra_files, release=reader.retain())
+                    saved_files.append(RESULT_IMAGES_PATH + image_name)
+                    saved_files.extend(extra_files)
+                saving_count += 1
+        stats.add_writer(image_writer)
+        stats.count("frame_allocations", reader.buffers.allocations)
+    finally:
+        if shard_writer is not None:
+            saved_files = shard_writer.close()
+
+    if "anncsv" in formats:
+        with stats.stage("csv"):
+            # 임시 file 에 쓰고 교체하므로 중간에 죽어도 잘린 part csv 가 남지 않음
+            with AnnotationCsvWriter(part_csv_file(label_file)) as annotation_writer:
+                annotation_writer.write_rows(rows)
+        saved_files.append(part_csv_file(label_file))
+        stats.count("annotations", len(rows))
+    print(f"{', '.join(formats)} saved! : from {video_name}, {stats.counts.get('images_written', 0)} images")
+    return saved_files, stats.finish().to_dict()
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="aihub video/json label to dino annotation.csv + yolov8 txt in one pass")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS),
+                        help="만들 annotation format 들 (image 는 모든 format 이 공유)")
+    parser.add_argument("--image-format", choices=IMAGE_FORMATS, default=None,
+                        help="공유 image 형식 (기본 : anncsv 가 있으면 png, 아니면 jpg)")
+    parser.add_argument("--extract-step", type=int, default=EXTRACT_STEP,
+                        help="event frame 중 N frame 마다 하나씩 저장")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default=EXTRACT_MODE,
+                        help="seek : event 범위만 decode / full : 모든 frame decode")
+    parser.add_argument("--check-seek", action="store_true",
+                        help="각 video 에 대해 seek 추출 결과가 full 추출 결과와 같은지 먼저 확인")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="label file(video) 들을 나누어 처리할 process 수")
+    parser.add_argument("--encode-workers", type=int, default=ENCODE_WORKERS,
+                        help="video 당 image encoding/writing worker 수 (0 : decode loop 안에서 바로 저장)")
+    parser.add_argument("--encode-mode", choices=ENCODE_MODES, default=ENCODE_MODE,
+                        help="thread : thread pool / process : shared memory 로 frame 을 넘기는 process pool")
+    parser.add_argument("--output", choices=OUTPUT_MODES, default="files",
+                        help="files : 낱개 file / shards : video 별 tar shard (image 뒤에 같은 key 의 txt) + index.csv")
+    parser.add_argument("--shard-size", type=int, default=SHARD_MAX_BYTES >> 20,
+                        help="shard 하나의 최대 크기 (MB)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="build manifest 를 무시하고 모든 video 를 다시 변환")
+    parser.add_argument("--report", default=RESULT_REPORT_FILE,
+                        help="stage 별 시간, fps, 건너뜀/실패 수를 담은 실행 보고서(json) 경로")
+    parser.add_argument("--profile-dir", default=None,
+                        help="지정하면 video 마다 cProfile 결과를 <profile-dir>/<label name>.prof 로 저장")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="전체 dataset 에서 저장할 frame 수 (지정하면 --extract-step 대신 frame sampling plan 사용)")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="uniform",
+                        help="uniform : 전체 event frame 에서 같은 간격 / camera : camera 별로 같은 수 / time : 같은 frame 간격")
+    parser.add_argument("--resize", type=int, default=None,
+                        help="지정하면 image 의 짧은 변(--resize-side long : 긴 변)을 이 크기로 줄여서 저장 (anncsv box, image 크기도 같이 변환)")
+    parser.add_argument("--resize-side", choices=RESIZE_SIDES, default="short",
+                        help="--resize 를 맞출 변")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default="area",
+                        help="resize interpolation")
+    parser.add_argument("--no-label-cache", action="store_true",
+                        help=f"parse 한 label 의 .npz cache ({LABEL_CACHE_PATH}) 를 사용하지 않고 항상 json 을 parse")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="i/N : label file 이름의 hash 로 나눈 N 개 중 i 번째 (0 부터) 만 처리. 여러 machine 의 결과는 python work_shards.py 로 합침")
+    args = parser.parse_args()
+    resizer = make_resizer(args.resize, args.resize_side, args.interpolation)
+    image_format = args.image_format or ("png" if "anncsv" in args.formats else "jpg")
+    run_started = time.perf_counter()
+
+    all_label_files = sorted(glob.glob(RAW_LABEL_PATH + "*.json"))
+    label_files = select_shard(all_label_files, args.shard)
+    video_file_of = lambda label_file: RAW_VIDEO_PATH + os.path.splitext(os.path.basename(label_file))[0] + ".mp4"
+    manifest_params = {"formats": sorted(args.formats), "image_format": image_format, "class_name": CLASS_NAME,
+                       "class_id": CLASS_ID, "extract_step": args.extract_step, "output": args.output}
+    if args.output == "shards":
+        manifest_params["shard_size"] = args.shard_size
+    if resizer is not None:
+        manifest_params.update(resizer.params())
+    frame_plan, plan_digests = None, None
+    if args.budget is not None:
+        # --shard 여도 전체 label 로 plan 을 정해야 shard 끼리 같은 plan 
+        frame_plan = build_frame_plan(all_label_files, args.budget, args.sampling, shard_file(RESULT_FRAME_PLAN_FILE, args.shard))
+        plan_digests = {key: plan_digest(frame_nums) for key, frame_nums in frame_plan.items()}
+        manifest_params.update({"budget": args.budget, "sampling": args.sampling})
+    with BuildManifest(shard_file(RESULT_MANIFEST_FILE, args.shard), manifest_params, plan_digests) as manifest:
+        removed_keys = manifest.remove_missing(os.path.basename(f) for f in label_files)
+        todo_label_files = [f for f in label_files
+                            if args.rebuild or not manifest.is_up_to_date(os.path.basename(f), f, video_file_of(f))]
+        for label_file in todo_label_files:
+            manifest.begin(os.path.basename(label_file), label_file, video_file_of(label_file))
+        print(f"build manifest : {len(label_files)-len(todo_label_files)} videos unchanged, {len(todo_label_files)} videos to process, {len(removed_keys)} removed")
+
+        progress = ProgressReporter(len(todo_label_files))
+        def on_done(label_file, succeeded, outcome):
+            progress.update(os.path.basename(label_file), succeeded, outcome[1] if succeeded else None)
+            if succeeded:
+                manifest.finish(os.path.basename(label_file), outcome[0])
+            else:
+                manifest.fail(os.path.basename(label_file))
+
+        file_kwargs = None
+        if frame_plan is not None:
+            file_kwargs = [{"frame_nums": frame_plan[os.path.basename(f)]} for f in todo_label_files]
+        results, failures = run_label_jobs(convert_label_file, todo_label_files, args.workers, on_done=on_done, file_kwargs=file_kwargs,
+                                           formats=args.formats, image_format=image_format, extract_step=args.extract_step,
+                                           extract_mode=args.extract_mode, check_seek=args.check_seek,
+                                           encode_workers=args.encode_workers, encode_mode=args.encode_mode,
+                                           output=args.output, shard_size=args.shard_size << 20, profile_dir=args.profile_dir,
+                                           resizer=resizer, label_cache=None if args.no_label_cache else LABEL_CACHE_PATH)
+    print_failures(failures, len(todo_label_files))
+
+    # 실패한 video 를 뺀 나머지를 label file 순서대로 합침
+    failed_files = set(label_file for label_file, _ in failures)
+    done_label_files = [f for f in label_files if f not in failed_files]
+    csv_started = time.perf_counter()
+    label_rows = None
+    if "anncsv" in args.formats:
+        os.makedirs(RESULT_ANNOTATION_PATH, exist_ok=True)
+        # video 별 part csv 를 순서대로 이어 붙임 (한 번에 한 줄씩, 전체를 메모리에 올리지 않음) 
+        label_rows = []
+        merge_annotation_csvs([part_csv_file(f) for f in done_label_files],
+                              shard_file(RESULT_ANNOTATION_PATH + RESULT_ANNOTATION_NAME, args.shard), row_counts=label_rows)
+    if args.output == "shards":
+        merge_shard_indexes([shard_index_file(RESULT_SHARD_PATH, os.path.splitext(os.path.basename(f))[0]) for f in done_label_files],
+                            shard_file(RESULT_SHARD_PATH + SHARD_INDEX_NAME, args.shard))
+    if args.shard is not None:
+        # anncsv 가 없으면 label 별 결과 file 수만 기록 
+        if label_rows is None:
+            label_rows = [len(manifest.entries[os.path.basename(f)]["outputs"]) for f in done_label_files]
+        write_work_shard(RESULT_WORK_SHARD_FILE, args.shard, list(zip(map(os.path.basename, done_label_files), label_rows)),
+                         failed=[os.path.basename(f) for f in label_files if f in failed_files],
+                         annotation=RESULT_ANNOTATION_PATH + RESULT_ANNOTATION_NAME if "anncsv" in args.formats else None,
+                         shard_index=RESULT_SHARD_PATH + SHARD_INDEX_NAME if args.output == "shards" else None)
+    write_run_report(shard_file(args.report, args.shard), [result[1] for result in results if result is not None], failures,
+                     len(label_files) - len(todo_label_files), time.perf_counter() - run_started,
+                     extra_stages={"csv": time.perf_counter() - csv_started},
+                     params={**manifest_params, "extract_mode": args.extract_mode, "workers": args.workers,
+                             "encode_workers": args.encode_workers, "encode_mode": args.encode_mode})
@@ -6,38 +6,79 @@
 """
 
 import os, glob 
+import sys
 import cv2 
-import json, re 
+import re 
+import time
+import argparse
+
+# 상위 폴더의 공용 모듈 사용 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video_frames import EXTRACT_MODES, FrameReader, check_seek_matching, merge_frame_ranges, FrameIntervals, frames_as_intervals
+from batch_jobs import run_label_jobs, print_failures
+from image_writer import ENCODE_MODES, ImageWriterPool
+from build_manifest import BuildManifest
+from label_stream import load_label_json
+from label_cache import load_parsed_label
+from frame_boxes import FrameBoxes
+from run_stats import RunStats, ProgressReporter, write_run_report, profile_call, profile_file_for
+from tar_shards import OUTPUT_MODES, SHARD_MAX_BYTES, SHARD_INDEX_NAME, TarShardWriter, shard_index_file, merge_shard_indexes
+from frame_sampler import SAMPLING_MODES, build_frame_plan, plan_digest
+from frame_resize import RESIZE_SIDES, INTERPOLATIONS, make_resizer
+from workload_planner import plan_workload, print_workload
+from work_shards import parse_shard, select_shard, shard_file, write_work_shard
 
 # data path settings 
 RAW_VIDEO_PATH = "raw_data/video/"
 RAW_LABEL_PATH = "raw_data/label/"
 RESULT_IMAGES_PATH = "processed_data/images/"
 RESULT_LABEL_PATH = "processed_data/label/"
+RESULT_SHARD_PATH = "processed_data/shards_yolo/"
+RESULT_MANIFEST_FILE = "processed_data/manifest_yolov8txt.json"
+RESULT_REPORT_FILE = "processed_data/run_report_yolov8txt.json"
+RESULT_FRAME_PLAN_FILE = "processed_data/frame_plan_yolov8txt.json"
+RESULT_WORK_SHARD_FILE = "processed_data/work_shards_yolov8txt.json"
+LABEL_CACHE_PATH = "processed_data/label_cache/"  # parse 한 label 의 .npz cache (label 이 바뀌지 않았으면 json 을 읽지 않음)
+EXTRACT_MODE = "seek"  # "seek" : event 범위만 decode / "full" : 모든 frame decode
+ENCODE_WORKERS = 2  # jpg encoding/writing worker 수 (0 : decode loop 안에서 바로 저장)
+ENCODE_MODE = "thread"  # "thread" / "process" (shared memory 로 frame 전달)
+OUTPUT_MODE = "files"  # "files" : jpg, txt 낱개 file / "shards" : video 별 tar shard (같은 key 의 jpg + txt) + index 
 
 # parser for 'AIHUB smokingperson dataset json label format'  
 class JsonLabelParser():  
-    def __init__(self, jsonlabel_file): 
+    def __init__(self, jsonlabel_file, stats=None, label_cache=None): 
+        # label_cache : parse 결과 .npz cache 폴더 (label 이 바뀌지 않았으면 json 대신 cache 에서 읽음) 
         video_exists, video_name = self._check_matching_video(jsonlabel_file)
         if not video_exists:
             raise RuntimeError("MATCHING VIDEO NOT FOUND .. ")
+        self.stats = stats if stats is not None else RunStats(os.path.basename(jsonlabel_file))
         
-        with open(jsonlabel_file, "r", encoding="utf-8") as jsonfile: 
-            raw_label_json = json.load(jsonfile)  
-
-        # parse json raw label file 
-        self.video_name, self.frame_size = self._info_parser(raw_label_json["info"])
+        started = time.perf_counter()
+        label_infos, cached = load_parsed_label(jsonlabel_file, self._parse_json, label_cache, "yolo")
+        if cached:
+            self.stats.add_seconds("parse", time.perf_counter() - started)
+            self.stats.count("label_cache_hits")
+        self.video_name, self.frame_size = label_infos["video_name"], label_infos["frame_size"]
+        self.event_frames, self.bboxes = label_infos["event_frames"], label_infos["bboxes"]
         if video_name != self.video_name :
             raise RuntimeError("VIDEO NAME IN LABEL DOES NOT MATCHING .. ")
-        event_frames = self._events_parser(raw_label_json["events"])
-        self.event_frames = sorted(event_frames, key=lambda x: x[0])
-        self.bboxes = self._annotations_parser(raw_label_json["annotations"]) 
         ### bboxes item example : [259, [0.48, 0.45, 0.06, 0.11]] 
         # : [frame_idx, [xcr,ycr,wr,hr]] 
         ### (+ raw bbox form in jsonlabel) 
         # : [259, [930.8410163879398, 481.18691635131836, 119.28203277587818, 114.37383270263672]] 
         # : [frame_idx, [x1,y1,x2,y2]] 
 
+    def _parse_json(self, jsonlabel_file):
+        with self.stats.stage("parse"):
+            # streaming parse : smoking annotation 만 메모리에 남김 (json.load 결과와 같은 형태) 
+            raw_label_json = load_label_json(jsonlabel_file, class_name="smoking")
+            # parse json raw label file 
+            video_name, frame_size = self._info_parser(raw_label_json["info"])
+        with self.stats.stage("filter"):
+            event_frames = self._events_parser(raw_label_json["events"])
+            bboxes = self._annotations_parser(frame_size, raw_label_json["annotations"]) 
+        return {"video_name": video_name, "frame_size": frame_size, "event_frames": event_frames, "bboxes": bboxes}
+
     def get_label_infos(self):
         label_infos = {
             "video_name": self.video_name,
@@ -79,33 +120,37 @@ class JsonLabelParser():
                 ev_start_frame = event["ev_start_frame"]
                 ev_end_frame = event["ev_end_frame"]
                 event_frames.append([ev_start_frame, ev_end_frame])
-        return event_frames
+        # 정렬 후 겹치는 범위 병합 
+        return merge_frame_ranges(event_frames)
 
-    def _annotation_parser(self, annotation): 
+    def _annotation_parser(self, frame_size, annotation): 
         cur_frame = annotation["cur_frame"] 
         bbox_raw = annotation["bbox"]
         x1, y1 = bbox_raw[0]
         x2, y2 = bbox_raw[1]
         xc, yc = (x1+x2)/2, (y1+y2)/2
         w, h = x2-x1, y2-y1 
-        frame_w, frame_h = self.frame_size
+        frame_w, frame_h = frame_size
         bbox = [xc/frame_w, yc/frame_h, w/frame_w, h/frame_h]  ### returns yolo8.bbox format 
         rounded_bbox = [round(num, 2) for num in bbox]
         return cur_frame, rounded_bbox
 
-    def _annotations_parser(self, annotations):
+    def _annotations_parser(self, frame_size, annotations):
+        # returns : FrameBoxes (frame 번호 순 정렬, frame -> boxes 조회) 
         bboxes = []
         annotations = [annotation for annotation in annotations if annotation["class_name"]=="smoking"]
-        annotations = sorted(annotations, key=lambda x: x["cur_frame"])  
         for annotation in annotations:
-            cur_frame, bbox = self._annotation_parser(annotation)
+            cur_frame, bbox = self._annotation_parser(frame_size, annotation)
             bboxes.append([cur_frame, bbox])
-        return bboxes
+        return FrameBoxes.from_pairs(bboxes)
 
 # dataset maker to 'yolov8 format', from video & {frame:bbox}list 
 class DatasetMaker():
-    def __init__(self, label_infos, class_id=0, extract_ratio=1.0):  
+    def __init__(self, label_infos, class_id=0, extract_ratio=1.0, extract_mode=EXTRACT_MODE, 
+                 encode_workers=ENCODE_WORKERS, encode_mode=ENCODE_MODE, stats=None, shard_writer=None, frame_nums=None, resizer=None):  
         # label_infos={"video_name":..,"frame_size":..,"event_frames":..,"bboxes":..}
+        # frame_nums : frame sampling plan 의 이 video 몫 (있으면 extract_ratio 대신 이 frame 들만 decode)
+        # resizer : jpg 를 줄여서 저장 (frame_resize.FrameResizer). yolo box 는 상대 좌표이므로 그대로 
         
         self.video_name = label_infos["video_name"]
         video_exists, video_file = self._check_matching_video(self.video_name)
@@ -114,45 +159,72 @@ class DatasetMaker():
 
         self.video_file = video_file
         self.event_frames = label_infos["event_frames"]
+        self.event_intervals = FrameIntervals(self.event_frames)
         self.bbox_list = label_infos["bboxes"]
         self.class_id = class_id
-        self.extract_size = int(len(self.bbox_list)*extract_ratio)
-        self.extract_step = len(self.bbox_list)//self.extract_size
+        self.extract_mode = extract_mode
+        self.encode_workers = encode_workers
+        self.encode_mode = encode_mode
+        if frame_nums is not None:
+            self.event_intervals = frames_as_intervals(frame_nums)
+            self.extract_size, self.extract_step = len(frame_nums), 1
+        else:
+            # box 가 적어 int(box 수 * extract_ratio) 가 0 이어도 최소 한 간격은 저장 (box 가 없는 label 은 generate_dataset 에서 건너뜀) 
+            self.extract_size = max(1, int(len(self.bbox_list)*extract_ratio))
+            self.extract_step = max(1, len(self.bbox_list)//self.extract_size)
         self.result_namebase = self.video_name.split(".")[0]
+        # 저장 file 이름 앞부분은 video 마다 한 번만 만듦 
+        self.result_image_prefix = RESULT_IMAGES_PATH + self.result_namebase + "_"
+        self.result_txtlabel_prefix = RESULT_LABEL_PATH + self.result_namebase + "_"
+        self.stats = stats if stats is not None else RunStats(self.video_name)
+        self.shard_writer = shard_writer  # 있으면 jpg, txt 를 낱개 file 대신 tar shard 에 저장 
+        self.resize = resizer.writer_resize(label_infos["frame_size"]) if resizer is not None else None
         # self.result_namebase = self._generate_unique_namebase()
     
     def generate_dataset(self): 
         print(f"Generate dataset from {self.video_name} ,, ") 
-        cap = cv2.VideoCapture(self.video_file) 
-        if not cap.isOpened():
-            raise RuntimeError(f"Cannot open '{self.video_file}' file .. ") 
-
+        if len(self.bbox_list) == 0:
+            # smoking box 가 없는 label 은 빈 txt 의 학습 image 가 되므로 저장하지 않음 (run report 의 labels_without_boxes) 
+            print(f"No smoking boxes in the label of {self.video_name}, skipped.")
+            self.stats.count("labels_without_boxes")
+            return []
         saving_count = 0
-        while True:  
-            ret, frame = cap.read()
-            if not ret: 
-                break 
-            cur_frame_num = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) # 1부터 시작 
-            # save 
-            if any(start <= cur_frame_num <= end for start, end in self.event_frames):
+        saved_files = []
+        # decode 는 이 loop 에서, jpg encoding/writing 은 image_writer worker 에서 겹쳐 실행 
+        # 저장하지 않는 frame 과 encoding 이 끝난 frame 의 buffer 는 다음 decode 에 다시 씀 
+        with ImageWriterPool(self.encode_workers, self.encode_mode, sink=self.shard_writer, resize=self.resize) as image_writer, \
+             FrameReader(self.video_file, self.event_intervals, self.extract_mode, image_writer.max_pending + 2) as reader:
+            # cur_frame_num : 1부터 시작, event 범위 안의 frame 만 반환됨 
+            for cur_frame_num, frame in self.stats.timed(reader, "decode"):
+                self.stats.count("frames")
+                # save 
                 if saving_count % self.extract_step == 0: 
                     # print(cur_frame_num, end=",") 
                     ### result image 
-                    result_image_file = RESULT_IMAGES_PATH + self.result_namebase + f"_{cur_frame_num}.jpg" 
-                    cv2.imwrite(result_image_file, frame)
+                    result_image_file = f"{self.result_image_prefix}{cur_frame_num}.jpg" 
                     ### result txtlabel 
-                    result_txtlabel_file = RESULT_LABEL_PATH + self.result_namebase + f"_{cur_frame_num}.txt"
-                    # print(self.bbox_list[cur_frame_num][1])
-                    print(saving_count, cur_frame_num)
-                    txtlabel = [self.class_id]+(self.bbox_list[saving_count][1])
-                    # print(txtlabel) 
-                    with open(result_txtlabel_file, "w") as file:
-                        file.write(' '.join(map(str, txtlabel)))
+                    result_txtlabel_file = f"{self.result_txtlabel_prefix}{cur_frame_num}.txt"
+                    # 저장하는 frame 의 box 를 frame 번호로 찾음 (box 하나당 한 줄, box 가 없으면 빈 txt) 
+                    txtlabels = [[self.class_id]+bbox for bbox in self.bbox_list.boxes(cur_frame_num).tolist()]
+                    txtlabel_text = '\n'.join(' '.join(map(str, txtlabel)) for txtlabel in txtlabels)
+                    if self.shard_writer is not None:
+                        # txt 는 image 바로 뒤에 같은 shard 로 
+                        image_writer.submit(result_image_file, frame, extra_files={result_txtlabel_file: txtlabel_text.encode()},
+                                            release=reader.retain())
+                    else:
+                        image_writer.submit(result_image_file, frame, release=reader.retain())
+                        with self.stats.stage("write"):
+                            with open(result_txtlabel_file, "w") as file:
+                                file.write(txtlabel_text)
+                    self.stats.count("labels_written")
+                    saved_files.extend([result_image_file, result_txtlabel_file])
                 saving_count += 1
+        self.stats.add_writer(image_writer)
+        self.stats.count("frame_allocations", reader.buffers.allocations)
 
         print(f"Dataset saved from {self.video_name}, for frame range {self.event_frames}")
         print(f", with extract step {self.extract_step}, total {self.extract_size} sets saved.") 
-        cap.release()    
+        return saved_files
     
     def _check_matching_video(self, video_name): 
         video_file = RAW_VIDEO_PATH + video_name 
@@ -172,9 +244,82 @@ class DatasetMaker():
             return namebase
         else:
             raise RuntimeError(f"{self.video_name}에서 '17-16-00_b'와 같은 식별 코드를 찾을 수 없습니다 .. ")
+
+# a label file -> dataset (process pool worker 에서도 실행됨) 
+def make_dataset(label_file, class_id=0, extract_ratio=1.0, extract_mode=EXTRACT_MODE, check_seek=False,
+                 encode_workers=ENCODE_WORKERS, encode_mode=ENCODE_MODE, profile_dir=None, output=OUTPUT_MODE, shard_size=SHARD_MAX_BYTES,
+                 frame_nums=None, resizer=None, label_cache=LABEL_CACHE_PATH):
+    """ returns : (저장한 file(shards 이면 shard, index) 목록, RunStats dict) """
+    if profile_dir is not None:
+        # video 하나를 cProfile 로 실행 : <profile_dir>/<label name>.prof 
+        return profile_call(profile_file_for(profile_dir, label_file), make_dataset, label_file,
+                            class_id, extract_ratio, extract_mode, check_seek, encode_workers, encode_mode, None, output, shard_size,
+                            frame_nums, resizer, label_cache)
+    print("=============================================================================")
+    print(f"rawdata : {os.path.basename(label_file)}")
+    stats = RunStats(os.path.basename(label_file))
+    parsed_label = JsonLabelParser(label_file, stats, label_cache)
+    #parsed_label.print_label_infos(showDetail=True)
+    parsed_label.print_label_infos()
+    if check_seek:
+        check_seek_matching(RAW_VIDEO_PATH + parsed_label.video_name, parsed_label.event_frames)
+    shard_writer = None
+    if output == "shards":
+        shard_writer = TarShardWriter(RESULT_SHARD_PATH, os.path.splitext(os.path.basename(label_file))[0], shard_size)
+    try:
+        saved_files = DatasetMaker(parsed_label.get_label_infos(), class_id=class_id, extract_ratio=extract_ratio, extract_mode=extract_mode,
+                                   encode_workers=encode_workers, encode_mode=encode_mode, stats=stats,
+                                   shard_writer=shard_writer, frame_nums=frame_nums, resizer=resizer).generate_dataset() 
+    finally:
+        if shard_writer is not None:
+            saved_files = shard_writer.close()
+    return saved_files, stats.finish().to_dict()
     
 # main 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="aihub video/json label to yolov8 txt dataset")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default=EXTRACT_MODE,
+                        help="seek : event 범위만 decode / full : 모든 frame decode")
+    parser.add_argument("--check-seek", action="store_true",
+                        help="각 video 에 대해 seek 추출 결과가 full 추출 결과와 같은지 먼저 확인")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="label file(video) 들을 나누어 처리할 process 수")
+    parser.add_argument("--encode-workers", type=int, default=ENCODE_WORKERS,
+                        help="video 당 jpg encoding/writing worker 수 (0 : decode loop 안에서 바로 저장)")
+    parser.add_argument("--encode-mode", choices=ENCODE_MODES, default=ENCODE_MODE,
+                        help="thread : thread pool / process : shared memory 로 frame 을 넘기는 process pool")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="build manifest 를 무시하고 모든 video 의 dataset 을 다시 생성")
+    parser.add_argument("--output", choices=OUTPUT_MODES, default=OUTPUT_MODE,
+                        help="files : jpg, txt 낱개 file / shards : video 별 tar shard (WebDataset 형식) + index.csv")
+    parser.add_argument("--shard-size", type=int, default=SHARD_MAX_BYTES >> 20,
+                        help="shard 하나의 최대 크기 (MB)")
+    parser.add_argument("--report", default=RESULT_REPORT_FILE,
+                        help="stage 별 시간, fps, 건너뜀/실패 수를 담은 실행 보고서(json) 경로")
+    parser.add_argument("--profile-dir", default=None,
+                        help="지정하면 video 마다 cProfile 결과를 <profile-dir>/<label name>.prof 로 저장")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="전체 dataset 에서 저장할 frame 수 (지정하면 video 별 extract_ratio 대신 frame sampling plan 사용)")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="uniform",
+                        help="uniform : 전체 event frame 에서 같은 간격 / camera : camera 별로 같은 수 / time : 같은 frame 간격")
+    parser.add_argument("--resize", type=int, default=None,
+                        help="지정하면 image 의 짧은 변(--resize-side long : 긴 변)을 이 크기로 줄여서 저장")
+    parser.add_argument("--resize-side", choices=RESIZE_SIDES, default="short",
+                        help="--resize 를 맞출 변")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default="area",
+                        help="resize interpolation")
+    parser.add_argument("--no-label-cache", action="store_true",
+                        help=f"parse 한 label 의 .npz cache ({LABEL_CACHE_PATH}) 를 사용하지 않고 항상 json 을 parse")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="frame 을 decode 하지 않고 decode / 저장할 frame 수, 예상 bytes, 예상 시간만 출력 (workload_planner.py)")
+    parser.add_argument("--calibration", default=None,
+                        help="--dry-run 의 예상 시간에 사용할 benchmarks/run_benchmarks.py 결과 json")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="i/N : label file 이름의 hash 로 나눈 N 개 중 i 번째 (0 부터) 만 처리. 모든 shard 가 끝났는지는 python work_shards.py 로 확인")
+    args = parser.parse_args()
+    resizer = make_resizer(args.resize, args.resize_side, args.interpolation)
+    run_started = time.perf_counter()
+
     # result label & images 폴더 초기화 
     # print("=============================================================================")
     # def delete_files_in_directory(directory_path):
@@ -187,12 +332,73 @@ if __name__ == "__main__":
     # delete_files_in_directory(RESULT_IMAGES_PATH.rstrip('/'))
     # 데이터셋 생성 
     print("=============================================================================")
-    label_files = glob.glob(RAW_LABEL_PATH + "*.json")
-    for idx, label_file in enumerate(label_files):
-        print("=============================================================================")
-        print(f"rawdata count : {idx+1}")
-        parsed_label = JsonLabelParser(label_file)
-        #parsed_label.print_label_infos(showDetail=True)
-        parsed_label.print_label_infos()
-        DatasetMaker(parsed_label.get_label_infos(), class_id=0, extract_ratio=0.01).generate_dataset() 
+    class_id, extract_ratio = 0, 0.01
+    all_label_files = sorted(glob.glob(RAW_LABEL_PATH + "*.json"))
+    label_files = select_shard(all_label_files, args.shard)
+    video_file_of = lambda label_file: RAW_VIDEO_PATH + os.path.splitext(os.path.basename(label_file))[0] + ".mp4"
+    if args.dry_run:
+        # 실제 실행과 같이 frame plan 은 모든 label 로 만들고 이 shard 의 label 몫만 계산 (plan file 은 저장하지 않음) 
+        frame_plan = build_frame_plan(all_label_files, args.budget, args.sampling) if args.budget is not None else None
+        workload = plan_workload(label_files, "yolov8txt", args.extract_mode, extract_ratio, args.budget, args.sampling, resizer,
+                                 calibration_file=args.calibration, workers=args.workers,
+                                 label_cache=None if args.no_label_cache else LABEL_CACHE_PATH, video_path=RAW_VIDEO_PATH,
+                                 frame_plan=frame_plan)
+        print_workload(workload)
+        sys.exit(0)
+    manifest_params = {"format": "jpg", "class_id": class_id, "extract_ratio": extract_ratio}
+    if args.output == "shards":
+        manifest_params.update({"output": args.output, "shard_size": args.shard_size})
+    if resizer is not None:
+        manifest_params.update(resizer.params())
+    frame_plan, plan_digests = None, None
+    if args.budget is not None:
+        # 모든 label 의 event 범위를 먼저 읽어 video 별로 저장할 frame 번호를 정함 (--shard 여도 전체 label 로 정해야 shard 끼리 같은 plan) 
+        frame_plan = build_frame_plan(all_label_files, args.budget, args.sampling, shard_file(RESULT_FRAME_PLAN_FILE, args.shard))
+        plan_digests = {key: plan_digest(frame_nums) for key, frame_nums in frame_plan.items()}
+        manifest_params.update({"budget": args.budget, "sampling": args.sampling})
+    with BuildManifest(shard_file(RESULT_MANIFEST_FILE, args.shard), manifest_params, plan_digests) as manifest:
+        # 사라진 label 의 결과 삭제, 바뀌지 않은 video 는 건너뜀 
+        removed_keys = manifest.remove_missing(os.path.basename(f) for f in label_files)
+        todo_label_files = [f for f in label_files
+                            if args.rebuild or not manifest.is_up_to_date(os.path.basename(f), f, video_file_of(f))]
+        for label_file in todo_label_files:
+            manifest.begin(os.path.basename(label_file), label_file, video_file_of(label_file))
+        print(f"build manifest : {len(label_files)-len(todo_label_files)} videos unchanged, {len(todo_label_files)} videos to process, {len(removed_keys)} removed")
+
+        progress = ProgressReporter(len(todo_label_files))
+        def on_done(label_file, succeeded, outcome):
+            progress.update(os.path.basename(label_file), succeeded, outcome[1] if succeeded else None)
+            if succeeded:
+                manifest.finish(os.path.basename(label_file), outcome[0])
+            else:
+                manifest.fail(os.path.basename(label_file))
+
+        file_kwargs = None
+        if frame_plan is not None:
+            file_kwargs = [{"frame_nums": frame_plan[os.path.basename(f)]} for f in todo_label_files]
+        results, failures = run_label_jobs(make_dataset, todo_label_files, args.workers, on_done=on_done, file_kwargs=file_kwargs,
+                                           class_id=class_id, extract_ratio=extract_ratio,
+                                           extract_mode=args.extract_mode, check_seek=args.check_seek,
+                                           encode_workers=args.encode_workers, encode_mode=args.encode_mode,
+                                           profile_dir=args.profile_dir, output=args.output, shard_size=args.shard_size << 20,
+                                           resizer=resizer, label_cache=None if args.no_label_cache else LABEL_CACHE_PATH)
+    print("=============================================================================")
+    print_failures(failures, len(todo_label_files))
+    if args.output == "shards":
+        # video 별 index 를 label file 순서대로 합침 (실패한 video 제외) 
+        failed_files = set(label_file for label_file, _ in failures)
+        merge_shard_indexes([shard_index_file(RESULT_SHARD_PATH, os.path.splitext(os.path.basename(f))[0])
+                             for f in label_files if f not in failed_files],
+                            shard_file(RESULT_SHARD_PATH + SHARD_INDEX_NAME, args.shard))
+    write_run_report(shard_file(args.report, args.shard), [result[1] for result in results if result is not None], failures,
+                     len(label_files) - len(todo_label_files), time.perf_counter() - run_started,
+                     params={**manifest_params, "extract_mode": args.extract_mode,
+                             "workers": args.workers, "encode_workers": args.encode_workers, "encode_mode": args.encode_mode})
+    if args.shard is not None:
+        # annotation 이 없으므로 label 별 결과 file 수만 기록 (work_shards.py 로 모든 shard 가 끝났는지 확인) 
+        failed_files = set(label_file for label_file, _ in failures)
+        write_work_shard(RESULT_WORK_SHARD_FILE, args.shard,
+                         [(os.path.basename(f), len(manifest.entries[os.path.basename(f)]["outputs"])) for f in label_files if f not in failed_files],
+                         failed=[os.path.basename(f) for f in label_files if f in failed_files],
+                         shard_index=RESULT_SHARD_PATH + SHARD_INDEX_NAME if args.output == "shards" else None)
          
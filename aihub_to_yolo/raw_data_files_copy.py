@@ -1,59 +1,58 @@
 """
     origin label, image 폴더 내 파일들에 대해, 파일명에 key가 포함된 파일들을 copy_path로 이동
-    - 폴더 경로 정보가 origin_pathes = [path_a, path_b, ...] 일 때 
-    - 각각의 경로에 해당하는 폴더 안에서, 파일명에 "_c_"가 포함되는 파일들을 모두 copy_path 로 복사
+    - 폴더 경로 정보가 origin root 아래의 모든 하위 폴더일 때 
+    - 각각의 경로에 해당하는 폴더 안에서, 파일명에 "_c_"가 포함되는 파일들을 모두 copy_path 로 sync
+    - 이미 같은 size/mtime 의 파일이 있으면 건너뜀 (폴더를 비우지 않음), copy 대신 hardlink/symlink/reflink 가능
+    - --catalog : 원본 tree 를 다시 돌지 않고 raw_catalog.py 로 만든 catalog 에서 짝이 있는 clip 만 조회해서 sync
 """
 
 import os
-import shutil
+import sys
+import argparse
+
+# 상위 폴더의 공용 모듈 사용 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from file_sync import SYNC_MODES, sync_tree, sync_files
+from raw_catalog import RawCatalog
 
 # path settings 
 label_origin_rootpath = "D:/net_dataset/173.공원 주요시설 및 불법행위 감시 CCTV 영상 데이터/01.데이터/1.Training/라벨링데이터/TL_행위(불법행위)데이터1/1.불법행위/1.흡연행위"
 video_origin_rootpath = "D:/net_dataset/173.공원 주요시설 및 불법행위 감시 CCTV 영상 데이터/01.데이터/1.Training/원천데이터/TS_행위(불법행위)데이터1/1.불법행위/1.흡연행위"
-def get_subdirectories(main_path):
-    subdirs = []
-    for dirpath, dirnames, filenames in os.walk(main_path):
-        for dirname in dirnames:
-            subdirs.append(os.path.join(dirpath, dirname))
-    return subdirs
-label_origin_pathes = get_subdirectories(label_origin_rootpath)
 label_copy_path = "raw_data/label"
-video_origin_pathes = get_subdirectories(video_origin_rootpath)
 video_copy_path = "raw_data/video"
 detect_key = "_c_"
+sync_mode = "copy"  # "copy" / "hardlink" / "symlink" / "reflink" 
+copy_workers = 4
 
-print("=============================================================================")
-def delete_files_in_directory(directory_path):
-    for filename in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, filename)
-        if os.path.isfile(file_path):
-            os.remove(file_path)
-print(f"** '{label_copy_path}', '{video_copy_path}' 폴더 초기화")
-delete_files_in_directory(label_copy_path)
-delete_files_in_directory(video_copy_path)
-print("=============================================================================")
-for label_origin_path in label_origin_pathes:
-    print(f"============={os.path.basename(label_origin_path)}=============")
-    for file in os.listdir(label_origin_path):
-        if "_c_" in file:
-            print(f"Copy label file '{os.path.basename(file)}'")
-            src = os.path.join(label_origin_path, file)
-            dst = os.path.join(label_copy_path, file)
-
-            # 파일 복사. 이미 존재하는 경우 덮어씀.
-            shutil.copy2(src, dst)
-print("Labels all copied")
-print("=============================================================================")
-for video_origin_path in video_origin_pathes:
-    print(f"============={os.path.basename(video_origin_path)}=============")
-    for file in os.listdir(video_origin_path): 
-        if "_c_" in file:
-            print(f"Copy video file '{os.path.basename(file)}'")
-            src = os.path.join(video_origin_path, file)
-            dst = os.path.join(video_copy_path, file)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="sync aihub label/video files whose name contains detect key into raw_data")
+    parser.add_argument("--label-root", default=label_origin_rootpath, help="원본 label 폴더 (하위 폴더 전체 scan)")
+    parser.add_argument("--video-root", default=video_origin_rootpath, help="원본 video 폴더 (하위 폴더 전체 scan)")
+    parser.add_argument("--label-dest", default=label_copy_path)
+    parser.add_argument("--video-dest", default=video_copy_path)
+    parser.add_argument("--detect-key", default=detect_key, help="파일명에 포함되어야 하는 문자열")
+    parser.add_argument("--mode", choices=SYNC_MODES, default=sync_mode,
+                        help="copy : byte 복사 / hardlink, symlink : link 생성 / reflink : copy-on-write clone (안 되면 copy)")
+    parser.add_argument("--workers", type=int, default=copy_workers, help="병렬 복사 thread 수")
+    parser.add_argument("--delete", action="store_true", help="원본에 없는 대상 파일 삭제 (detect key 가 들어간 파일만)")
+    parser.add_argument("--dry-run", action="store_true", help="무엇을 할지 출력만 하고 파일은 건드리지 않음")
+    parser.add_argument("--catalog", default=None,
+                        help="raw_catalog.py 의 sqlite catalog (지정하면 원본 폴더를 scan 하지 않고 catalog 에서 조회)")
+    args = parser.parse_args()
 
-            # 파일 복사. 이미 존재하는 경우 덮어씀.
-            shutil.copy2(src, dst)
-print("Videos all copied")   
-print("=============================================================================")
+    def sync_kind(kind, root, dest, extension):
+        if args.catalog is None:
+            return sync_tree(root, dest, args.detect_key, args.mode, args.workers,
+                             extensions={extension}, delete=args.delete, dry_run=args.dry_run)
+        with RawCatalog(args.catalog) as catalog:
+            found = catalog.file_stats(catalog.select(key=args.detect_key, paired=True), kind)
+        return sync_files(found, dest, args.detect_key, args.mode, args.workers, {extension}, args.delete, args.dry_run,
+                          f"catalog {kind}s")
 
+    print("=============================================================================")
+    label_counts = sync_kind("label", args.label_root, args.label_dest, ".json")
+    print(f"Labels synced : {label_counts}")
+    print("=============================================================================")
+    video_counts = sync_kind("video", args.video_root, args.video_dest, ".mp4")
+    print(f"Videos synced : {video_counts}")
+    print("=============================================================================")
@@ -0,0 +1,134 @@
+"""
+    annotation.csv 와 같은 8개 field 를 NumPy structured array(.npy) 로 저장 / memory-map 으로 읽는 모듈
+    - annotation.npy       : row 들을 image_name 별로 연속되게 모아 저장 (image 가 처음 나온 순서 유지)
+    - annotation.index.npy : image_name 정렬 순서의 (image_name, start, stop) index
+    - 두 file 모두 임시 file (<file>.tmp) 에 쓰고 fsync 후 os.replace (table 먼저, index 마지막)
+    - AnnotationTable : 두 file 을 mmap 으로 열고, image_name -> row 범위를 index 의 binary search 로 찾음 (CSV 전체 parsing 없음)
+    - 실행 : python annotation_columnar.py <annotation.csv> ... -> 같은 위치에 .npy 생성
+"""
+
+import os
+import csv
+import sys
+
+import numpy as np
+
+from annotation_writer import ANNOTATION_FIELDS
+
+TEXT_FIELDS = ('label_name', 'image_name')
+
+def columnar_files(annotation_file):
+    base = os.path.splitext(annotation_file)[0]
+    return base + ".npy", base + ".index.npy"
+
+def _string_dtype(max_length):
+    return f"U{max_length or 1}"
+
+def _save_npy(npy_file, array):
+    # 임시 file 에 다 쓴 뒤 교체 (중간에 죽어도 이전 file 은 그대로)
+    temp_file = npy_file + ".tmp"
+    with open(temp_file, "wb") as file:
+        np.save(file, array)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, npy_file)
+
+def _scan_rows(rows):
+    """ 1st pass : structured array 의 dtype 과 image_name 별 row 수 (처음 나온 순서) 만 셈 """
+    text_lengths = dict.fromkeys(TEXT_FIELDS, 0)
+    # 모든 값이 정수면 int64, 아니면 float64 (csv 에서 읽은 문자열도 처리)
+    integral = {field: True for field in ANNOTATION_FIELDS if field not in TEXT_FIELDS}
+    image_counts = {}
+    for row in rows:
+        for field in TEXT_FIELDS:
+            text_lengths[field] = max(text_lengths[field], len(str(row[field])))
+        for field in integral:
+            if integral[field] and not float(row[field]).is_integer():
+                integral[field] = False
+        image_name = str(row["image_name"])
+        image_counts[image_name] = image_counts.get(image_name, 0) + 1
+    dtype = [(field, _string_dtype(text_lengths[field])) if field in TEXT_FIELDS
+             else (field, np.int64 if integral[field] else np.float64) for field in ANNOTATION_FIELDS]
+    return dtype, image_counts
+
+def save_annotation_npy(rows, annotation_file):
+    """
+        rows : annotation dict 들 (csv.DictWriter 에 넘기는 것과 같은 형태). dtype 을 먼저 정하고 table 에 바로 채우므로 두 번 읽음
+               (list 처럼 다시 iterate 할 수 있어야 함). annotation_file : 기준이 되는 .csv 경로
+    """
+    if iter(rows) is rows:
+        raise TypeError("rows must be iterable twice (e.g. a list), not an iterator")
+    dtype, image_counts = _scan_rows(rows)
+    image_names = list(image_counts)
+    counts = np.fromiter(image_counts.values(), dtype=np.int64, count=len(image_counts))
+    stops = np.cumsum(counts)
+
+    # 2nd pass : row 를 image_name 별로 연속되게 (image 가 처음 나온 순서) table 에 바로 채움
+    table = np.empty(int(stops[-1]) if len(stops) else 0, dtype=dtype)
+    positions = dict(zip(image_names, (stops - counts).tolist()))
+    converters = [str if field in TEXT_FIELDS else int if field_dtype is np.int64 else float for field, field_dtype in dtype]
+    for row in rows:
+        image_name = str(row["image_name"])
+        position = positions[image_name]
+        positions[image_name] = position + 1
+        table[position] = tuple(convert(float(row[field]) if convert is int else row[field])
+                                for field, convert in zip(ANNOTATION_FIELDS, converters))
+
+    index = np.empty(len(image_names), dtype=[("image_name", _string_dtype(max(map(len, image_names), default=1))),
+                                              ("start", np.int64), ("stop", np.int64)])
+    index["image_name"], index["start"], index["stop"] = image_names, stops - counts, stops
+    index.sort(order="image_name")
+
+    # index 를 마지막에 교체 (table 만 바뀐 상태로 죽으면 이전 index 가 남음)
+    table_file, index_file = columnar_files(annotation_file)
+    _save_npy(table_file, table)
+    _save_npy(index_file, index)
+    print(f"columnar annotation saved! : {table_file}")
+    return table_file, index_file
+
+class _CsvRows():
+    """ iterate 할 때마다 annotation csv 를 처음부터 다시 읽음 (save_annotation_npy 의 두 pass) """
+    def __init__(self, annotation_file):
+        self.annotation_file = annotation_file
+
+    def __iter__(self):
+        with open(self.annotation_file, newline='') as annfile:
+            yield from csv.DictReader(annfile)
+
+def csv_to_npy(annotation_file):
+    return save_annotation_npy(_CsvRows(annotation_file), annotation_file)
+
+class AnnotationTable():
+    """
+        table = AnnotationTable("processed_data/annotation/annotation.csv")
+        boxes = table.rows_for("171600b_168.png")   # structured array (같은 image 의 row 들)
+    """
+    def __init__(self, annotation_file):
+        table_file, index_file = columnar_files(annotation_file)
+        self.rows = np.load(table_file, mmap_mode="r")
+        self.index = np.load(index_file, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def image_names(self):
+        return self.index["image_name"]
+
+    def row_range(self, image_name):
+        """ returns : (start, stop), 없으면 None. index 는 image_name 순서이므로 mmap 위에서 binary search (O(log n), index 전체를 읽지 않음) """
+        image_names = self.index["image_name"]
+        position = int(np.searchsorted(image_names, image_name))
+        if position == len(image_names) or image_names[position] != image_name:
+            return None
+        return int(self.index["start"][position]), int(self.index["stop"][position])
+
+    def rows_for(self, image_name):
+        row_range = self.row_range(image_name)
+        if row_range is None:
+            return self.rows[:0]
+        start, stop = row_range
+        return self.rows[start:stop]
+
+if __name__ == "__main__":
+    for annotation_file in sys.argv[1:]:
+        csv_to_npy(annotation_file)
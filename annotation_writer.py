@@ -0,0 +1,138 @@
+"""
+    annotation.csv 를 row 가 만들어질 때마다 바로 쓰는 streaming writer
+    - row 는 buffer_rows 개씩 모아서 임시 file (<annotation_file>.tmp) 에 쓰고 flush
+    - 정상 종료 시에만 임시 file 을 annotation_file 로 교체 (os.replace) 하므로, 중간에 죽어도 이전 annotation_file 은 그대로
+      (그때까지 쓴 row 는 .tmp 에 남음)
+    - append=True : 기존 annotation_file 의 row 뒤에 이어서 씀 (기존 내용은 한 줄씩 복사, 전체를 메모리에 올리지 않음)
+    - merge_annotation_csvs : 여러 annotation csv (예: annotation.csv + annotation2.csv) 를 streaming 으로 합침
+    - 실행 : python annotation_writer.py <output.csv> <input.csv> ... [--append]
+"""
+
+import os
+import csv
+import argparse
+
+ANNOTATION_FIELDS = ['label_name', 'bbox_x', 'bbox_y', 'bbox_width', 'bbox_height', 'image_name', 'image_width', 'image_height']
+BUFFER_ROWS = 10000
+
+def read_header(annotation_file):
+    with open(annotation_file, newline='') as annfile:
+        return next(csv.reader(annfile), None)
+
+class AnnotationCsvWriter():
+    """
+        with AnnotationCsvWriter("processed_data/annotation/annotation.csv") as annotation_writer:
+            annotation_writer.write_rows(rows)
+    """
+    def __init__(self, annotation_file, fieldnames=ANNOTATION_FIELDS, append=False, buffer_rows=BUFFER_ROWS):
+        self.annotation_file = annotation_file
+        self.temp_file = annotation_file + ".tmp"
+        self.fieldnames = list(fieldnames)
+        self.buffer_rows = buffer_rows
+        self.row_count = 0
+        self._buffer = []
+        annotation_dir = os.path.dirname(annotation_file)
+        if annotation_dir:
+            os.makedirs(annotation_dir, exist_ok=True)
+
+        self._file = open(self.temp_file, mode='w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+        if append and os.path.exists(annotation_file):
+            self._copy_existing_rows()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(commit=exc_type is None)
+
+    def _copy_existing_rows(self):
+        header = read_header(self.annotation_file)
+        if header is not None and header != self.fieldnames:
+            self._file.close()
+            os.remove(self.temp_file)
+            raise RuntimeError(f"'{self.annotation_file}' has different fields {header} (expected {self.fieldnames}) .. ")
+        with open(self.annotation_file, newline='') as annfile:
+            reader = csv.reader(annfile)
+            next(reader, None)
+            raw_writer = csv.writer(self._file)
+            for row in reader:
+                raw_writer.writerow(row)
+                self.row_count += 1
+
+    def write_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    @property
+    def rows_written(self):
+        """ write_row 로 받은 row 수 (아직 buffer 에 있는 row 포함, row_count 는 file 에 쓴 row 만) """
+        return self.row_count + len(self._buffer)
+
+    def flush(self):
+        self._writer.writerows(self._buffer)
+        self.row_count += len(self._buffer)
+        self._buffer = []
+        self._file.flush()
+
+    def close(self, commit=True):
+        """ commit : 임시 file 을 annotation_file 로 교체 (False 이면 .tmp 에 쓴 row 만 남김) """
+        if self._file is None:
+            return
+        self.flush()
+        if commit:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        if commit:
+            os.replace(self.temp_file, self.annotation_file)
+            print(f"annotation saved! : {self.annotation_file} ({self.row_count} rows)")
+
+class OrderedRows():
+    """
+        순서 없이 끝나는 작업(process pool) 의 row 들을 작업 순서대로 writer 에 씀
+        - put(idx, rows) : idx 번째 작업의 결과 (실패한 작업은 rows=None). 앞 번호가 모두 끝난 결과부터 바로 씀
+    """
+    def __init__(self, annotation_writer):
+        self.annotation_writer = annotation_writer
+        self.next_idx = 0
+        self._pending = {}
+
+    def put(self, idx, rows):
+        self._pending[idx] = rows
+        while self.next_idx in self._pending:
+            rows = self._pending.pop(self.next_idx)
+            if rows is not None:
+                self.annotation_writer.write_rows(rows)
+            self.next_idx += 1
+
+def merge_annotation_csvs(input_files, output_file, append=False, fieldnames=ANNOTATION_FIELDS, row_counts=None):
+    """
+        input_files 의 row 를 순서대로 output_file 에 씀 (append : 기존 output_file 뒤에). returns : 전체 row 수
+        - row_counts : list 를 넘기면 input file 별 row 수를 순서대로 추가
+    """
+    with AnnotationCsvWriter(output_file, fieldnames, append=append) as annotation_writer:
+        for input_file in input_files:
+            with open(input_file, newline='') as annfile:
+                reader = csv.DictReader(annfile)
+                if reader.fieldnames is not None and set(reader.fieldnames) != set(fieldnames):
+                    raise RuntimeError(f"'{input_file}' has different fields {reader.fieldnames} (expected {list(fieldnames)}) .. ")
+                written_before = annotation_writer.rows_written
+                annotation_writer.write_rows(reader)
+                if row_counts is not None:
+                    row_counts.append(annotation_writer.rows_written - written_before)
+    return annotation_writer.row_count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="merge annotation csv files (streaming)")
+    parser.add_argument("output", help="합친 결과 annotation csv")
+    parser.add_argument("inputs", nargs="+", help="합칠 annotation csv 들 (순서대로)")
+    parser.add_argument("--append", action="store_true", help="output 이 이미 있으면 그 뒤에 이어서 씀")
+    args = parser.parse_args()
+    merge_annotation_csvs(args.inputs, args.output, append=args.append)
@@ -0,0 +1,71 @@
+"""
+    label file 단위 작업을 process pool 로 나누어 실행하는 공용 모듈
+    - 각 label file(video) 은 서로 독립적이므로 file 단위로 worker 에 분배
+    - 결과는 입력 label file 순서대로 반환하므로, 직렬 실행과 같은 순서로 annotation 을 합칠 수 있음
+    - 한 file 에서 난 에러는 기록만 하고 나머지 file 은 계속 처리
+"""
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def _run_job(job_func, label_file, job_kwargs):
+    try:
+        return True, job_func(label_file, **job_kwargs)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+
+def _future_outcome(future):
+    # worker process 자체가 죽은 경우(BrokenProcessPool 등)도 해당 file 의 실패로 기록
+    try:
+        return future.result()
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+def run_label_jobs(job_func, label_files, workers=1, on_done=None, file_kwargs=None, keep_results=True, **job_kwargs):
+    """
+        label_files 각각에 대해 job_func(label_file, **job_kwargs, **file_kwargs[i]) 실행
+        - job_func 은 pickle 가능하도록 module 최상위에 정의된 함수여야 함
+        - on_done(label_file, succeeded, outcome) : 각 file 이 끝나는 즉시 (main process 에서) 호출
+        - keep_results=False : on_done 에서 결과를 처리하는 경우, 결과를 모아두지 않음 (results 는 모두 None)
+        - returns : results (label_files 순서, 실패한 file 은 None), failures [(label_file, error message)]
+    """
+    if file_kwargs is None:
+        file_kwargs = [{}] * len(label_files)
+    kwargs_list = [{**job_kwargs, **kwargs} for kwargs in file_kwargs]
+
+    outcomes = [None] * len(label_files)
+    def _done(idx, outcome):
+        if on_done is not None:
+            on_done(label_files[idx], *outcome)
+        succeeded = outcome[0]
+        outcomes[idx] = outcome if keep_results or not succeeded else (True, None)
+
+    if workers <= 1:
+        for idx, (label_file, kwargs) in enumerate(zip(label_files, kwargs_list)):
+            _done(idx, _run_job(job_func, label_file, kwargs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_job, job_func, label_file, kwargs): idx
+                       for idx, (label_file, kwargs) in enumerate(zip(label_files, kwargs_list))}
+            for future in as_completed(futures):
+                # 끝난 future 는 바로 놓아서 결과가 메모리에 쌓이지 않게 함
+                _done(futures.pop(future), _future_outcome(future))
+
+    results, failures = [], []
+    for label_file, (succeeded, outcome) in zip(label_files, outcomes):
+        if succeeded:
+            results.append(outcome)
+        else:
+            results.append(None)
+            failures.append((label_file, outcome))
+    return results, failures
+
+def print_failures(failures, total_count):
+    if not failures:
+        print(f"all {total_count} label files processed!")
+        return
+    print(f"{len(failures)} of {total_count} label files failed :")
+    for label_file, message in failures:
+        print(f"## failed : {os.path.basename(label_file)}")
+        print(message)
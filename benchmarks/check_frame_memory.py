@@ -0,0 +1,104 @@
+"""
+    FrameReader 의 decode loop 가 frame 마다 배열을 새로 할당하지 않는지, 긴 video 에서도 RSS 가 늘지 않는지 확인
+    - 긴 가짜 video 하나 (모든 frame 이 event 범위) 를 FrameReader 로 읽어 ImageWriterPool 로 encoding (결과는 버림)
+    - frame 배열 할당 횟수 (FrameBufferRing.allocations) 와 일정 frame 마다의 현재 RSS 를 출력
+    - warmup 이후 RSS 가 --tolerance-mb 이상 늘거나, 할당 횟수가 buffer 수를 넘으면 exit code 1
+    - --buffers 0 : buffer 를 다시 쓰지 않는 기존 방식 (frame 마다 할당) 과 비교
+
+    실행 예 :
+        python benchmarks/check_frame_memory.py --frames 3000 --width 1920 --height 1080
+        python benchmarks/check_frame_memory.py --video raw_data/video/C_1_31_jap_cl_09-01_17-16-00_b_set_DF2.mp4
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from video_frames import FrameReader
+from image_writer import ImageWriterPool
+
+def current_rss_mb():
+    """ 현재 RSS (peak 가 아님). /proc 이 없으면 psutil, 둘 다 없으면 None """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+class DiscardSink():
+    """ encoding 결과를 저장하지 않는 ImageWriterPool sink (disk 속도와 무관하게 측정) """
+    def write(self, name, data):
+        pass
+
+def check_frame_memory(video_file, buffer_count=None, encode_workers=2, sample_every=100, warmup_ratio=0.1, tolerance_mb=16.0):
+    """ returns : (통과 여부, {"frames", "allocations", "rss_mb" : [(frame 수, RSS)]}) """
+    cap = cv2.VideoCapture(video_file)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    samples = []
+    with ImageWriterPool(encode_workers, "thread", sink=DiscardSink()) as image_writer, \
+         FrameReader(video_file, [[1, frame_count]], "seek",
+                     image_writer.max_pending + 2 if buffer_count is None else buffer_count) as reader:
+        for cur_frame_num, frame in reader:
+            image_writer.submit(f"{cur_frame_num}.jpg", frame, release=reader.retain())
+            if reader.frames % sample_every == 0:
+                samples.append((reader.frames, current_rss_mb()))
+    result = {"frames": reader.frames, "allocations": reader.buffers.allocations, "buffers": reader.buffers.size, "rss_mb": samples}
+
+    passed = reader.buffers.allocations <= max(reader.buffers.size, 1)
+    measured = [(frames, rss) for frames, rss in samples if frames >= reader.frames * warmup_ratio and rss is not None]
+    if measured:
+        result["rss_growth_mb"] = max(rss for _, rss in measured) - measured[0][1]
+        passed = passed and result["rss_growth_mb"] <= tolerance_mb
+    return passed, result
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="check that the frame decode loop does not allocate per frame and RSS stays flat")
+    parser.add_argument("--video", default=None, help="검사할 video (없으면 가짜 video 생성)")
+    parser.add_argument("--frames", type=int, default=2000, help="가짜 video 의 frame 수")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--buffers", type=int, default=None, help="FrameBufferRing 크기 (기본 : encode 대기 수 + 2, 0 : 다시 쓰지 않음)")
+    parser.add_argument("--encode-workers", type=int, default=2)
+    parser.add_argument("--sample-every", type=int, default=100, help="RSS 를 잴 frame 간격")
+    parser.add_argument("--tolerance-mb", type=float, default=16.0, help="warmup 이후 허용하는 RSS 증가량")
+    args = parser.parse_args()
+
+    data_dir = None
+    video_file = args.video
+    if video_file is None:
+        from synth_data import make_aihub_dataset
+        data_dir = tempfile.mkdtemp(prefix="frame_memory_")
+        print(f"synthesizing {args.frames} frames video ({args.width}x{args.height}) : {data_dir}")
+        video_name = make_aihub_dataset(data_dir, 1, args.frames, args.width, args.height, event_density=1.0, event_count=1)[0]
+        video_file = os.path.join(data_dir, "raw_data/video", video_name)
+    try:
+        passed, result = check_frame_memory(video_file, args.buffers, args.encode_workers, args.sample_every,
+                                            tolerance_mb=args.tolerance_mb)
+    finally:
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    for frames, rss in result["rss_mb"]:
+        print(f"frames {frames:>7} : rss {rss:.1f} MB" if rss is not None else f"frames {frames:>7} : rss -")
+    print(f"frames : {result['frames']}, frame allocations : {result['allocations']} "
+          f"({result['allocations'] / max(result['frames'], 1):.3f} per frame, {result['buffers']} buffers)")
+    if "rss_growth_mb" in result:
+        print(f"rss growth after warmup : {result['rss_growth_mb']:.1f} MB (tolerance {args.tolerance_mb} MB)")
+    print("check : frame buffers are reused and rss is flat" if passed else "check : frames are allocated per frame or rss grows ..")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,282 @@
+"""
+    conversion pipeline 별 처리량 benchmark
+    - synth_data 로 만든 가짜 AIHub(mp4+json) / YOLOv8 txt dataset 에 대해
+      aihub_to_anncsv, aihub_to_yolov8txt, yolotxt_to_anncsv 를 stage 별로 시간 측정
+    - pipeline 하나당 별도 process 에서 실행하여 peak RSS 를 따로 측정
+    - 결과는 json (frames decoded/s, frames written/s, bytes written, peak RSS, stage 별 초)
+    - --baseline 으로 이전 결과와 비교, --save-baseline 으로 현재 결과를 baseline 으로 저장
+
+    실행 예 :
+        python benchmarks/run_benchmarks.py --videos 4 --frames 600 --width 1920 --height 1080 --out bench.json
+        python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from contextlib import contextmanager, redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+PIPELINES = ("aihub_to_anncsv", "aihub_to_yolov8txt", "yolotxt_to_anncsv")
+# pipeline 별 output 폴더 (workdir 기준), 실행 전에 비움
+OUTPUT_DIRS = {
+    "aihub_to_anncsv": ["processed_data/images", "processed_data/annotation"],
+    "aihub_to_yolov8txt": ["processed_data/images", "processed_data/label"],
+    "yolotxt_to_anncsv": ["processed_annotation"],
+}
+# stage 중 실제 pipeline 이 아닌 측정용 stage (end-to-end 시간에서 제외)
+MEASURE_ONLY_STAGES = ("decode_only",)
+
+def _load_module(relative_path):
+    name = "bench_" + relative_path.replace("/", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+def dir_bytes(directories):
+    total = 0
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                total += entry.stat().st_size
+    return total
+
+class StageTimes():
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+
+# pipelines (workdir 안에서 실행됨)
+
+def _count_decoded_frames(video_file, event_frames, extract_mode):
+    import cv2
+    from video_frames import iter_event_frames
+    cap = cv2.VideoCapture(video_file)
+    frame_count = sum(1 for _ in iter_event_frames(cap, event_frames, extract_mode))
+    cap.release()
+    return frame_count
+
+def bench_aihub_to_anncsv(config, stages):
+    from label_stream import load_label_json
+    module = _load_module("aihub_to_anncsv.py")
+    rows, frames_decoded, frames_written = [], 0, 0
+    for label_file in sorted(glob.glob(module.RAW_LABEL_PATH + "*.json")):
+        with stages("parse"):
+            raw_label_json = load_label_json(label_file)
+            video_name, frame_size = module.info_parser(raw_label_json["info"])
+            event_frames = module.events_parser(raw_label_json["events"])
+            bboxes = module.annotations_parser(raw_label_json["annotations"])
+        with stages("process_annotation"):
+            rows.extend(module.process_annotation(video_name, frame_size, bboxes))
+        with stages("decode_only"):
+            frames_decoded += _count_decoded_frames(module.RAW_VIDEO_PATH + video_name, event_frames, config["extract_mode"])
+        with stages("decode_encode_write"):
+            frames_written += len(module.save_images(video_name, event_frames, config["extract_mode"],
+                                                     config["encode_workers"], config["encode_mode"]))
+    with stages("save_annotation"):
+        module.save_annotation(rows)
+    return {"frames_decoded": frames_decoded, "frames_written": frames_written}
+
+def bench_aihub_to_yolov8txt(config, stages):
+    module = _load_module("aihub_to_yolo/aihub_to_yolov8txt.py")
+    frames_decoded, frames_written = 0, 0
+    for label_file in sorted(glob.glob(module.RAW_LABEL_PATH + "*.json")):
+        with stages("parse"):
+            label_infos = module.JsonLabelParser(label_file).get_label_infos()
+        with stages("decode_only"):
+            frames_decoded += _count_decoded_frames(module.RAW_VIDEO_PATH + label_infos["video_name"],
+                                                    label_infos["event_frames"], config["extract_mode"])
+        with stages("decode_encode_write"):
+            dataset_maker = module.DatasetMaker(label_infos, class_id=0, extract_ratio=config["extract_ratio"],
+                                                extract_mode=config["extract_mode"],
+                                                encode_workers=config["encode_workers"], encode_mode=config["encode_mode"])
+            frames_written += len(dataset_maker.generate_dataset()) // 2
+    return {"frames_decoded": frames_decoded, "frames_written": frames_written}
+
+def bench_yolotxt_to_anncsv(config, stages):
+    from image_size import ImageSizeCache
+    from yolo_batch import convert_label_files
+    module = _load_module("yolotxt_to_anncsv.py")
+    label_files = sorted(glob.glob(module.RAW_LABEL_PATH + "*.txt"))
+    for stage in ("convert_cold_cache", "convert_warm_cache"):
+        with stages(stage), ImageSizeCache(module.IMAGE_SIZE_CACHE_FILE) as size_cache:
+            rows, _ = convert_label_files(label_files, module.RAW_IMAGES_PATH, module.CLASS_NAMES, size_cache)
+    with stages("save_annotation"):
+        module.save_annotation(rows)
+    return {"labels": len(label_files), "objects": len(rows)}
+
+def run_one(pipeline, workdir, config, result_file):
+    os.chdir(workdir)
+    for directory in OUTPUT_DIRS[pipeline]:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+    stages = StageTimes()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        counts = globals()["bench_" + pipeline](config, stages)
+
+    end_to_end = sum(seconds for stage, seconds in stages.seconds.items() if stage not in MEASURE_ONLY_STAGES)
+    result = {"end_to_end_s": end_to_end, "stages_s": stages.seconds, **counts}
+    if "frames_decoded" in counts:
+        result["frames_decoded_per_s"] = counts["frames_decoded"] / max(stages.seconds["decode_only"], 1e-9)
+        result["frames_written_per_s"] = counts["frames_written"] / max(stages.seconds["decode_encode_write"], 1e-9)
+    else:
+        result["labels_per_s"] = counts["labels"] / max(stages.seconds["convert_warm_cache"], 1e-9)
+    result["bytes_written"] = dir_bytes(OUTPUT_DIRS[pipeline])
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(result_file, "w") as file:
+        json.dump(result, file)
+
+# run all / compare
+
+def _median_result(results):
+    merged = {}
+    for key, value in results[0].items():
+        if isinstance(value, dict):
+            merged[key] = _median_result([result[key] for result in results])
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            merged[key] = statistics.median(result[key] for result in results)
+        else:
+            merged[key] = value
+    return merged
+
+def run_benchmarks(config, pipelines, data_dir, repeat):
+    from synth_data import make_aihub_dataset, make_yolo_dataset
+    aihub_dir, yolo_dir = os.path.join(data_dir, "aihub"), os.path.join(data_dir, "yolo")
+    if not os.path.exists(os.path.join(aihub_dir, "raw_data/label")):
+        print(f"synthesizing aihub dataset : {aihub_dir}")
+        make_aihub_dataset(aihub_dir, config["videos"], config["frames"], config["width"], config["height"],
+                           event_density=config["event_density"], event_count=config["events"])
+    if not os.path.exists(os.path.join(yolo_dir, "raw_data/labels")):
+        print(f"synthesizing yolo dataset : {yolo_dir}")
+        make_yolo_dataset(yolo_dir, config["yolo_images"])
+
+    results = {}
+    for pipeline in pipelines:
+        workdir = yolo_dir if pipeline == "yolotxt_to_anncsv" else aihub_dir
+        runs = []
+        for _ in range(repeat):
+            result_file = os.path.join(data_dir, f"{pipeline}.result.json")
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", pipeline, "--workdir", workdir,
+                            "--config", json.dumps(config), "--result-file", result_file], check=True)
+            with open(result_file) as file:
+                runs.append(json.load(file))
+        results[pipeline] = _median_result(runs)
+        print(f"{pipeline} : {json.dumps(results[pipeline])}")
+    return {"config": config, "pipelines": results}
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+def compare_with_baseline(current, baseline, tolerance, min_seconds=0.05):
+    """ 비교 결과를 출력하고, tolerance 이상 나빠진 지표 목록 반환 (min_seconds 보다 짧은 시간 지표는 noise 로 보고 제외) """
+    if current["config"] != baseline["config"]:
+        print("warning : benchmark config differs from baseline config")
+    current_flat, baseline_flat = _flatten(current["pipelines"]), _flatten(baseline["pipelines"])
+    regressions = []
+    print(f"{'metric':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for metric in sorted(set(current_flat) & set(baseline_flat)):
+        old, new = baseline_flat[metric], current_flat[metric]
+        change = (new - old) / old if old else 0.0
+        higher_is_better = metric.endswith("_per_s")
+        worse = -change if higher_is_better else change
+        mark = ""
+        too_short = metric.endswith("_s") and max(old, new) < min_seconds
+        if worse > tolerance and not too_short and metric.split(".")[-1] not in ("frames_decoded", "frames_written", "labels", "objects"):
+            regressions.append(metric)
+            mark = " <- regression"
+        print(f"{metric:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{mark}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="conversion pipeline benchmark")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--videos", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=300, help="video 당 frame 수")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--event-density", type=float, default=0.1, help="video 중 event 범위에 속하는 frame 비율")
+    parser.add_argument("--events", type=int, default=2, help="video 당 event 범위 수")
+    parser.add_argument("--extract-ratio", type=float, default=0.1, help="aihub_to_yolov8txt 의 extract_ratio")
+    parser.add_argument("--extract-mode", default="seek")
+    parser.add_argument("--encode-workers", type=int, default=2)
+    parser.add_argument("--encode-mode", default="thread")
+    parser.add_argument("--yolo-images", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=1, help="반복 횟수 (지표는 중앙값)")
+    parser.add_argument("--data-dir", default=None, help="가짜 dataset 위치 (이미 있으면 재사용, 없으면 임시 폴더)")
+    parser.add_argument("--out", default=None, help="결과 json 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 baseline 결과 json")
+    parser.add_argument("--save-baseline", default=None, help="이번 결과를 baseline 으로 저장할 경로")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="regression 으로 판단할 변화율")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="이보다 짧은 stage 시간은 regression 판단에서 제외")
+    # 내부용 : pipeline 하나를 별도 process 에서 실행
+    parser.add_argument("--run-one", choices=PIPELINES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, args.workdir, json.loads(args.config), args.result_file)
+        sys.exit(0)
+
+    config = {
+        "videos": args.videos, "frames": args.frames, "width": args.width, "height": args.height,
+        "event_density": args.event_density, "events": args.events, "extract_ratio": args.extract_ratio,
+        "extract_mode": args.extract_mode, "encode_workers": args.encode_workers, "encode_mode": args.encode_mode,
+        "yolo_images": args.yolo_images
+    }
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="dataset_bench_")
+    results = run_benchmarks(config, args.pipelines, data_dir, args.repeat)
+    if args.data_dir is None:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for out_file in (args.out, args.save_baseline):
+        if out_file:
+            with open(out_file, "w") as file:
+                json.dump(results, file, indent=2)
+            print(f"benchmark results saved! : {out_file}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_with_baseline(results, json.load(file), args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed more than {args.tolerance:.0%}")
+            sys.exit(1)
@@ -0,0 +1,93 @@
+"""
+    benchmark 용 가짜 dataset 생성
+    - AIHub 형식 : raw_data/video/*.mp4 + raw_data/label/*.json (길이, 해상도, event 비율 설정 가능)
+    - YOLOv8 txt 형식 : raw_data/images/*.jpg + raw_data/labels/*.txt
+    - seed 를 고정하므로 같은 설정이면 같은 dataset 이 만들어짐
+"""
+
+import os
+import json
+import random
+
+import cv2
+import numpy as np
+
+AIHUB_DIRS = ["raw_data/video", "raw_data/label", "processed_data/images", "processed_data/annotation", "processed_data/label"]
+YOLO_DIRS = ["raw_data/images", "raw_data/labels", "processed_annotation"]
+
+def _make_dirs(root, dirs):
+    for directory in dirs:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+def _synth_frame(frame_idx, width, height, rng_noise):
+    # gradient 배경 + 움직이는 사각형 + 약한 noise (실제 CCTV 처럼 적당히 압축되는 영상)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[...] = ((x[None, :] + frame_idx * 3) % 256).astype(np.uint8)[:, :, None]
+    box_x = (frame_idx * 7) % max(width - width // 8, 1)
+    box_y = height // 3
+    frame[box_y:box_y + height // 4, box_x:box_x + width // 8] = (40, 80, 200)
+    frame += rng_noise[frame_idx % len(rng_noise)]
+    return frame
+
+def _event_ranges(frame_count, event_density, event_count, rng):
+    event_frames_total = max(int(frame_count * event_density), event_count)
+    event_length = max(event_frames_total // event_count, 1)
+    slot = frame_count // event_count
+    ranges = []
+    for idx in range(event_count):
+        start = idx * slot + 1 + rng.randint(0, max(slot - event_length, 0))
+        ranges.append([start, min(start + event_length - 1, frame_count)])
+    return ranges
+
+def make_aihub_dataset(root, video_count=2, frame_count=300, width=1920, height=1080, fps=30,
+                       event_density=0.1, event_count=2, distractor_ratio=1.0, seed=0):
+    """ returns : 생성한 video 이름 목록 """
+    _make_dirs(root, AIHUB_DIRS)
+    rng = random.Random(seed)
+    noise_rng = np.random.default_rng(seed)
+    rng_noise = [noise_rng.integers(0, 8, size=(height, width, 3), dtype=np.uint8) for _ in range(4)]
+    video_names = []
+    for video_idx in range(video_count):
+        hh, mm, ss = 8 + video_idx // 3600 % 12, video_idx // 60 % 60, video_idx % 60
+        name = f"C_1_{31 + video_idx % 4}_jap_cl_09-01_{hh:02d}-{mm:02d}-{ss:02d}_{'abcd'[video_idx % 4]}_set_DF2"
+        video_names.append(name + ".mp4")
+
+        writer = cv2.VideoWriter(os.path.join(root, "raw_data/video", name + ".mp4"),
+                                 cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        for frame_idx in range(frame_count):
+            writer.write(_synth_frame(frame_idx, width, height, rng_noise))
+        writer.release()
+
+        event_frames = _event_ranges(frame_count, event_density, event_count, rng)
+        annotations = []
+        for start, end in event_frames:
+            for cur_frame in range(start, end + 1):
+                x1, y1 = rng.uniform(0, width * 0.7), rng.uniform(0, height * 0.7)
+                bbox = [[x1, y1], [x1 + rng.uniform(40, width * 0.2), y1 + rng.uniform(80, height * 0.3)]]
+                annotations.append({"object_id": 1, "cur_frame": cur_frame, "class_name": "smoking", "bbox": bbox})
+                if rng.random() < distractor_ratio:
+                    annotations.append({"object_id": 2, "cur_frame": cur_frame, "class_name": "person", "bbox": bbox})
+        rng.shuffle(annotations)
+        label = {
+            "info": {"filename": name + ".mp4", "width": width, "height": height, "fps": fps, "frames": frame_count},
+            "events": [{"object_id": 1, "ev_start_frame": start, "ev_end_frame": end} for start, end in event_frames],
+            "annotations": annotations
+        }
+        with open(os.path.join(root, "raw_data/label", name + ".json"), "w", encoding="utf-8") as file:
+            json.dump(label, file)
+    return video_names
+
+def make_yolo_dataset(root, image_count=1000, width=640, height=480, max_objects=3, seed=0):
+    _make_dirs(root, YOLO_DIRS)
+    rng = random.Random(seed)
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    for image_idx in range(image_count):
+        image[...] = image_idx % 256
+        cv2.imwrite(os.path.join(root, "raw_data/images", f"image_{image_idx:06d}.jpg"), image)
+        lines = []
+        for _ in range(rng.randint(1, max_objects)):
+            w_r, h_r = rng.uniform(0.05, 0.4), rng.uniform(0.05, 0.4)
+            lines.append(f"0 {rng.uniform(w_r/2, 1-w_r/2):.6f} {rng.uniform(h_r/2, 1-h_r/2):.6f} {w_r:.6f} {h_r:.6f}")
+        with open(os.path.join(root, "raw_data/labels", f"image_{image_idx:06d}.txt"), "w") as file:
+            file.write("\n".join(lines) + "\n")
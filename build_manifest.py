@@ -0,0 +1,121 @@
+"""
+    incremental / resumable dataset build 를 위한 content manifest
+    - label file 별로 (label, video 의 size/mtime) + 추출 parameter + 생성된 output file 목록을 기록
+    - rerun 시 fingerprint 가 같고 output 이 모두 남아있는 video 는 건너뜀
+    - 바뀐 video 는 이전 output 을 지우고 다시 생성, 사라진 label 의 output 은 삭제
+    - 기록은 journal(json lines) 에 바로 append 하므로, video 처리 중 중단되어도 다음 실행에서 이어서 진행
+      (중단된 video 는 in_progress 로 남아 다시 처리됨)
+"""
+
+import os
+import json
+
+def file_stat(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+class BuildManifest():
+    def __init__(self, manifest_file, params, key_params=None):
+        # params : 결과에 영향을 주는 추출 parameter (예: {"format": "png", "extract_ratio": 0.01, ..})
+        # key_params : video 마다 다른 parameter (예: frame sampling plan 의 digest), {key: value}
+        self.manifest_file = manifest_file
+        self.journal_file = manifest_file + ".journal"
+        self.params = params
+        self.key_params = key_params or {}
+        self.entries = self._load()
+        self._journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def fingerprint(self, label_file, video_file, key=None):
+        fingerprint = {
+            "label": file_stat(label_file),
+            "video": file_stat(video_file),
+            "params": self.params
+        }
+        if key in self.key_params:
+            fingerprint["key_params"] = self.key_params[key]
+        return fingerprint
+
+    def is_up_to_date(self, key, label_file, video_file):
+        entry = self.entries.get(key)
+        if entry is None or entry["status"] != "done":
+            return False
+        if entry["fingerprint"] != self.fingerprint(label_file, video_file, key):
+            return False
+        return all(os.path.exists(output_file) for output_file in entry["outputs"])
+
+    def begin(self, key, label_file, video_file):
+        # 이전에 만든 output 을 지우고 in_progress 로 기록
+        entry = self.entries.get(key)
+        if entry is not None:
+            remove_files(entry["outputs"])
+        self._record(key, {"status": "in_progress", "fingerprint": self.fingerprint(label_file, video_file, key), "outputs": []})
+
+    def finish(self, key, output_files):
+        entry = dict(self.entries[key], status="done", outputs=list(output_files))
+        self._record(key, entry)
+
+    def fail(self, key):
+        self._record(key, dict(self.entries[key], status="failed"))
+
+    def remove_missing(self, keys):
+        """ keys 에 없는 (label 이 사라진) entry 의 output 을 삭제하고, 삭제한 key 목록 반환 """
+        keys = set(keys)
+        removed_keys = [key for key in self.entries if key not in keys]
+        for key in removed_keys:
+            remove_files(self.entries[key]["outputs"])
+            self._record(key, None)
+        return removed_keys
+
+    def close(self):
+        # journal 내용을 manifest 에 합치고 journal 삭제
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        temp_file = self.manifest_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump({"params": self.params, "entries": self.entries}, file)
+        os.replace(temp_file, self.manifest_file)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def _record(self, key, entry):
+        if entry is None:
+            self.entries.pop(key, None)
+        else:
+            self.entries[key] = entry
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+        self._journal.write(json.dumps({"key": key, "entry": entry}) + "\n")
+        self._journal.flush()
+
+    def _load(self):
+        entries = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, "r", encoding="utf-8") as file:
+                entries = json.load(file)["entries"]
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 기록 도중 중단된 마지막 줄
+                        break
+                    if record["entry"] is None:
+                        entries.pop(record["key"], None)
+                    else:
+                        entries[record["key"]] = record["entry"]
+        return entries
+
+def remove_files(files):
+    for file in files:
+        if os.path.exists(file):
+            os.remove(file)
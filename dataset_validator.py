@@ -0,0 +1,423 @@
+"""
+    변환 결과 dataset 검증
+    - orphan : image 가 없는 annotation row / row 가 없는 image / 짝이 없는 yolo txt, image / 짝이 없는 raw label, video
+    - box : image 밖으로 나가거나 크기가 0 이하인 box (annotation.csv 는 image_width/height 기준, yolo txt 는 상대 좌표 0~1 기준)
+    - 크기 : annotation.csv 의 image_width/height 와 실제 image header 의 크기 비교 (같은 image 의 row 끼리 다른 경우도)
+    - frame : image 이름의 frame 번호 (<name>_<frame>.png) 로 video 별 검사
+      - frame 0 : CAP_PROP_POS_FRAMES 는 read 직후 값(1부터)이므로 0 은 나올 수 없음
+      - off-by-one : annotation 의 frame 번호를 ±1 옮겼을 때 image 와 더 잘 맞는 video (0-based / 1-based 혼용)
+      - duplicate : 같은 video 의 서로 다른 frame 이 byte 단위로 같은 image (--hash, seek 가 같은 frame 을 두 번 반환한 경우 등)
+    - 같은 image_name, box 가 두 번 이상 나오는 row
+    - image header / hash / txt 검사 결과는 index(json) 에 path + mtime + size 로 저장하고, 바뀐 file 만 thread pool 로 다시 읽음
+    - annotation.csv 는 줄 내용으로 경계를 정한 block 단위로 검사 결과를 block 내용 hash 로 저장하고, 바뀐 block 만 다시 parse
+      (row 가 중간에 추가 / 삭제되어도 다른 block 은 그대로, csv 의 mtime + size 가 같으면 file 을 읽지 않음)
+    - 실행 : python dataset_validator.py [--labels processed_data/label/] [--hash] [--workers 8]
+"""
+
+import io
+import os
+import re
+import csv
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from image_size import probe_image_size
+from tar_shards import ShardIndex
+
+ANNOTATION_FILE = "processed_data/annotation/annotation.csv"
+IMAGES_PATH = "processed_data/images/"
+RAW_LABEL_PATH = "raw_data/label/"
+RAW_VIDEO_PATH = "raw_data/video/"
+INDEX_FILE = "processed_data/validation_index.json"
+REPORT_FILE = "processed_data/validation_report.json"
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+WORKERS = 8
+MAX_EXAMPLES = 10  # 화면에 출력할 예시 수 (report file 에는 전부)
+YOLO_TOLERANCE = 0.01  # yolo 상대 좌표는 소수 2자리로 반올림되어 있음
+OFF_BY_ONE_RATIO = 0.5  # ±1 옮긴 frame 이 annotation frame 의 절반 이상 더 맞으면 off-by-one 으로 봄
+FRAME_NAME = re.compile(r'^(.*)_(\d+)$')
+BLOCK_BOUNDARY_MASK = 0x3FF  # crc32(줄) & mask == 0 인 줄 뒤에서 annotation.csv block 을 나눔 (평균 1024 row)
+
+# cached index
+
+class ValidationIndex():
+    """
+        file 별 검사 결과 cache : {kind: {절대 경로: [mtime_ns, size, 결과]}}
+        - kind : "image" (header 크기, hash) / "yolo" (txt 의 문제 목록) / "annotation" (csv 의 block hash 목록)
+          / "annotation_blocks" (block 내용 hash -> block 검사 결과, 내용으로 찾으므로 mtime / size 는 None)
+    """
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.entries = {}
+        self._changed = False
+        if index_file and os.path.exists(index_file):
+            with open(index_file, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
+
+    def lookup(self, kind, path, stat=None):
+        """ stat 이 None 이면 (내용 hash 로 찾는 경우) mtime / size 를 비교하지 않음 """
+        entry = self.entries.get(kind, {}).get(path)
+        if entry is not None and (stat is None or (entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size)):
+            return entry[2]
+        return None
+
+    def update(self, kind, path, stat, value):
+        if stat is None:
+            self.entries.setdefault(kind, {})[path] = [None, None, value]
+        else:
+            self.entries.setdefault(kind, {})[path] = [stat.st_mtime_ns, stat.st_size, value]
+        self._changed = True
+
+    def prune(self, kind, paths):
+        """ 더 이상 없는 file 의 기록 삭제 """
+        kind_entries = self.entries.get(kind, {})
+        for path in set(kind_entries) - set(paths):
+            del kind_entries[path]
+            self._changed = True
+
+    def save(self):
+        if not self.index_file or not self._changed:
+            return
+        index_dir = os.path.dirname(self.index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        os.replace(temp_file, self.index_file)
+        self._changed = False
+
+def cached_results(index, kind, dir_entries, read_func, workers=WORKERS, is_valid=None):
+    """
+        dir_entries : {이름: os.DirEntry}. index 에 없거나 바뀐 file 만 read_func(path) 를 thread pool 로 실행
+        - is_valid(value) : cache 된 값을 그대로 쓸 수 있는지 (예: hash 가 필요한데 없는 경우 False)
+        - returns : {이름: read_func 결과}
+    """
+    results, todo = {}, []
+    for name, entry in dir_entries.items():
+        stat = entry.stat()
+        value = index.lookup(kind, entry.path, stat)
+        if value is None or (is_valid is not None and not is_valid(value)):
+            todo.append((name, entry.path, stat))
+        else:
+            results[name] = value
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            for (name, path, stat), value in zip(todo, executor.map(read_func, [path for _, path, _ in todo])):
+                index.update(kind, path, stat, value)
+                results[name] = value
+    index.prune(kind, [entry.path for entry in dir_entries.values()])
+    print(f"{kind} files : {len(dir_entries)} ({len(todo)} read, {len(dir_entries) - len(todo)} from index)")
+    return results
+
+# per file readers (thread pool 에서 실행)
+
+def read_image_info(image_file, with_hash=False):
+    """ returns : {"size": [width, height], "sha1": hash (with_hash 일 때)} """
+    info = {"size": list(probe_image_size(image_file))}
+    if with_hash:
+        digest = hashlib.sha1()
+        with open(image_file, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        info["sha1"] = digest.hexdigest()
+    return info
+
+def read_yolo_problems(txt_file):
+    """ yolo txt 의 문제 있는 줄 : [[줄 번호, 내용], ..] """
+    problems = []
+    with open(txt_file, "r") as file:
+        for line_no, line in enumerate(file.read().splitlines(), start=1):
+            values = line.split()
+            if not values:
+                continue
+            if len(values) != 5:
+                problems.append([line_no, f"{len(values)} values"])
+                continue
+            try:
+                xc, yc, w, h = [float(value) for value in values[1:]]
+            except ValueError:
+                problems.append([line_no, "not a number"])
+                continue
+            if w <= 0 or h <= 0:
+                problems.append([line_no, f"non-positive size {w} {h}"])
+            elif (xc - w/2 < -YOLO_TOLERANCE or yc - h/2 < -YOLO_TOLERANCE
+                  or xc + w/2 > 1 + YOLO_TOLERANCE or yc + h/2 > 1 + YOLO_TOLERANCE):
+                problems.append([line_no, f"out of image {xc} {yc} {w} {h}"])
+    return problems
+
+def check_annotation_block(fieldnames, text):
+    """
+        annotation.csv block 하나의 row 단위 검사 (다른 block 과 관계없는 검사만)
+        - returns : {"names": block 에 나온 image 이름, "rows": row 마다 [image 번호, width, height, row hash] (잘못된 row 는 None),
+                     "problems": [[check, block 안의 row 번호, 내용]]}
+    """
+    names, name_ids, rows, problems = [], {}, [], []
+    for offset, row in enumerate(csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)):
+        image_name = row["image_name"]
+        try:
+            x, y, w, h = [float(row[field]) for field in ("bbox_x", "bbox_y", "bbox_width", "bbox_height")]
+            image_width, image_height = int(row["image_width"]), int(row["image_height"])
+        except (TypeError, ValueError):
+            problems.append(["invalid rows", offset, f"{row}"])
+            rows.append(None)
+            continue
+        if w <= 0 or h <= 0:
+            problems.append(["non-positive boxes", offset, f"{image_name} {[x, y, w, h]}"])
+        elif x < 0 or y < 0 or x + w > image_width or y + h > image_height:
+            problems.append(["out of bounds boxes", offset, f"{image_name} {[x, y, w, h]} in {image_width}x{image_height}"])
+        if image_name not in name_ids:
+            name_ids[image_name] = len(names)
+            names.append(image_name)
+        # 중복 row 는 block 을 합쳐서 찾으므로 image 안의 row 를 구분하는 hash 만 남김
+        row_hash = hashlib.sha1(repr((row["label_name"], x, y, w, h)).encode()).hexdigest()[:16]
+        rows.append([name_ids[image_name], image_width, image_height, row_hash])
+    return {"names": names, "rows": rows, "problems": problems}
+
+# helpers
+
+def scan_dir(path, exts):
+    """ returns : {file 이름: os.DirEntry} (폴더가 없으면 빈 dict) """
+    if not path or not os.path.isdir(path):
+        return {}
+    with os.scandir(path) as entries:
+        return {entry.name: entry for entry in entries if entry.is_file() and os.path.splitext(entry.name)[1].lower() in exts}
+
+def split_frame_name(file_name):
+    """ '171600b_168.png' -> ('171600b', 168), 형식이 다르면 (이름, None) """
+    stem = os.path.splitext(file_name)[0]
+    match = FRAME_NAME.match(stem)
+    if match is None:
+        return stem, None
+    return match.group(1), int(match.group(2))
+
+def iter_line_blocks(file, boundary_mask=BLOCK_BOUNDARY_MASK):
+    """ binary file 의 나머지 줄을 block(bytes) 으로 나눔. crc32(줄) & boundary_mask == 0 인 줄에서 끝나므로 경계는 줄 내용으로만 정해짐 """
+    lines = []
+    for line in file:
+        lines.append(line)
+        if zlib.crc32(line) & boundary_mask == 0:
+            yield b"".join(lines)
+            lines = []
+    if lines:
+        yield b"".join(lines)
+
+def annotation_block_summaries(index, annotation_file):
+    """ annotation.csv 의 block 별 check_annotation_block 결과 (순서대로), index 에 없는 block 만 parse """
+    stat = os.stat(annotation_file)
+    block_hashes = index.lookup("annotation", annotation_file, stat)
+    parsed = 0
+    if block_hashes is None or any(index.lookup("annotation_blocks", block_hash) is None for block_hash in block_hashes):
+        block_hashes = []
+        with open(annotation_file, "rb") as file:
+            header = file.readline()
+            fieldnames = next(csv.reader([header.decode()]), [])
+            for block in iter_line_blocks(file):
+                # header 가 바뀌면 모든 block 을 다시 검사
+                block_hash = hashlib.sha1(header + block).hexdigest()
+                if index.lookup("annotation_blocks", block_hash) is None:
+                    index.update("annotation_blocks", block_hash, None, check_annotation_block(fieldnames, block.decode()))
+                    parsed += 1
+                block_hashes.append(block_hash)
+        index.update("annotation", annotation_file, stat, block_hashes)
+    index.prune("annotation", [annotation_file])
+    index.prune("annotation_blocks", block_hashes)
+    print(f"annotation blocks : {len(block_hashes)} ({parsed} parsed, {len(block_hashes) - parsed} from index)")
+    return [index.lookup("annotation_blocks", block_hash) for block_hash in block_hashes]
+
+def group_frames(file_names):
+    """ {video name base: set(frame 번호)} """
+    frames = {}
+    for file_name in file_names:
+        base, frame_num = split_frame_name(file_name)
+        if frame_num is not None:
+            frames.setdefault(base, set()).add(frame_num)
+    return frames
+
+class ValidationReport():
+    def __init__(self):
+        self.problems = {}
+        self.counts = {}
+
+    def add(self, check, item):
+        self.problems.setdefault(check, []).append(item)
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def print_problems(self):
+        for check, items in self.problems.items():
+            print(f"## {check} : {len(items)}")
+            for item in items[:MAX_EXAMPLES]:
+                print(f"    {item}")
+            if len(items) > MAX_EXAMPLES:
+                print(f"    .. and {len(items) - MAX_EXAMPLES} more")
+
+    def print_summary(self):
+        for name, value in self.counts.items():
+            print(f"# {name} : {value}")
+        if not self.problems:
+            print("check : dataset is valid!", end="\n.\n.\n")
+            return
+        self.print_problems()
+        print(f"check : {sum(len(items) for items in self.problems.values())} problems found...", end="\n.\n.\n")
+
+    def to_dict(self):
+        return {"counts": self.counts, "problems": self.problems}
+
+    def save(self, report_file):
+        report_dir = os.path.dirname(report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        with open(report_file, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        print(f"validation report saved! : {report_file}")
+
+# checks
+
+def check_pairs(report, check, left_names, right_names, left_label, right_label):
+    """ 확장자를 뺀 이름으로 짝 확인, 짝이 없는 쪽을 모두 기록 """
+    left = {os.path.splitext(name)[0]: name for name in left_names}
+    right = {os.path.splitext(name)[0]: name for name in right_names}
+    for stem in sorted(set(left) - set(right)):
+        report.add(check, f"{left_label} without {right_label} : {left[stem]}")
+    for stem in sorted(set(right) - set(left)):
+        report.add(check, f"{right_label} without {left_label} : {right[stem]}")
+
+def check_annotation(report, annotation_file, image_sizes, index=None):
+    """
+        annotation.csv 의 row 단위 검사
+        - block 별 결과는 index 에서 가져오고 (바뀐 block 만 parse), 중복 row / 같은 image 의 다른 크기는 block 결과를 합쳐서 확인
+        - image_sizes : {image 이름: [width, height]} (실제 header, shards 이면 None)
+        - index : ValidationIndex (None 이면 cache 없이 모든 block 을 parse)
+        - returns : annotation 에 나온 image 이름 set
+    """
+    summaries = annotation_block_summaries(index if index is not None else ValidationIndex(None), annotation_file)
+    row_dims, seen_rows = {}, {}
+    items = []  # (line 번호, check, 내용)
+    block_line = 2  # block 첫 row 의 줄 번호
+    for summary in summaries:
+        for check, offset, text in summary["problems"]:
+            items.append((block_line + offset, check, text))
+        for offset, row in enumerate(summary["rows"]):
+            if row is None:
+                continue
+            name_id, image_width, image_height, row_hash = row
+            image_name, line_no = summary["names"][name_id], block_line + offset
+            first_line = seen_rows.setdefault((image_name, row_hash), line_no)
+            if first_line != line_no:
+                items.append((line_no, "duplicate rows", f"{image_name} (same row as line {first_line})"))
+            dims = row_dims.setdefault(image_name, (image_width, image_height))
+            if dims != (image_width, image_height):
+                items.append((line_no, "inconsistent row sizes", f"{image_name} {image_width}x{image_height} (earlier rows {dims[0]}x{dims[1]})"))
+        block_line += len(summary["rows"])
+    for line_no, check, text in sorted(items, key=lambda item: item[0]):
+        report.add(check, f"line {line_no} : {text}")
+    report.count("annotation rows", block_line - 2)
+    if image_sizes is not None:
+        for image_name, (image_width, image_height) in row_dims.items():
+            actual = image_sizes.get(image_name)
+            if actual is not None and list(actual) != [image_width, image_height]:
+                report.add("size mismatches", f"{image_name} : csv {image_width}x{image_height}, image {actual[0]}x{actual[1]}")
+    return set(row_dims)
+
+def check_frames(report, annotated_names, image_names):
+    """ frame 번호 검사 : frame 0, annotation 과 image 의 frame 번호가 1 어긋난 video """
+    annotated_frames, image_frames = group_frames(annotated_names), group_frames(image_names)
+    for frames_of, label in ((annotated_frames, "annotation"), (image_frames, "image")):
+        for base in sorted(frames_of):
+            if 0 in frames_of[base]:
+                report.add("frame 0 (CAP_PROP_POS_FRAMES is 1-based)", f"{label} : {base}_0")
+    for base in sorted(set(annotated_frames) & set(image_frames)):
+        ann, images = annotated_frames[base], image_frames[base]
+        direct = len(ann & images)
+        for shift in (1, -1):
+            shifted = len({frame_num + shift for frame_num in ann} & images)
+            if shifted > direct and shifted >= OFF_BY_ONE_RATIO * len(ann):
+                report.add("off-by-one frames", f"{base} : {shifted} annotation frames match images at frame{shift:+d}, {direct} as is")
+
+def check_duplicate_images(report, image_infos):
+    """ 같은 video 안에서 byte 단위로 같은 image (frame 번호가 다른데 같은 frame) """
+    groups = {}
+    for image_name, info in image_infos.items():
+        base, frame_num = split_frame_name(image_name)
+        if frame_num is not None and info.get("sha1"):
+            groups.setdefault((base, info["sha1"]), []).append(frame_num)
+    for (base, _), frame_nums in sorted(groups.items()):
+        if len(frame_nums) > 1:
+            frame_nums.sort()
+            consecutive = any(b - a == 1 for a, b in zip(frame_nums, frame_nums[1:]))
+            report.add("duplicate frames", f"{base} : frames {frame_nums} are identical" + (" (consecutive)" if consecutive else ""))
+
+def validate_dataset(annotation_file=ANNOTATION_FILE, images_path=IMAGES_PATH, labels_path=None, shard_index=None,
+                     raw_label_path=None, raw_video_path=None, index_file=INDEX_FILE, with_hash=False, workers=WORKERS):
+    """ returns : ValidationReport """
+    report = ValidationReport()
+    if raw_label_path and raw_video_path:
+        raw_labels, raw_videos = scan_dir(raw_label_path, (".json",)), scan_dir(raw_video_path, (".mp4",))
+        check_pairs(report, "raw orphans", raw_labels, raw_videos, "label", "video")
+
+    with ValidationIndex(index_file) as index:
+        image_sizes, image_infos = None, {}
+        if shard_index is not None:
+            # shard 안의 image 는 이름으로만 확인
+            image_names = set(name for name in ShardIndex(shard_index).names() if os.path.splitext(name)[1].lower() in IMAGE_EXTS)
+        else:
+            image_entries = scan_dir(images_path, IMAGE_EXTS)
+            image_names = set(image_entries)
+            image_infos = cached_results(index, "image", image_entries, lambda path: read_image_info(path, with_hash), workers,
+                                         is_valid=lambda value: not with_hash or "sha1" in value)
+            image_sizes = {name: info["size"] for name, info in image_infos.items()}
+        report.count("images", len(image_names))
+
+        annotated_names = set()
+        if annotation_file and os.path.exists(annotation_file):
+            annotated_names = check_annotation(report, annotation_file, image_sizes, index)
+            for image_name in sorted(annotated_names - image_names):
+                report.add("annotation orphans", f"row without image : {image_name}")
+            for image_name in sorted(image_names - annotated_names):
+                report.add("annotation orphans", f"image without rows : {image_name}")
+            check_frames(report, annotated_names, image_names)
+        if with_hash:
+            check_duplicate_images(report, image_infos)
+
+        if labels_path:
+            txt_entries = scan_dir(labels_path, (".txt",))
+            report.count("yolo labels", len(txt_entries))
+            check_pairs(report, "yolo orphans", txt_entries, image_names, "txt", "image")
+            for txt_name, problems in sorted(cached_results(index, "yolo", txt_entries, read_yolo_problems, workers).items()):
+                for line_no, problem in problems:
+                    report.add("yolo boxes", f"{txt_name}:{line_no} {problem}")
+    return report
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="validate converted dataset (annotation.csv, images, yolo txt)")
+    parser.add_argument("--annotation", default=ANNOTATION_FILE, help="annotation csv (없으면 annotation 검사 생략)")
+    parser.add_argument("--images", default=IMAGES_PATH, help="image 폴더")
+    parser.add_argument("--labels", default=None, help="yolo txt 폴더 (지정하면 txt 도 검사)")
+    parser.add_argument("--shard-index", default=None, help="shards output 의 index.csv (지정하면 image 폴더 대신 사용)")
+    parser.add_argument("--raw-label", default=RAW_LABEL_PATH, help="raw json label 폴더")
+    parser.add_argument("--raw-video", default=RAW_VIDEO_PATH, help="raw mp4 video 폴더")
+    parser.add_argument("--hash", action="store_true", help="image 내용 hash 로 같은 video 의 중복 frame 검사 (모든 byte 를 읽음)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="image header / txt 를 읽을 thread 수")
+    parser.add_argument("--index", default=INDEX_FILE, help="검사 결과 cache (바뀐 file 만 다시 읽음)")
+    parser.add_argument("--report", default=REPORT_FILE, help="모든 문제를 담은 보고서(json) 경로")
+    args = parser.parse_args()
+
+    report = validate_dataset(args.annotation, args.images, args.labels, args.shard_index, args.raw_label, args.raw_video,
+                              args.index, args.hash, args.workers)
+    report.print_summary()
+    report.save(args.report)
+    sys.exit(1 if report.problems else 0)
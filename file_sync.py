@@ -0,0 +1,139 @@
+"""
+    원본 폴더 tree 의 file 들을 작업 폴더 하나로 모으는 incremental sync
+    - scan_files : os.scandir 한 번의 순회로 tree 전체에서 이름에 key 가 들어간 file 을 찾음 (stat 도 scandir 결과 사용)
+    - 대상 file 의 size / mtime 이 같으면 (link mode 는 이미 같은 file 을 가리키면) 건너뜀
+    - mode : copy (byte 복사, mtime 유지) / hardlink / symlink / reflink (copy-on-write clone, 안 되는 filesystem 이면 copy)
+    - 남은 복사는 thread pool 로 병렬 실행, 대상 file 은 임시 이름으로 만든 뒤 교체하므로 중단되어도 반쯤 쓴 file 이 남지 않음
+    - sync_files : scan 대신 이미 알고 있는 file 목록 (예: raw_catalog 의 조회 결과) 을 sync
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SYNC_MODES = ("copy", "hardlink", "symlink", "reflink")
+MTIME_TOLERANCE_NS = 2 * 10**9  # FAT/exFAT 등 mtime 해상도가 2초인 filesystem 고려
+FICLONE = 0x40049409  # linux ioctl : reflink clone
+
+def scan_files(root, detect_key="", extensions=None):
+    """
+        root 아래 모든 file 중 이름에 detect_key 가 들어가고 (extensions 가 있으면) 확장자가 맞는 file
+        - returns : {file 이름: (경로, stat)}, 같은 이름이 여러 폴더에 있을 때의 중복 경로 목록
+    """
+    found, duplicates = {}, []
+    pending_dirs = [root]
+    while pending_dirs:
+        directory = pending_dirs.pop()
+        with os.scandir(directory) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(entry.path)
+                elif entry.is_file() and detect_key in entry.name:
+                    if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                        continue
+                    if entry.name in found:
+                        duplicates.append(entry.path)
+                        continue
+                    found[entry.name] = (entry.path, entry.stat())
+    return found, duplicates
+
+def is_synced(src, src_stat, dst, mode):
+    try:
+        dst_stat = os.stat(dst, follow_symlinks=False)
+    except FileNotFoundError:
+        return False
+    if mode == "symlink":
+        return os.path.islink(dst) and os.path.abspath(os.readlink(dst)) == os.path.abspath(src)
+    if mode == "hardlink":
+        return (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev)
+    return (not os.path.islink(dst) and dst_stat.st_size == src_stat.st_size
+            and abs(dst_stat.st_mtime_ns - src_stat.st_mtime_ns) <= MTIME_TOLERANCE_NS)
+
+def _reflink(src, dst):
+    """ returns : clone 성공 여부 (지원하지 않으면 False) """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            return False
+    shutil.copystat(src, dst)
+    return True
+
+def sync_file(src, dst, mode="copy"):
+    """ returns : 실제로 사용한 mode (reflink 가 안 되어 copy 한 경우 "copy") """
+    temp_dst = dst + ".sync_tmp"
+    if os.path.lexists(temp_dst):
+        os.remove(temp_dst)
+    used_mode = mode
+    if mode == "hardlink":
+        os.link(src, temp_dst)
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), temp_dst)
+    elif mode == "reflink" and _reflink(src, temp_dst):
+        pass
+    else:
+        used_mode = "copy"
+        shutil.copy2(src, temp_dst)
+    os.replace(temp_dst, dst)
+    return used_mode
+
+def sync_tree(src_root, dst_dir, detect_key="", mode="copy", workers=4, extensions=None, delete=False, dry_run=False):
+    """
+        src_root tree 의 file 들을 dst_dir 한 폴더로 sync
+        - delete : src 에 없는 (detect_key, extensions 조건에 맞는) dst file 삭제
+        - returns : 개수 {"synced", "skipped", "deleted", "duplicates", "copy_fallback", "failed"}
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"unknown sync mode '{mode}' (choose from {SYNC_MODES})")
+    found, duplicates = scan_files(src_root, detect_key, extensions)
+    for duplicate in duplicates:
+        print(f"warning : duplicated file name, skipped '{duplicate}'")
+    return sync_files(found, dst_dir, detect_key, mode, workers, extensions, delete, dry_run, src_root, len(duplicates))
+
+def sync_files(found, dst_dir, detect_key="", mode="copy", workers=4, extensions=None, delete=False, dry_run=False,
+               source="files", duplicates=0):
+    """
+        found ({file 이름: (경로, stat)}, stat 은 st_size / st_mtime_ns / st_ino / st_dev 만 사용) 를 dst_dir 한 폴더로 sync
+        - returns : sync_tree 와 같은 개수
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"unknown sync mode '{mode}' (choose from {SYNC_MODES})")
+    os.makedirs(dst_dir, exist_ok=True)
+    todo = [(src, os.path.join(dst_dir, name)) for name, (src, src_stat) in sorted(found.items())
+            if not is_synced(src, src_stat, os.path.join(dst_dir, name), mode)]
+    counts = {"synced": len(todo), "skipped": len(found) - len(todo), "deleted": 0,
+              "duplicates": duplicates, "copy_fallback": 0, "failed": 0}
+
+    stale = []
+    if delete:
+        with os.scandir(dst_dir) as entries:
+            stale = [entry.path for entry in entries
+                     if (entry.is_file() or entry.is_symlink()) and detect_key in entry.name and entry.name not in found
+                     and (not extensions or os.path.splitext(entry.name)[1].lower() in extensions)]
+        counts["deleted"] = len(stale)
+
+    print(f"sync {source} -> {dst_dir} : {len(todo)} to {mode}, {counts['skipped']} unchanged, {len(stale)} to delete")
+    if dry_run:
+        return counts
+    for stale_file in stale:
+        os.remove(stale_file)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {executor.submit(sync_file, src, dst, mode): src for src, dst in todo}
+        for future in as_completed(futures):
+            try:
+                used_mode = future.result()
+            except OSError as e:
+                # 한 file 의 실패는 기록만 하고 나머지는 계속 sync
+                counts["failed"] += 1
+                print(f"failed : '{os.path.basename(futures[future])}' ({e})")
+                continue
+            if used_mode != mode:
+                counts["copy_fallback"] += 1
+            print(f"{used_mode} : '{os.path.basename(futures[future])}'")
+    if counts["copy_fallback"]:
+        print(f"reflink not supported for {counts['copy_fallback']} files, copied instead")
+    return counts
@@ -0,0 +1,58 @@
+"""
+    frame 번호로 box 를 찾는 NumPy 배열 기반 annotation 저장소
+    - box 들은 frame 번호 순으로 정렬된 (n, 4) float64 배열 하나, frame 번호는 (n,) int64 배열 하나에 저장
+      ([cur_frame, [x, y, w, h]] list 나 row dict 대비 box 당 수십 byte 수준)
+    - 정렬된 frame 번호 배열의 binary search 로 그 frame 의 box 범위를 찾으므로 frame -> boxes 조회가 O(log n)
+      (frame 번호 크기의 table 을 만들지 않으므로 memory 는 box 수에만 비례, 잘못된 큰 cur_frame 이 있어도 그대로)
+    - 한 frame 에 box 가 여러 개여도 됨 (같은 frame 안에서는 입력 순서 유지)
+    - 반복하면 기존 list 와 같이 (cur_frame, [x, y, w, h]) 를 frame 순으로 반환
+"""
+
+import numpy as np
+
+class FrameBoxes():
+    """
+        frame_boxes = FrameBoxes.from_pairs([[259, [930.8, 481.1, 119.2, 114.3]], ..])
+        frame_boxes.boxes(259)    # (k, 4) array, 없으면 (0, 4)
+    """
+    def __init__(self, frame_nums, boxes):
+        frame_nums = np.asarray(frame_nums, dtype=np.int64).reshape(-1)
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if len(frame_nums) and frame_nums.min() < 0:
+            raise ValueError("frame number must not be negative")
+        # 같은 frame 안에서는 입력 순서를 유지 (sorted(key=cur_frame) 와 같은 stable 정렬)
+        order = np.argsort(frame_nums, kind="stable")
+        self.frame_nums = frame_nums[order]
+        self.box_array = boxes[order]
+
+    @classmethod
+    def from_pairs(cls, frame_box_pairs):
+        """ [[cur_frame, [x, y, w, h]], ..] -> FrameBoxes """
+        frame_nums = [cur_frame for cur_frame, _ in frame_box_pairs]
+        boxes = [bbox for _, bbox in frame_box_pairs]
+        return cls(frame_nums, boxes)
+
+    def __len__(self):
+        return len(self.frame_nums)
+
+    def __contains__(self, frame_num):
+        return len(self.boxes(frame_num)) > 0
+
+    def __iter__(self):
+        for frame_num, bbox in zip(self.frame_nums.tolist(), self.box_array.tolist()):
+            yield frame_num, bbox
+
+    def __repr__(self):
+        return f"FrameBoxes({len(self)} boxes, {len(self.frames())} frames)"
+
+    def boxes(self, frame_num):
+        start = self.frame_nums.searchsorted(frame_num, "left")
+        stop = self.frame_nums.searchsorted(frame_num, "right")
+        return self.box_array[start:stop]
+
+    def frames(self):
+        """ box 가 있는 frame 번호 (정렬, 중복 없음) """
+        return np.unique(self.frame_nums)
+
+    def nbytes(self):
+        return self.frame_nums.nbytes + self.box_array.nbytes
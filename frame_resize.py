@@ -0,0 +1,73 @@
+"""
+    추출하는 frame 을 학습 해상도로 줄여서 저장하기 위한 resize 설정
+    - 짧은 변(short) 또는 긴 변(long) 을 size 로 맞추고 비율은 유지 (원본보다 크게 키우지는 않음)
+    - image 는 ImageWriterPool 의 worker 에서 encoding 직전에 resize (decode loop 에서는 하지 않음)
+    - 절대 좌표 box (annotation.csv 의 bbox_*, image_width/height) 는 같은 비율로 변환,
+      YOLO 상대 좌표 box 는 비율이 그대로이므로 바꾸지 않음
+"""
+
+import cv2
+
+RESIZE_SIDES = ("short", "long")
+INTERPOLATIONS = {
+    "area": cv2.INTER_AREA,  # 축소에 적합 (기본)
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+    "nearest": cv2.INTER_NEAREST,
+}
+
+class FrameResizer():
+    """
+        resizer = FrameResizer(800, side="short", interpolation="area")
+        resizer.target_size([1920, 1080])   # [1422, 800]
+    """
+    def __init__(self, size, side="short", interpolation="area"):
+        if side not in RESIZE_SIDES:
+            raise ValueError(f"unknown resize side '{side}' (choose from {RESIZE_SIDES})")
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"unknown interpolation '{interpolation}' (choose from {tuple(INTERPOLATIONS)})")
+        if size <= 0:
+            raise ValueError(f"resize size must be positive, got {size}")
+        self.size = size
+        self.side = side
+        self.interpolation = interpolation
+
+    def __repr__(self):
+        return f"FrameResizer({self.size}, side={self.side!r}, interpolation={self.interpolation!r})"
+
+    def params(self):
+        """ build manifest / run report 에 기록할 설정 """
+        return {"resize": self.size, "resize_side": self.side, "interpolation": self.interpolation}
+
+    def target_size(self, frame_size):
+        """ [width, height] -> resize 후 [width, height] """
+        width, height = frame_size
+        side_length = min(width, height) if self.side == "short" else max(width, height)
+        if side_length <= self.size:
+            return [width, height]
+        scale = self.size / side_length
+        return [max(int(round(width * scale)), 1), max(int(round(height * scale)), 1)]
+
+    def scale(self, frame_size):
+        """ returns : (x 배율, y 배율) """
+        target_width, target_height = self.target_size(frame_size)
+        return target_width / frame_size[0], target_height / frame_size[1]
+
+    def scale_boxes(self, boxes, frame_size):
+        """ 절대 좌표 [x, y, w, h] box 들 (x, y 는 center 또는 좌상단) -> resize 후 좌표 """
+        scale_x, scale_y = self.scale(frame_size)
+        return [[x * scale_x, y * scale_y, w * scale_x, h * scale_y] for x, y, w, h in boxes]
+
+    def writer_resize(self, frame_size):
+        """ ImageWriterPool 에 넘길 (width, height, interpolation flag), 크기가 그대로이면 None """
+        target_width, target_height = self.target_size(frame_size)
+        if [target_width, target_height] == list(frame_size):
+            return None
+        return target_width, target_height, INTERPOLATIONS[self.interpolation]
+
+def make_resizer(size=None, side="short", interpolation="area"):
+    """ size 가 없으면 None (resize 하지 않음) """
+    if size is None:
+        return None
+    return FrameResizer(size, side, interpolation)
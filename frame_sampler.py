@@ -0,0 +1,159 @@
+"""
+    전체 dataset 에서 저장할 frame 번호를 미리 정하는 frame sampling plan
+    - 모든 label file 의 event 범위(후보 frame)를 먼저 읽고, 전체 budget(저장할 frame 수) 안에서 video 별 frame 번호를 정함
+    - uniform : 전체 후보 frame 을 한 줄로 이어 놓고 같은 간격으로 선택 (video 별 비율이 아닌 dataset 전체 기준)
+    - camera : budget 을 camera 별로 똑같이 나눈 뒤 (후보가 모자란 camera 의 남는 몫은 나머지 camera 에) camera 안에서 uniform
+    - time : 모든 event 범위에서 같은 frame 간격(gap)으로 선택, budget 을 넘지 않는 가장 작은 gap 사용
+      (짧은 event 도 최소 한 frame 은 포함, event 수가 budget 보다 많으면 event 를 같은 간격으로 골라 가운데 frame)
+    - 추출할 때는 plan 에 있는 frame 만 decode 하고, 나머지는 grab 으로 건너뜀 (video_frames.iter_event_frames)
+"""
+
+import os
+import re
+import json
+import hashlib
+
+import numpy as np
+
+from label_stream import load_label_events
+from video_frames import FrameIntervals, merge_frame_ranges
+
+SAMPLING_MODES = ("uniform", "camera", "time")
+EVENT_OBJECT_ID = 1  # smoking event
+
+def camera_of(label_file):
+    """
+        file 이름의 camera 부분
+        예 : C_1_31_jap_cl_09-01_17-16-00_b_set_DF2.json -> C_1_31 (형식이 다르면 file 이름 전체)
+    """
+    name = os.path.splitext(os.path.basename(label_file))[0]
+    match = re.match(r'([A-Za-z]+_\d+_\d+)_', name)
+    return match.group(1) if match else name
+
+def label_event_intervals(label_file):
+    """ label file 의 smoking event 범위 (annotations 는 읽지 않음) """
+    events = load_label_events(label_file)
+    return FrameIntervals(merge_frame_ranges([[event["ev_start_frame"], event["ev_end_frame"]]
+                                              for event in events if event["object_id"] == EVENT_OBJECT_ID]))
+
+def candidate_frames(intervals):
+    """ FrameIntervals -> 후보 frame 번호 배열 (정렬) """
+    if not len(intervals):
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([np.arange(start, end + 1, dtype=np.int64) for start, end in intervals])
+
+def evenly_spaced(count, size):
+    """ 0 .. count-1 에서 같은 간격으로 size 개의 index (size >= count 이면 전부) """
+    if size >= count:
+        return np.arange(count, dtype=np.int64)
+    return ((np.arange(size) + 0.5) * count / size).astype(np.int64)
+
+def share_budget(counts, budget):
+    """
+        budget 을 그룹(counts[i] 개의 후보) 별로 최대한 똑같이 나눔
+        - 후보가 몫보다 적은 그룹은 전부, 남는 몫은 나머지 그룹에 다시 나눔. returns : 그룹 별 개수
+    """
+    shares = [0] * len(counts)
+    remaining = sorted(range(len(counts)), key=lambda idx: counts[idx])
+    budget = min(budget, sum(counts))
+    while remaining and budget > 0:
+        share, extra = divmod(budget, len(remaining))
+        idx = remaining[0]
+        if counts[idx] <= share:
+            shares[idx] = counts[idx]
+            budget -= counts[idx]
+            remaining.pop(0)
+            continue
+        # 남은 그룹은 모두 몫 이상의 후보가 있음
+        for order, idx in enumerate(remaining):
+            shares[idx] = share + (1 if order >= len(remaining) - extra else 0)
+        break
+    return shares
+
+def _split_by_video(keys, frame_lists, selected):
+    """ 이어 놓은 후보에서 고른 index -> {key: frame 번호 list} """
+    offsets = np.cumsum([0] + [len(frames) for frames in frame_lists])
+    plan = {}
+    for key, frames, start, end in zip(keys, frame_lists, offsets[:-1], offsets[1:]):
+        picked = selected[(selected >= start) & (selected < end)] - start
+        plan[key] = frames[picked].tolist()
+    return plan
+
+def plan_uniform(video_intervals, budget):
+    keys = list(video_intervals)
+    frame_lists = [candidate_frames(video_intervals[key]) for key in keys]
+    total = sum(len(frames) for frames in frame_lists)
+    return _split_by_video(keys, frame_lists, evenly_spaced(total, budget))
+
+def plan_camera(video_intervals, budget, camera_key=camera_of):
+    cameras = {}
+    for key in video_intervals:
+        cameras.setdefault(camera_key(key), []).append(key)
+    camera_names = list(cameras)
+    counts = [sum(video_intervals[key].frame_count() for key in cameras[camera]) for camera in camera_names]
+    plan = {}
+    for camera, share in zip(camera_names, share_budget(counts, budget)):
+        plan.update(plan_uniform({key: video_intervals[key] for key in cameras[camera]}, share))
+    return {key: plan[key] for key in video_intervals}
+
+def _gap_count(lengths, gap):
+    return int(np.sum((lengths + gap - 1) // gap))
+
+def plan_time(video_intervals, budget):
+    keys = list(video_intervals)
+    ranges = [(key, start, end) for key in keys for start, end in video_intervals[key]]
+    plan = {key: [] for key in keys}
+    if not ranges or budget <= 0:
+        return plan
+    if len(ranges) > budget:
+        # event 하나에 한 frame 도 줄 수 없으면 event 를 같은 간격으로 골라 가운데 frame
+        for idx in evenly_spaced(len(ranges), budget).tolist():
+            key, start, end = ranges[idx]
+            plan[key].append((start + end) // 2)
+        return plan
+    lengths = np.array([end - start + 1 for _, start, end in ranges], dtype=np.int64)
+    # gap 이 클수록 개수가 줄어듦 : budget 을 넘지 않는 가장 작은 gap 을 이분 탐색
+    low, high = 1, int(lengths.max())
+    while low < high:
+        gap = (low + high) // 2
+        if _gap_count(lengths, gap) <= budget:
+            high = gap
+        else:
+            low = gap + 1
+    for key, start, end in ranges:
+        plan[key].extend(range(start, end + 1, low))
+    return plan
+
+def plan_frames(video_intervals, budget, mode="uniform"):
+    """
+        video_intervals : {key(label file 이름): FrameIntervals} (순서 유지), budget : 전체 저장 frame 수
+        returns : {key: 저장할 frame 번호 list (정렬)}
+    """
+    if mode == "uniform":
+        return plan_uniform(video_intervals, budget)
+    elif mode == "camera":
+        return plan_camera(video_intervals, budget)
+    elif mode == "time":
+        return plan_time(video_intervals, budget)
+    else:
+        raise ValueError(f"unknown sampling mode '{mode}' (choose from {SAMPLING_MODES})")
+
+def build_frame_plan(label_files, budget, mode="uniform", plan_file=None):
+    """ label_files 의 event 범위로 plan 을 만들고, plan_file 이 있으면 json 으로 저장 """
+    video_intervals = {os.path.basename(label_file): label_event_intervals(label_file) for label_file in label_files}
+    plan = plan_frames(video_intervals, budget, mode)
+    candidate_count = sum(intervals.frame_count() for intervals in video_intervals.values())
+    planned_count = sum(len(frame_nums) for frame_nums in plan.values())
+    print(f"frame plan ({mode}) : {planned_count} of {candidate_count} event frames from {len(plan)} videos, "
+          f"{len(set(camera_of(key) for key in plan))} cameras (budget {budget})")
+    if plan_file is not None:
+        plan_dir = os.path.dirname(plan_file)
+        if plan_dir:
+            os.makedirs(plan_dir, exist_ok=True)
+        with open(plan_file, "w", encoding="utf-8") as file:
+            json.dump({"mode": mode, "budget": budget, "frames": plan}, file)
+    return plan
+
+def plan_digest(frame_nums):
+    """ video 하나의 plan 을 짧게 (build manifest 에서 plan 이 바뀌었는지 확인) """
+    return hashlib.sha1(",".join(map(str, frame_nums)).encode()).hexdigest()[:16]
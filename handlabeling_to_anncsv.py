@@ -1,79 +1,158 @@
 '''
-    gernerate bbox annotation (DINO FN form) from images 
+    gernerate bbox annotation (DINO FN form) from images
+    - 창 하나를 계속 사용하고, 화면은 mouse / key event 가 있을 때만 다시 그림 (event 가 없으면 waitKey 에서 대기)
+    - 다음 image 들은 background thread 에서 미리 decode (PREFETCH_COUNT 장)
+    - annotation file 에 label 하나씩 이어서 씀 (중간에 끝내도 그때까지의 label 은 남음), 이미 label 된 image 는 건너뜀
+    - key : q / Esc / Enter / Space = bbox 저장 후 다음 image (bbox 가 없으면 저장하지 않고 넘어감), r = bbox 다시 선택, x = 종료
 '''
 import glob, os
-import cv2, csv  
+import cv2, csv
+import queue
+import argparse
+import threading
+from annotation_writer import ANNOTATION_FIELDS, read_header
 
-# classname & path setting 
+# classname & path setting
 
 CLASSNAME = "knife"
 IMAGES_PATH = "images/"
 ANNOTATION_PATH = "annotation/annotation.csv"
+PREFETCH_COUNT = 8
+WINDOW_NAME = "Select bbox"
+NEXT_KEYS = (ord('q'), 27, 13, 32)  # q, Esc, Enter, Space
+RESET_KEY = ord('r')
+QUIT_KEY = ord('x')
 
-# select bbox 
+# prefetch images
 
-def mouse_click_event(event, x, y, flags, param):
-    if event == cv2.EVENT_LBUTTONDOWN: 
-        clicked_points = param["clicked_points"]
-        clicked_checker = param["clicked_checker"]
-        if not clicked_checker["clicked_start"]: 
-            clicked_points["start_point"] = [x, y] 
-            clicked_checker["clicked_start"], clicked_checker["clicked_end"] = True, False
-        elif not clicked_checker["clicked_end"]: 
-            clicked_points["end_point"] = [x, y] 
-            clicked_checker["clicked_start"], clicked_checker["clicked_end"] = False, True 
+class ImagePrefetcher():
+    """
+        image_files 를 순서대로 background thread 에서 decode
+        - for image_file, image in ImagePrefetcher(image_files): ..  (decode 실패한 image 는 None)
+        - cv2.imread 는 GIL 을 놓으므로 labeling 하는 동안 다음 image 들이 준비됨
+    """
+    def __init__(self, image_files, prefetch_count=PREFETCH_COUNT):
+        self.image_files = image_files
+        self._queue = queue.Queue(maxsize=max(prefetch_count, 1))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # 창을 닫아 더 이상 꺼내지 않으면 (close) 기다리지 않고 끝냄
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _load(self):
+        for image_file in self.image_files:
+            if not self._put((image_file, cv2.imread(image_file))):
+                return
+        self._put(None)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+# select bbox
 
 def draw_bbox(image, point1, point2):
-    cv2.rectangle(image, (point1[0], point1[1]), (point2[0], point2[1]), (0, 0, 255), 2) 
-    return image 
-    
+    cv2.rectangle(image, (point1[0], point1[1]), (point2[0], point2[1]), (0, 0, 255), 2)
+    return image
+
+def draw_point(image, point):
+    cv2.circle(image, (point[0], point[1]), 3, (0, 0, 255), -1)
+    return image
+
 def convert_bbox(point1, point2):
     x, y = (point1[0]+point2[0])/2, (point1[1]+point2[1])/2
     w, h = point2[0]-point1[0], point2[1]-point1[1]
     bbox = [x, y, w, h]
     return bbox
 
-def select_bbox(image_file):
-    image = cv2.imread(image_file) 
-    WINDOW_NAME = f"Select bbox - {image_file}" 
-    cv2.namedWindow(WINDOW_NAME) 
-    clicked_points = { 
-        "start_point": None,
-        "end_point": None
-    } 
-    clicked_checker = { 
-        "clicked_start": False,
-        "clicked_end": False,
-    } 
-    cv2.setMouseCallback(WINDOW_NAME, mouse_click_event, param={"clicked_points":clicked_points, "clicked_checker":clicked_checker}) 
-    cv2.imshow(WINDOW_NAME, image)
-    while True: 
-        key = cv2.waitKey(1) & 0xFF
-        isBboxCompeleted = clicked_checker["clicked_end"] and not clicked_checker["clicked_start"]
-
-        if isBboxCompeleted:
-            image_with_bbox = draw_bbox(image.copy(), clicked_points["start_point"], clicked_points["end_point"])
-            cv2.imshow(WINDOW_NAME, image_with_bbox)
-        
-        if key == ord('q') or key == 27:
-            if isBboxCompeleted:
-                bbox = convert_bbox(clicked_points["start_point"], clicked_points["end_point"])
-                print(f"Bounding box selected : {bbox}")
-                cv2.destroyAllWindows()
-                return bbox 
-            else:
-                print("Bounding box not selected. Exiting...")
-                cv2.destroyAllWindows()
-                return None 
-        
-# save annotation 
-
-def save_annotation(writer, image_file, bbox): 
-    label_name = CLASSNAME 
+class BboxSelector():
+    """
+        창 하나 + mouse callback 하나를 모든 image 에 재사용
+        - 첫 click : 시작점, 두 번째 click : 끝점 (bbox 완성), 그 다음 click 은 새 bbox 시작
+        - 화면은 click 했을 때만 다시 그림
+    """
+    def __init__(self):
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, self.mouse_click_event)
+        self.image = None
+        self.start_point, self.end_point = None, None
+
+    def mouse_click_event(self, event, x, y, flags, param):
+        if event != cv2.EVENT_LBUTTONDOWN or self.image is None:
+            return
+        if self.start_point is None or self.end_point is not None:
+            self.start_point, self.end_point = [x, y], None
+        else:
+            self.end_point = [x, y]
+        self.render()
+
+    def render(self):
+        if self.start_point is None:
+            cv2.imshow(WINDOW_NAME, self.image)
+        elif self.end_point is None:
+            cv2.imshow(WINDOW_NAME, draw_point(self.image.copy(), self.start_point))
+        else:
+            cv2.imshow(WINDOW_NAME, draw_bbox(self.image.copy(), self.start_point, self.end_point))
+
+    def select_bbox(self, image_file, image, title=""):
+        """ returns : bbox (선택하지 않았으면 None), 종료 여부 """
+        self.image = image
+        self.start_point, self.end_point = None, None
+        cv2.setWindowTitle(WINDOW_NAME, f"{WINDOW_NAME} - {image_file} {title}")
+        self.render()
+        while True:
+            # event 가 올 때까지 대기 (mouse event 는 대기 중에도 callback 으로 처리됨)
+            key = cv2.waitKey(0) & 0xFF
+            if key == RESET_KEY:
+                self.start_point, self.end_point = None, None
+                self.render()
+            elif key in NEXT_KEYS or key == QUIT_KEY:
+                break
+        self.image = None
+        if self.end_point is None:
+            print("Bounding box not selected. Skipped")
+            return None, key == QUIT_KEY
+        bbox = convert_bbox(self.start_point, self.end_point)
+        print(f"Bounding box selected : {bbox}")
+        return bbox, key == QUIT_KEY
+
+    def close(self):
+        cv2.destroyWindow(WINDOW_NAME)
+
+# save annotation
+
+def read_labeled_images(annotation_file):
+    """ 이미 annotation file 에 있는 image_name 들 (이어서 labeling 할 때 건너뜀) """
+    if not os.path.exists(annotation_file):
+        return set()
+    header = read_header(annotation_file)
+    if header is not None and header != ANNOTATION_FIELDS:
+        raise RuntimeError(f"'{annotation_file}' has different fields {header} (expected {ANNOTATION_FIELDS}) .. ")
+    with open(annotation_file, newline='') as annfile:
+        return set(row["image_name"] for row in csv.DictReader(annfile))
+
+def save_annotation(writer, image_file, bbox, image_size):
+    label_name = CLASSNAME
     bbox_x, bbox_y, bbox_width, bbox_height = bbox
     image_name = os.path.basename(image_file)
-    image = cv2.imread(image_file)
-    image_height, image_width, _ = image.shape
+    # 이미 decode 한 image 의 크기 사용
+    image_width, image_height = image_size
     annDict = {
         "label_name": label_name,
         "bbox_x": bbox_x,
@@ -86,20 +165,42 @@ def save_annotation(writer, image_file, bbox):
     }
     writer.writerow(annDict)
 
-# main 
+# main
 
 if __name__ == "__main__":
-    annotation_file = ANNOTATION_PATH
-    fieldnames = ["label_name", "bbox_x", "bbox_y", "bbox_width", "bbox_height", "image_name", "image_width", "image_height"]
-    with open(annotation_file, 'w', newline='') as annotation_file:
-        writer = csv.DictWriter(annotation_file, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        image_files = glob.glob(os.path.join(IMAGES_PATH + "*.png"))
-        for image_file in image_files:
-            print(f"Opened image : {image_file}") 
-            bbox = select_bbox(image_file) 
-            save_annotation(writer, image_file, bbox)
-
-        print("... annotation saved!")
+    parser = argparse.ArgumentParser(description="hand labeling bbox to dino annotation.csv")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_COUNT, help="미리 decode 해둘 image 수")
+    args = parser.parse_args()
+
+    labeled_images = read_labeled_images(ANNOTATION_PATH)
+    image_files = sorted(glob.glob(os.path.join(IMAGES_PATH + "*.png")))
+    todo_files = [image_file for image_file in image_files if os.path.basename(image_file) not in labeled_images]
+    print(f"images : {len(image_files)}, already labeled : {len(image_files) - len(todo_files)}, to label : {len(todo_files)}")
+
+    write_header = not os.path.exists(ANNOTATION_PATH) or os.path.getsize(ANNOTATION_PATH) == 0
+    prefetcher = ImagePrefetcher(todo_files, args.prefetch)
+    selector = BboxSelector()
+    saved_count = 0
+    try:
+        with open(ANNOTATION_PATH, 'a', newline='') as annotation_file:
+            writer = csv.DictWriter(annotation_file, fieldnames=ANNOTATION_FIELDS)
+            if write_header:
+                writer.writeheader()
+            for idx, (image_file, image) in enumerate(prefetcher):
+                if image is None:
+                    print(f"failed to read image : {image_file}")
+                    continue
+                print(f"Opened image : {image_file}")
+                bbox, quit_session = selector.select_bbox(image_file, image, f"({idx+1}/{len(todo_files)})")
+                if bbox is not None:
+                    save_annotation(writer, image_file, bbox, (image.shape[1], image.shape[0]))
+                    # label 하나마다 file 에 반영 (중간에 끝내도 유지)
+                    annotation_file.flush()
+                    saved_count += 1
+                if quit_session:
+                    break
+    finally:
+        prefetcher.close()
+        selector.close()
 
+    print(f"... annotation saved! : {ANNOTATION_PATH} (+{saved_count} rows)")
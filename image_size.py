@@ -0,0 +1,106 @@
+"""
+    image 의 pixel data 를 decode 하지 않고 file header 만 읽어 (width, height) 를 구하는 유틸
+    - PNG : IHDR chunk / JPEG : SOFn marker 를 읽음. 그 외 형식은 PIL 로 (header 만) 확인
+    - ImageSizeCache : path + mtime(+size) 를 key 로 결과를 json file 에 저장해두고, 바뀌지 않은 image 는 file 을 열지 않음
+"""
+
+import os
+import json
+import struct
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# SOF0~SOF15 중 DHT(C4), JPG(C8), DAC(CC) 를 제외한 marker 에 frame size 가 있음
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _png_size(file):
+    header = file.read(24)
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def _jpeg_size(file):
+    file.seek(2)
+    while True:
+        byte = file.read(1)
+        while byte and byte != b"\xff":
+            byte = file.read(1)
+        while byte == b"\xff":
+            byte = file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        segment_length = file.read(2)
+        if len(segment_length) < 2:
+            return None
+        length = struct.unpack(">H", segment_length)[0]
+        if marker in JPEG_SOF_MARKERS:
+            sof = file.read(5)
+            if len(sof) < 5:
+                return None
+            height, width = struct.unpack(">HH", sof[1:5])
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+def probe_image_size(image_file):
+    """ returns : (width, height) """
+    with open(image_file, "rb") as file:
+        signature = file.read(8)
+        file.seek(0)
+        size = None
+        if signature == PNG_SIGNATURE:
+            size = _png_size(file)
+        elif signature[:2] == b"\xff\xd8":
+            size = _jpeg_size(file)
+    if size is None:
+        from PIL import Image
+        with Image.open(image_file) as img:
+            size = img.size
+    return tuple(size)
+
+class ImageSizeCache():
+    """
+        with ImageSizeCache(cache_file) as size_cache:
+            image_width, image_height = size_cache.get_size(image_file)
+    """
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {}
+        self._changed = False
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
+
+    def get_size(self, image_file, stat=None):
+        # stat : os.scandir 등으로 이미 얻은 stat 이 있으면 넘겨서 stat 호출을 줄임
+        if stat is None:
+            stat = os.stat(image_file)
+        key = image_file if os.path.isabs(image_file) else os.path.abspath(image_file)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2], entry[3]
+        width, height = probe_image_size(image_file)
+        self.entries[key] = [stat.st_mtime_ns, stat.st_size, width, height]
+        self._changed = True
+        return width, height
+
+    def save(self):
+        if not self.cache_file or not self._changed:
+            return
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        temp_file = self.cache_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        os.replace(temp_file, self.cache_file)
+        self._changed = False
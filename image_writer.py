@@ -0,0 +1,240 @@
+"""
+    decode loop 와 image encoding(cv2.imwrite)을 겹쳐 실행하기 위한 bounded encoder pool
+    - thread  : thread pool 에서 cv2.imwrite 실행 (cv2 는 encoding 중 GIL 을 놓으므로 병렬로 동작)
+    - process : frame 을 shared memory slot 에 복사해 worker process 로 넘김 (frame pickle 없음)
+    - 동시에 처리 중인 frame 수는 max_pending 으로 제한. 가득 차면 submit 이 대기(backpressure)하므로 메모리 사용량이 고정됨
+    - encoding 은 cv2.imwrite 와 같은 encoder 를 쓰는 cv2.imencode + file write 이므로 결과 file 은 byte 단위로 동일
+    - encode / write / submit 대기 시간과 저장한 image 수, byte 수를 모아둠 (run_stats 에서 사용)
+    - resize=(width, height, interpolation) 를 주면 worker 에서 encoding 직전에 cv2.resize (frame_resize), 시간은 encode 에 포함
+    - sink (예: tar_shards.TarShardWriter) 를 주면 file 대신 sink.write(name, bytes) 로 저장. worker 는 encoding 만 하고,
+      sink 에는 main thread 에서 submit 순서대로 씀 (image 와 함께 넘긴 extra_files 는 image 바로 뒤에)
+"""
+
+import os
+import time
+import queue
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+ENCODE_MODES = ("thread", "process")
+
+def _write_image(image_file, frame, params, to_sink=False, resize=None):
+    """ returns : (encode 초, write 초, byte 수, to_sink 이면 encoding 된 bytes 아니면 None) """
+    start = time.perf_counter()
+    if resize is not None:
+        width, height, interpolation = resize
+        frame = cv2.resize(frame, (width, height), interpolation=interpolation)
+    succeeded, encoded = cv2.imencode(os.path.splitext(image_file)[1], frame, params)
+    if not succeeded:
+        raise RuntimeError(f"Cannot write image '{image_file}' .. ")
+    encoded_at = time.perf_counter()
+    if to_sink:
+        return encoded_at - start, 0.0, encoded.nbytes, encoded.tobytes()
+    try:
+        with open(image_file, "wb") as file:
+            file.write(encoded.data)
+    except OSError as e:
+        raise RuntimeError(f"Cannot write image '{image_file}' .. ({e})")
+    return encoded_at - start, time.perf_counter() - encoded_at, encoded.nbytes, None
+
+# process mode worker
+
+_attached_slots = {}
+
+def _attach_shared_memory(shm_name):
+    shm = _attached_slots.get(shm_name)
+    if shm is None:
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        except TypeError:
+            # python < 3.13 : slot 은 main process 가 관리하므로 worker 에서는 resource tracker 에 등록하지 않음
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=shm_name)
+            finally:
+                resource_tracker.register = register
+        _attached_slots[shm_name] = shm
+    return shm
+
+def _write_image_from_shared_memory(shm_name, shape, dtype, image_file, params, to_sink=False, resize=None):
+    shm = _attach_shared_memory(shm_name)
+    frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return _write_image(image_file, frame, params, to_sink, resize)
+
+class ImageWriterPool():
+    """
+        with ImageWriterPool(workers=2) as image_writer:
+            image_writer.submit(image_file, frame)
+        - workers=0 이면 submit 안에서 바로 cv2.imwrite (기존 동기 방식)
+        - thread mode 에서 submit 한 frame 은 write 가 끝날 때까지 수정하지 말 것
+          (release 를 주면 frame 을 다 쓴 뒤 호출 : FrameBufferRing 이 그때부터 buffer 를 다시 씀)
+        - worker 에서 난 에러는 close 시점에 다시 raise
+    """
+    def __init__(self, workers=2, mode="thread", max_pending=None, sink=None, resize=None):
+        if mode not in ENCODE_MODES:
+            raise ValueError(f"unknown encode mode '{mode}' (choose from {ENCODE_MODES})")
+        self.workers = workers
+        self.mode = mode
+        self.sink = sink
+        self.resize = resize
+        self._ordered = collections.deque()
+        self.max_pending = max_pending or max(workers*2, 1)
+        self._errors = []
+        self._executor = None
+        self.seconds = {"encode": 0.0, "write": 0.0, "submit_wait": 0.0}
+        self.images_written = 0
+        self.bytes_written = 0
+        self._stats_lock = threading.Lock()
+        if workers <= 0:
+            return
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+            self._pending = threading.BoundedSemaphore(self.max_pending)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._slots = []
+            self._slot_nbytes = 0
+            self._free_slots = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(raise_errors=exc_type is None)
+
+    def submit(self, image_file, frame, params=(), extra_files=None, release=None):
+        """
+            extra_files : image 와 같이 저장할 {file 경로: bytes} (예: yolo txt label)
+            release : frame 을 더 이상 읽지 않게 되면 (encoding 이 끝나거나 shared memory 로 복사한 뒤, 실패해도) 한 번 호출할 함수
+        """
+        if self._errors and release is not None:
+            release()
+        self._raise_errors()
+        to_sink = self.sink is not None
+        if self._executor is None:
+            try:
+                result = _write_image(image_file, frame, params, to_sink, self.resize)
+            finally:
+                if release is not None:
+                    release()
+            self._add_result(result)
+            self._store(image_file, result[3], extra_files)
+            return
+        if to_sink and len(self._ordered) >= self.max_pending:
+            # sink 에 아직 쓰지 않은 encoding 결과도 max_pending 개로 제한
+            start = time.perf_counter()
+            self._drain_ordered(block_count=1)
+            self.seconds["submit_wait"] += time.perf_counter() - start
+        if self.mode == "thread":
+            start = time.perf_counter()
+            self._pending.acquire()
+            self.seconds["submit_wait"] += time.perf_counter() - start
+            future = self._executor.submit(_write_image, image_file, frame, params, to_sink, self.resize)
+            future.add_done_callback(lambda f, release=release: self._on_thread_done(f, release))
+        else:
+            start = time.perf_counter()
+            slot_idx = self._acquire_slot(frame.nbytes)
+            self.seconds["submit_wait"] += time.perf_counter() - start
+            shm = self._slots[slot_idx]
+            try:
+                np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+            finally:
+                # worker 는 shared memory 의 복사본을 읽으므로 frame 은 바로 놓아도 됨
+                if release is not None:
+                    release()
+            future = self._executor.submit(_write_image_from_shared_memory, shm.name, frame.shape,
+                                           frame.dtype.str, image_file, params, to_sink, self.resize)
+            future.add_done_callback(lambda f, slot_idx=slot_idx: self._on_process_done(f, slot_idx))
+        if to_sink:
+            self._ordered.append((image_file, future, extra_files))
+            self._drain_ordered()
+        else:
+            self._store(image_file, None, extra_files)
+
+    def _store(self, image_file, data, extra_files):
+        # sink 가 있으면 image + extra_files 를 sink 에, 없으면 extra_files 만 file 로 씀 (image 는 worker 가 이미 씀)
+        start = time.perf_counter()
+        if self.sink is not None:
+            self.sink.write(image_file, data)
+        for extra_file, extra_data in (extra_files or {}).items():
+            if self.sink is not None:
+                self.sink.write(extra_file, extra_data)
+            else:
+                with open(extra_file, "wb") as file:
+                    file.write(extra_data)
+        with self._stats_lock:
+            self.seconds["write"] += time.perf_counter() - start
+
+    def _drain_ordered(self, block_count=0):
+        # 앞에서부터 encoding 이 끝난 것만 sink 에 씀 (block_count 개는 끝날 때까지 기다림)
+        while self._ordered and (block_count > 0 or self._ordered[0][1].done()):
+            image_file, future, extra_files = self._ordered.popleft()
+            block_count -= 1
+            if future.exception() is None:
+                self._store(image_file, future.result()[3], extra_files)
+
+    def close(self, raise_errors=True):
+        if self._executor is not None:
+            if raise_errors and not self._errors:
+                self._drain_ordered(block_count=len(self._ordered))
+            self._ordered.clear()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            if self.mode == "process":
+                for shm in self._slots:
+                    shm.close()
+                    shm.unlink()
+                self._slots = []
+        if raise_errors:
+            self._raise_errors()
+
+    def _raise_errors(self):
+        if self._errors:
+            error = self._errors[0]
+            self._errors = []
+            raise error
+
+    def _add_result(self, result):
+        encode_seconds, write_seconds, nbytes, _ = result
+        with self._stats_lock:
+            self.seconds["encode"] += encode_seconds
+            self.seconds["write"] += write_seconds
+            self.images_written += 1
+            self.bytes_written += nbytes
+
+    def _on_thread_done(self, future, release=None):
+        if release is not None:
+            release()
+        self._pending.release()
+        if future.exception() is not None:
+            self._errors.append(future.exception())
+        else:
+            self._add_result(future.result())
+
+    def _on_process_done(self, future, slot_idx):
+        self._free_slots.put(slot_idx)
+        if future.exception() is not None:
+            self._errors.append(future.exception())
+        else:
+            self._add_result(future.result())
+
+    def _acquire_slot(self, nbytes):
+        if nbytes > self._slot_nbytes:
+            # frame 크기가 바뀌면 진행 중인 write 를 모두 기다린 뒤 slot 을 다시 할당
+            for _ in range(len(self._slots)):
+                self._free_slots.get()
+            for shm in self._slots:
+                shm.close()
+                shm.unlink()
+            self._slots = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(self.max_pending)]
+            self._slot_nbytes = nbytes
+            for slot_idx in range(self.max_pending):
+                self._free_slots.put(slot_idx)
+        return self._free_slots.get()
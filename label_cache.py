@@ -0,0 +1,73 @@
+"""
+    AIHub json label 을 parse 한 결과를 label file 마다 .npz 하나로 저장하는 cache
+    - video_name, frame_size, 병합된 event_frames, box 의 frame 번호 / 좌표 배열 (FrameBoxes) 을 저장
+    - key : 원본 label file 의 mtime + size (+ PARSER_VERSION). 다르면 (label 이 바뀌었거나 cache 가 없으면) json 을 다시 parse
+    - box 좌표 형식은 parser 마다 다르므로 (anncsv : 절대 center xywh, yolo : 상대 좌표) kind 별로 따로 저장
+      <cache_dir>/<label 이름>.<kind>.npz
+    - 다음 실행부터는 json parse, filtering, 정렬 없이 배열만 읽음
+"""
+
+import os
+
+import numpy as np
+
+from frame_boxes import FrameBoxes
+
+PARSER_VERSION = 1  # parser 의 결과가 바뀌면 올려서 기존 cache 를 무효화
+
+def cache_file_for(cache_dir, label_file, kind):
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(label_file))[0]}.{kind}.npz")
+
+def _source_key(label_file):
+    stat = os.stat(label_file)
+    return np.array([stat.st_mtime_ns, stat.st_size, PARSER_VERSION], dtype=np.int64)
+
+def save_parsed_label(cache_file, label_file, parsed_label):
+    """ parsed_label : {"video_name", "frame_size", "event_frames", "bboxes"(FrameBoxes)} """
+    cache_dir = os.path.dirname(cache_file)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    temp_file = cache_file + ".tmp"
+    with open(temp_file, "wb") as file:
+        np.savez(file,
+                 source_key=_source_key(label_file),
+                 video_name=np.array(parsed_label["video_name"]),
+                 frame_size=np.array(parsed_label["frame_size"]),
+                 event_frames=np.array(parsed_label["event_frames"], dtype=np.int64).reshape(-1, 2),
+                 frame_nums=parsed_label["bboxes"].frame_nums,
+                 boxes=parsed_label["bboxes"].box_array)
+    os.replace(temp_file, cache_file)
+
+def load_cached_label(cache_file, label_file):
+    """ returns : parsed_label, cache 가 없거나 오래되었으면 None """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with np.load(cache_file, allow_pickle=False) as cached:
+            if not np.array_equal(cached["source_key"], _source_key(label_file)):
+                return None
+            return {
+                "video_name": str(cached["video_name"]),
+                "frame_size": cached["frame_size"].tolist(),
+                "event_frames": cached["event_frames"].tolist(),
+                "bboxes": FrameBoxes(cached["frame_nums"], cached["boxes"])
+            }
+    except (OSError, ValueError, KeyError):
+        # 깨진 cache 는 없는 것으로 보고 다시 parse
+        return None
+
+def load_parsed_label(label_file, parse_func, cache_dir=None, kind="anncsv"):
+    """
+        cache 가 유효하면 cache 에서, 아니면 parse_func(label_file) 로 parse 한 뒤 cache 에 저장
+        - cache_dir 이 None 이면 cache 를 사용하지 않음
+        - returns : (parsed_label, cache 사용 여부)
+    """
+    if cache_dir is None:
+        return parse_func(label_file), False
+    cache_file = cache_file_for(cache_dir, label_file, kind)
+    parsed_label = load_cached_label(cache_file, label_file)
+    if parsed_label is not None:
+        return parsed_label, True
+    parsed_label = parse_func(label_file)
+    save_parsed_label(cache_file, label_file, parsed_label)
+    return parsed_label, False
@@ -0,0 +1,108 @@
+"""
+    AIHub json label 을 한 번에 읽지 않고 chunk 단위로 읽는 streaming parser
+    - 최상위 object 의 info, events 는 그대로, annotations 배열은 원소 하나씩 decode
+    - 원하는 annotation (class_name 이 일치하는 것) 만 남기므로, 큰 label file 도 메모리 사용량이 제한됨
+    - 결과는 json.load 결과에서 annotations 만 걸러낸 것과 같으므로 기존 parser 에 그대로 넘길 수 있음
+"""
+
+import json
+
+CHUNK_SIZE = 1 << 16
+ANNOTATION_FIELDS = ("cur_frame", "class_name", "bbox")
+
+class _JsonStream():
+    def __init__(self, file):
+        self.file = file
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        # 이미 읽은 부분은 버리고, 값이 길면 더 크게 읽어 재시도 비용을 선형으로 유지
+        chunk = self.file.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self):
+        # 공백을 건너뛰고 다음 문자 반환 (EOF 이면 None)
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError(f"invalid label json : expected {chars!r}, got {char!r} ..")
+        self.pos += 1
+        return char
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # 숫자 등이 chunk 경계에서 잘렸을 수 있으므로, 끝까지 닿았으면 더 읽고 다시 decode
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def iter_label_items(label_file, stream_keys=("annotations",)):
+    """
+        최상위 (key, value) 를 순서대로 반환
+        - stream_keys 에 해당하는 배열은 (key, 원소) 를 원소마다 하나씩 반환
+    """
+    with open(label_file, "r", encoding="utf-8") as jsonfile:
+        stream = _JsonStream(jsonfile)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.read_value()
+            stream.expect(":")
+            if key in stream_keys and stream.peek() == "[":
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.expect("]")
+                else:
+                    while True:
+                        yield key, stream.read_value()
+                        if stream.expect(",]") == "]":
+                            break
+            else:
+                yield key, stream.read_value()
+            if stream.expect(",}") == "}":
+                break
+
+def load_label_json(label_file, class_name="smoking"):
+    """
+        json.load 대신 사용. {"info":.., "events":.., "annotations": [class_name 이 일치하는 annotation]} 반환
+        (annotation 은 parser 가 쓰는 cur_frame, class_name, bbox 만 남김)
+    """
+    raw_label_json = {"annotations": []}
+    for key, value in iter_label_items(label_file):
+        if key == "annotations":
+            if value.get("class_name") == class_name:
+                raw_label_json["annotations"].append({field: value[field] for field in ANNOTATION_FIELDS})
+        elif key in ("info", "events"):
+            raw_label_json[key] = value
+    return raw_label_json
+
+def load_label_events(label_file):
+    """ events 만 필요할 때 (frame sampling plan 등). events 를 읽으면 나머지 annotations 는 읽지 않고 끝냄 """
+    for key, value in iter_label_items(label_file, stream_keys=("annotations",)):
+        if key == "events":
+            return value
+    return []
@@ -0,0 +1,241 @@
+"""
+    AIHub 원본 (label / video) tree 를 한 번 scan 해서 SQLite 에 기록해 두는 catalog
+    - file 마다 경로, 크기, mtime, inode 와 file 이름에서 읽은 camera / tags / date / time / variant / set 을 저장
+      예 : C_1_31_jap_cl_09-01_17-16-00_b_set_DF2.json -> camera C_1_31, tags jap_cl, date 09-01, time 17-16-00, variant b, set set_DF2
+      (time_code 17-16-00_b 는 aihub_to_anncsv 의 image 이름 식별 코드와 같은 부분)
+    - label / video 짝은 확장자를 뺀 이름(stem) 으로 맞춤 (clips view)
+    - 다시 scan 하면 크기 / mtime 이 바뀐 file 만 갱신하고, 사라진 file 은 지움
+    - 부분 선택 (camera, date, 이름 key), 짝이 없는 file 찾기, raw_data 로의 sync 계획은 tree 를 다시 돌지 않고 index 로 조회
+
+    실행 예 :
+        python raw_catalog.py scan --label-root <TL 폴더> --video-root <TS 폴더>
+        python raw_catalog.py select --key _c_ --camera 31
+        python raw_catalog.py unpaired
+        python raw_catalog.py sync --key _c_ --camera 31 --mode hardlink --dry-run
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+import collections
+
+from file_sync import SYNC_MODES, scan_files, sync_files
+
+CATALOG_FILE = "processed_data/raw_catalog.sqlite"
+LABEL_DEST = "raw_data/label"
+VIDEO_DEST = "raw_data/video"
+KINDS = {"label": (".json",), "video": (".mp4",)}
+COMMANDS = ("scan", "select", "unpaired", "summary", "sync")
+NAME_PATTERN = re.compile(r'^(?P<camera>[A-Za-z]+_\d+_\d+)_(?:(?P<tags>.*?)_)?(?P<date>\d{2}-\d{2})_'
+                          r'(?P<time>\d{2}-\d{2}-\d{2})(?:_(?P<variant>[A-Za-z]))?(?:_(?P<set>.+))?$')
+NAME_FIELDS = ("camera", "tags", "date", "time", "variant", "set")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER,
+    dev INTEGER,
+    camera TEXT,
+    tags TEXT,
+    date TEXT,
+    time TEXT,
+    variant TEXT,
+    set_name TEXT
+);
+CREATE INDEX IF NOT EXISTS files_stem ON files (stem, kind);
+CREATE INDEX IF NOT EXISTS files_camera ON files (camera, date);
+"""
+# label / video 두 row 를 stem 으로 묶은 clip 하나 (이름에서 읽은 값은 두 row 가 같음)
+CLIP_COLUMNS = """stem, MAX(camera) AS camera, MAX(tags) AS tags, MAX(date) AS date, MAX(time) AS time,
+    MAX(variant) AS variant, MAX(set_name) AS set_name,
+    MAX(CASE WHEN kind = 'label' THEN path END) AS label_path,
+    MAX(CASE WHEN kind = 'video' THEN path END) AS video_path,
+    SUM(size) AS size"""
+SCHEMA += f"CREATE VIEW IF NOT EXISTS clips AS SELECT {CLIP_COLUMNS} FROM files GROUP BY stem;\n"
+
+CatalogStat = collections.namedtuple("CatalogStat", ["st_size", "st_mtime_ns", "st_ino", "st_dev"])
+
+def parse_clip_name(name):
+    """ file 이름 -> {"camera", "tags", "date", "time", "variant", "set"}, 형식이 다르면 모두 None """
+    match = NAME_PATTERN.match(os.path.splitext(os.path.basename(name))[0])
+    if match is None:
+        return dict.fromkeys(NAME_FIELDS)
+    return match.groupdict()
+
+def time_code(clip):
+    """ 17-16-00_b 형식 (variant 가 없으면 time 만) """
+    if clip["time"] is None:
+        return None
+    return f"{clip['time']}_{clip['variant']}" if clip["variant"] else clip["time"]
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class RawCatalog():
+    """
+        with RawCatalog(CATALOG_FILE) as catalog:
+            catalog.scan("label", label_root)
+            clips = catalog.select(key="_c_", camera="31", paired=True)
+    """
+    def __init__(self, catalog_file=CATALOG_FILE):
+        catalog_dir = os.path.dirname(catalog_file)
+        if catalog_dir:
+            os.makedirs(catalog_dir, exist_ok=True)
+        self.catalog_file = catalog_file
+        self.connection = sqlite3.connect(catalog_file)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def scan(self, kind, root):
+        """
+            root tree 를 한 번 돌아 kind(label / video) file 을 갱신 (root 밖의 같은 kind 기록은 그대로)
+            returns : 개수 {"added", "updated", "unchanged", "removed", "duplicates"}
+        """
+        root = os.path.abspath(root)
+        found, duplicates = scan_files(root, extensions=KINDS[kind])
+        for duplicate in duplicates:
+            print(f"warning : duplicated file name, skipped '{duplicate}'")
+        prefix = os.path.join(root, "")
+        known = {row["path"]: (row["size"], row["mtime_ns"]) for row in self.connection.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE kind = ? AND path LIKE ? ESCAPE '\\'",
+            (kind, _like_escape(prefix) + "%"))}
+        rows, unchanged = [], 0
+        for name, (path, stat) in found.items():
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                unchanged += 1
+                continue
+            clip = parse_clip_name(name)
+            rows.append((path, kind, name, os.path.splitext(name)[0], stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev,
+                         *(clip[field] for field in NAME_FIELDS)))
+        found_paths = set(path for path, _ in found.values())
+        removed = [(path,) for path in known if path not in found_paths]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+        added = sum(1 for row in rows if row[0] not in known)
+        return {"added": added, "updated": len(rows) - added, "unchanged": unchanged, "removed": len(removed),
+                "duplicates": len(duplicates)}
+
+    def select(self, key=None, camera=None, date=None, time=None, variant=None, set_name=None, paired=None):
+        """
+            조건에 맞는 clip (label / video 짝) 목록
+            - key : 이름에 들어가야 하는 문자열 (예: "_c_"), camera : C_1_31 또는 끝 번호만 (31)
+            - paired : True 면 짝이 있는 clip 만, False 면 짝이 없는 clip 만
+        """
+        conditions, params = [], []
+        if key:
+            conditions.append("stem LIKE ? ESCAPE '\\'")
+            params.append("%" + _like_escape(key) + "%")
+        if camera:
+            if "_" in camera:
+                conditions.append("camera = ?")
+                params.append(camera)
+            else:
+                conditions.append("camera LIKE ? ESCAPE '\\'")
+                params.append("%\\_" + _like_escape(camera))
+        for column, value in (("date", date), ("time", time), ("variant", variant), ("set_name", set_name)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        # 조건은 files 의 index (stem, camera) 로 먼저 거른 뒤 stem 으로 묶음
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        having = ""
+        if paired is True:
+            having = " HAVING label_path IS NOT NULL AND video_path IS NOT NULL"
+        elif paired is False:
+            having = " HAVING label_path IS NULL OR video_path IS NULL"
+        return [dict(row) for row in self.connection.execute(
+            f"SELECT {CLIP_COLUMNS} FROM files{where} GROUP BY stem{having} ORDER BY stem", params)]
+
+    def summary(self):
+        """ camera 별 clip 수 / 짝이 없는 수 / 크기 """
+        return [dict(row) for row in self.connection.execute(
+            "SELECT camera, COUNT(*) AS clips, "
+            "SUM(CASE WHEN label_path IS NULL OR video_path IS NULL THEN 1 ELSE 0 END) AS unpaired, "
+            "COUNT(DISTINCT date) AS dates, SUM(size) AS size FROM clips GROUP BY camera ORDER BY camera")]
+
+    def file_stats(self, clips, kind):
+        """ clip 목록의 kind file -> file_sync.sync_files 에 넘길 {file 이름: (경로, stat)} (scan 당시의 크기 / mtime) """
+        paths = [clip[f"{kind}_path"] for clip in clips if clip[f"{kind}_path"]]
+        found = {}
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            for row in self.connection.execute(
+                    f"SELECT path, name, size, mtime_ns, ino, dev FROM files WHERE path IN ({','.join('?' * len(chunk))})", chunk):
+                found[row["name"]] = (row["path"], CatalogStat(row["size"], row["mtime_ns"], row["ino"], row["dev"]))
+        return found
+
+def print_clips(clips):
+    for clip in clips:
+        pair = "paired" if clip["label_path"] and clip["video_path"] else ("label only" if clip["label_path"] else "video only")
+        print(f"{clip['stem']:<60} {clip['camera'] or '-':<10} {clip['date'] or '-':<6} {time_code(clip) or '-':<11} {pair}")
+    print(f"{len(clips)} clips")
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="catalog of the raw aihub label/video tree (sqlite)")
+    parser.add_argument("command", choices=COMMANDS,
+                        help="scan : tree 를 scan 해서 catalog 갱신 / select : 조건에 맞는 clip / unpaired : 짝이 없는 file / "
+                             "summary : camera 별 개수 / sync : 선택한 clip 을 raw_data 로 sync")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="sqlite catalog 경로")
+    parser.add_argument("--label-root", default=None, help="scan : 원본 label 폴더 (하위 폴더 전체)")
+    parser.add_argument("--video-root", default=None, help="scan : 원본 video 폴더 (하위 폴더 전체)")
+    parser.add_argument("--key", default=None, help="이름에 들어가야 하는 문자열 (예: _c_)")
+    parser.add_argument("--camera", default=None, help="camera (C_1_31 또는 끝 번호 31)")
+    parser.add_argument("--date", default=None, help="촬영 날짜 (예: 09-01)")
+    parser.add_argument("--time", default=None, help="시각 (예: 17-16-00)")
+    parser.add_argument("--variant", default=None, help="시각 뒤의 구분 문자 (예: b)")
+    parser.add_argument("--set", dest="set_name", default=None, help="set 이름 (예: set_DF2)")
+    parser.add_argument("--label-dest", default=LABEL_DEST, help="sync : label 을 모을 폴더")
+    parser.add_argument("--video-dest", default=VIDEO_DEST, help="sync : video 를 모을 폴더")
+    parser.add_argument("--mode", choices=SYNC_MODES, default="copy", help="sync : copy / hardlink / symlink / reflink")
+    parser.add_argument("--workers", type=int, default=4, help="sync : 병렬 복사 thread 수")
+    parser.add_argument("--dry-run", action="store_true", help="sync : 무엇을 할지 출력만 함")
+    parser.add_argument("--list", default=None, help="select : 선택한 clip 의 label / video 경로를 저장할 text file")
+    args = parser.parse_args()
+
+    with RawCatalog(args.catalog) as catalog:
+        filters = dict(key=args.key, camera=args.camera, date=args.date, time=args.time, variant=args.variant, set_name=args.set_name)
+        if args.command == "scan":
+            if args.label_root is None and args.video_root is None:
+                parser.error("scan needs --label-root and/or --video-root")
+            for kind, root in (("label", args.label_root), ("video", args.video_root)):
+                if root is not None:
+                    print(f"{kind}s scanned : {root} {catalog.scan(kind, root)}")
+        elif args.command == "select":
+            clips = catalog.select(**filters, paired=True)
+            print_clips(clips)
+            if args.list:
+                with open(args.list, "w", encoding="utf-8") as file:
+                    file.writelines(f"{clip['label_path']}\n{clip['video_path']}\n" for clip in clips)
+                print(f"clip list saved : {args.list}")
+        elif args.command == "unpaired":
+            print_clips(catalog.select(**filters, paired=False))
+        elif args.command == "summary":
+            print(f"{'camera':<10} {'clips':>7} {'unpaired':>9} {'dates':>6} {'size (GB)':>10}")
+            for row in catalog.summary():
+                print(f"{row['camera'] or '-':<10} {row['clips']:>7} {row['unpaired']:>9} {row['dates']:>6} {row['size'] / 2**30:>10.2f}")
+        elif args.command == "sync":
+            # 짝이 있는 clip 만 sync (scan 이후에 바뀐 원본은 다시 scan 해야 반영됨)
+            clips = catalog.select(**filters, paired=True)
+            print(f"{len(clips)} clips selected")
+            for kind, dest in (("label", args.label_dest), ("video", args.video_dest)):
+                counts = sync_files(catalog.file_stats(clips, kind), dest, mode=args.mode, workers=args.workers,
+                                    dry_run=args.dry_run, source=f"catalog {kind}s")
+                print(f"{kind.capitalize()}s synced : {counts}")
@@ -0,0 +1,161 @@
+"""
+    extraction pipeline 의 stage 별 시간 / 개수 측정과 실행 보고서
+    - RunStats : video(label file) 하나의 stage 별 초 (parse, filter, decode, encode, write, csv) 와 개수 (frames, images, bytes ..)
+      (dict 로 바꿔 process pool worker 에서 main process 로 넘김)
+    - encode, write 는 image_writer worker 에서 잰 시간의 합이므로 decode 와 겹쳐 있음 (submit_wait : worker 를 기다린 시간)
+    - ProgressReporter : video 가 끝날 때마다 진행률, fps, ETA 출력
+    - write_run_report : video 별 / 전체 결과를 json 으로 저장
+    - profile_call : video 하나의 처리를 cProfile 로 실행해 .prof 로 저장 (python -m pstats <file> 로 확인)
+"""
+
+import os
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+
+STAGES = ("parse", "filter", "decode", "encode", "write", "submit_wait", "csv")
+
+def _format_seconds(seconds):
+    seconds = int(seconds)
+    return f"{seconds//3600:02d}:{seconds//60%60:02d}:{seconds%60:02d}"
+
+class RunStats():
+    """
+        stats = RunStats(name)
+        with stats.stage("parse"):
+            ...
+        for frame_num, frame in stats.timed(iter_event_frames(..), "decode"):
+            ...
+        stats.count("frames")
+    """
+    def __init__(self, name=None):
+        self.name = name
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.counts = {}
+        self._started = time.perf_counter()
+        self.wall_seconds = None
+
+    @contextmanager
+    def stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(stage, time.perf_counter() - start)
+
+    def add_seconds(self, stage, seconds):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def timed(self, iterable, stage):
+        # iterator 의 next() 에 걸린 시간만 stage 에 더함 (loop body 시간은 제외)
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_seconds(stage, time.perf_counter() - start)
+                return
+            self.add_seconds(stage, time.perf_counter() - start)
+            yield item
+
+    def add_writer(self, image_writer):
+        # ImageWriterPool 이 모은 encode / write / 대기 시간과 저장 image 수, byte 수
+        for stage in ("encode", "write", "submit_wait"):
+            self.add_seconds(stage, image_writer.seconds[stage])
+        self.count("images_written", image_writer.images_written)
+        self.count("bytes_written", image_writer.bytes_written)
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+        return self
+
+    def to_dict(self):
+        wall_seconds = self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self._started
+        frames = self.counts.get("frames", 0)
+        return {
+            "name": self.name,
+            "wall_s": wall_seconds,
+            "frames_per_s": frames / wall_seconds if wall_seconds > 0 else 0.0,
+            "stages_s": dict(self.seconds),
+            "counts": dict(self.counts)
+        }
+
+class ProgressReporter():
+    """ 끝난 video 수 기준의 진행률 / ETA (video 길이가 비슷하다고 가정) """
+    def __init__(self, total_count, title="videos"):
+        self.total_count = total_count
+        self.title = title
+        self.done_count = 0
+        self.frames = 0
+        self._started = time.perf_counter()
+
+    def update(self, name, succeeded, stats=None):
+        self.done_count += 1
+        if stats is not None:
+            self.frames += stats["counts"].get("frames", 0)
+        elapsed = time.perf_counter() - self._started
+        eta = elapsed / self.done_count * (self.total_count - self.done_count)
+        state = "done" if succeeded else "FAILED"
+        video_fps = f", {stats['frames_per_s']:.1f} fps" if stats is not None else ""
+        print(f"[{self.done_count}/{self.total_count} {self.title}] {state} : {name}{video_fps} "
+              f"| total {self.frames / elapsed if elapsed > 0 else 0.0:.1f} fps, elapsed {_format_seconds(elapsed)}, ETA {_format_seconds(eta)}")
+
+def aggregate_stats(video_stats):
+    stages_s, counts = dict.fromkeys(STAGES, 0.0), {}
+    for stats in video_stats:
+        for stage, seconds in stats["stages_s"].items():
+            stages_s[stage] = stages_s.get(stage, 0.0) + seconds
+        for name, amount in stats["counts"].items():
+            counts[name] = counts.get(name, 0) + amount
+    return stages_s, counts
+
+def write_run_report(report_file, video_stats, failures, skipped_count, wall_seconds, extra_stages=None, params=None):
+    """
+        video_stats : 처리한 video 들의 RunStats.to_dict() 목록
+        failures : [(label_file, error message)], skipped_count : build manifest 로 건너뛴 video 수
+        extra_stages : video 단위가 아닌 stage 시간 (예: {"csv": 0.3})
+    """
+    stages_s, counts = aggregate_stats(video_stats)
+    for stage, seconds in (extra_stages or {}).items():
+        stages_s[stage] = stages_s.get(stage, 0.0) + seconds
+    frames = counts.get("frames", 0)
+    report = {
+        "params": params or {},
+        "aggregate": {
+            "videos_processed": len(video_stats),
+            "videos_skipped": skipped_count,
+            "videos_failed": len(failures),
+            "wall_s": wall_seconds,
+            "frames_per_s": frames / wall_seconds if wall_seconds > 0 else 0.0,
+            "stages_s": stages_s,
+            "counts": counts
+        },
+        "videos": video_stats,
+        "failures": [{"label_file": label_file, "error": message.splitlines()[0] if message else ""}
+                     for label_file, message in failures]
+    }
+    report_dir = os.path.dirname(report_file)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"run report saved! : {report_file} ({len(video_stats)} processed, {skipped_count} skipped, {len(failures)} failed, "
+          f"{report['aggregate']['frames_per_s']:.1f} fps)")
+    return report
+
+def profile_file_for(profile_dir, label_file):
+    return os.path.join(profile_dir, os.path.splitext(os.path.basename(label_file))[0] + ".prof")
+
+def profile_call(profile_file, func, *args, **kwargs):
+    """ func(*args, **kwargs) 를 cProfile 로 실행하고 결과를 profile_file 에 저장 """
+    os.makedirs(os.path.dirname(profile_file) or ".", exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_file)
@@ -0,0 +1,133 @@
+"""
+    image / label file 들을 낱개 file 대신 tar shard 로 묶어 저장 (WebDataset 형식)
+    - 같은 key (확장자를 뺀 이름, 예: 171600b_168.png / 171600b_168.txt) 의 file 은 같은 shard 에 연속으로 저장
+    - shard 크기가 max_shard_bytes 를 넘으면 다음 key 부터 새 shard 에 저장
+    - video(label file) 마다 <prefix>-000000.tar .. 와 <prefix>.index.csv (member_name, shard, offset, size) 를 만듦
+      (video 단위로 만들어야 process pool worker 와 build manifest 가 그대로 동작함)
+    - merge_shard_indexes : video 별 index 를 합쳐 전체 index.csv 생성
+    - ShardIndex : index.csv 로 member 의 shard / offset 을 찾아 tar 를 풀지 않고 바로 읽음
+"""
+
+import os
+import io
+import csv
+import time
+import tarfile
+
+OUTPUT_MODES = ("files", "shards")
+SHARD_MAX_BYTES = 1 << 30
+SHARD_INDEX_NAME = "index.csv"
+INDEX_FIELDS = ["member_name", "shard", "offset", "size"]
+
+def member_key(member_name):
+    # WebDataset 과 같이 첫 '.' 앞부분을 key 로 사용
+    return member_name.split(".", 1)[0]
+
+class TarShardWriter():
+    """
+        shard_writer = TarShardWriter("processed_data/shards/", "C_1_31_jap_cl_09-01_17-16-00_b_set_DF2")
+        shard_writer.write("171600b_168.png", png_bytes)
+        output_files = shard_writer.close()   # shard file 들 + index file
+    """
+    def __init__(self, shard_dir, prefix, max_shard_bytes=SHARD_MAX_BYTES):
+        self.shard_dir = shard_dir
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        self.index_file = os.path.join(shard_dir, prefix + ".index.csv")
+        self.shard_files = []
+        self.index = []
+        self._file = None
+        self._tar = None
+        self._last_key = None
+        os.makedirs(shard_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_shard(self):
+        self._close_shard()
+        shard_file = os.path.join(self.shard_dir, f"{self.prefix}-{len(self.shard_files):06d}.tar")
+        self._file = open(shard_file, "wb")
+        self._tar = tarfile.open(fileobj=self._file, mode="w", format=tarfile.GNU_FORMAT)
+        self.shard_files.append(shard_file)
+
+    def _close_shard(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._file.close()
+            self._tar, self._file = None, None
+
+    def write(self, name, data):
+        """ name : member 이름 (경로가 붙어 있으면 basename 만 사용), data : file 내용 (bytes) """
+        member_name = os.path.basename(name)
+        key = member_key(member_name)
+        if self._tar is None or (key != self._last_key and self._tar.offset >= self.max_shard_bytes):
+            self._next_shard()
+        info = tarfile.TarInfo(member_name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+        # addfile 후 offset 은 512 byte 단위로 채운 data 끝이므로, data 시작 위치를 거꾸로 계산
+        data_offset = self._tar.offset - (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+        self.index.append([member_name, os.path.basename(self.shard_files[-1]), data_offset, len(data)])
+        self._last_key = key
+
+    def close(self):
+        """ returns : 만든 file 목록 (shard file 들 + index file) """
+        self._close_shard()
+        with open(self.index_file, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(INDEX_FIELDS)
+            writer.writerows(self.index)
+        return self.shard_files + [self.index_file]
+
+def shard_index_file(shard_dir, prefix):
+    return os.path.join(shard_dir, prefix + ".index.csv")
+
+def merge_shard_indexes(index_files, output_index_file):
+    """ video 별 index file 들을 주어진 순서대로 합침. returns : member 수 """
+    member_count = 0
+    temp_file = output_index_file + ".tmp"
+    with open(temp_file, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(INDEX_FIELDS)
+        for index_file in index_files:
+            with open(index_file, newline="") as file:
+                reader = csv.reader(file)
+                next(reader, None)
+                for row in reader:
+                    writer.writerow(row)
+                    member_count += 1
+    os.replace(temp_file, output_index_file)
+    print(f"shard index saved! : {output_index_file} ({member_count} members)")
+    return member_count
+
+class ShardIndex():
+    """
+        shard_index = ShardIndex("processed_data/shards/index.csv")
+        png_bytes = shard_index.read("171600b_168.png")
+    """
+    def __init__(self, index_file):
+        self.shard_dir = os.path.dirname(index_file)
+        self.members = {}
+        with open(index_file, newline="") as file:
+            for row in csv.DictReader(file):
+                self.members[row["member_name"]] = (row["shard"], int(row["offset"]), int(row["size"]))
+
+    def __contains__(self, member_name):
+        return member_name in self.members
+
+    def __len__(self):
+        return len(self.members)
+
+    def names(self):
+        return self.members.keys()
+
+    def read(self, member_name):
+        shard, offset, size = self.members[member_name]
+        with open(os.path.join(self.shard_dir, shard), "rb") as file:
+            file.seek(offset)
+            return file.read(size)
@@ -0,0 +1,23 @@
+"""
+    공용 fixture : benchmarks/synth_data.py 로 만든 작은 가짜 video
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from synth_data import make_aihub_dataset
+
+SYNTH_FRAMES = 120
+
+@pytest.fixture(scope="session")
+def synth_video(tmp_path_factory):
+    """ 160x96, SYNTH_FRAMES frame 의 video 하나. returns : video 경로 """
+    root = str(tmp_path_factory.mktemp("synth_aihub"))
+    video_name = make_aihub_dataset(root, video_count=1, frame_count=SYNTH_FRAMES, width=160, height=96)[0]
+    return os.path.join(root, "raw_data/video", video_name)
@@ -0,0 +1,45 @@
+"""
+    annotation.csv -> .npy / .index.npy 변환과 AnnotationTable 의 image_name 조회 확인
+"""
+
+import os
+import csv
+
+from annotation_columnar import AnnotationTable, columnar_files, csv_to_npy
+from annotation_writer import ANNOTATION_FIELDS
+
+def make_row(image_name, label_name, bbox_x):
+    return {"label_name": label_name, "bbox_x": bbox_x, "bbox_y": 2, "bbox_width": 3.5, "bbox_height": 4,
+            "image_name": image_name, "image_width": 160, "image_height": 96}
+
+def test_rows_grouped_by_image(tmp_path):
+    # 같은 image 의 row 가 떨어져 있어도 image 별로 모이고, image 안의 순서는 유지됨
+    rows = [make_row("b_2.png", "smoking", 10), make_row("a_1.png", "smoking", 20),
+            make_row("b_2.png", "person", 30), make_row("c_10.png", "smoking", 40.5)]
+    annotation_file = str(tmp_path / "annotation.csv")
+    with open(annotation_file, "w", newline='') as annfile:
+        writer = csv.DictWriter(annfile, fieldnames=ANNOTATION_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    csv_to_npy(annotation_file)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    table = AnnotationTable(annotation_file)
+    assert len(table) == len(rows)
+    assert list(table.image_names()) == ["a_1.png", "b_2.png", "c_10.png"]
+    assert table.rows_for("b_2.png")["label_name"].tolist() == ["smoking", "person"]
+    assert table.rows_for("b_2.png")["bbox_x"].tolist() == [10.0, 30.0]
+    assert table.rows_for("c_10.png")["bbox_x"].tolist() == [40.5]
+    assert table.rows["bbox_y"].dtype.kind == "i" and table.rows["bbox_width"].dtype.kind == "f"
+    for image_name in ("a_0.png", "b_2.png.png", "zzz.png", ""):
+        assert table.row_range(image_name) is None
+        assert len(table.rows_for(image_name)) == 0
+
+def test_empty_annotation(tmp_path):
+    annotation_file = str(tmp_path / "annotation.csv")
+    with open(annotation_file, "w", newline='') as annfile:
+        csv.DictWriter(annfile, fieldnames=ANNOTATION_FIELDS).writeheader()
+    csv_to_npy(annotation_file)
+    assert all(os.path.exists(npy_file) for npy_file in columnar_files(annotation_file))
+    table = AnnotationTable(annotation_file)
+    assert len(table) == 0 and table.row_range("a_1.png") is None
@@ -0,0 +1,51 @@
+"""
+    dataset_validator.check_annotation : index 에 저장한 block 결과를 다시 써도 cache 없이 검사한 것과 같은 결과
+"""
+
+import csv
+
+from annotation_writer import ANNOTATION_FIELDS
+from dataset_validator import ValidationIndex, ValidationReport, check_annotation
+
+def write_rows(annotation_file, rows):
+    with open(annotation_file, "w", newline='') as annfile:
+        writer = csv.DictWriter(annfile, fieldnames=ANNOTATION_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def make_rows(count):
+    return [{"label_name": "smoking", "bbox_x": idx % 50, "bbox_y": 10, "bbox_width": 20, "bbox_height": 30,
+             "image_name": f"v{idx // 100}_{idx % 100 + 1}.png", "image_width": 160, "image_height": 96} for idx in range(count)]
+
+def check(annotation_file, index=None):
+    report = ValidationReport()
+    names = check_annotation(report, annotation_file, None, index)
+    return report.to_dict(), names
+
+def test_cached_blocks_match_full_check(tmp_path):
+    annotation_file, index_file = str(tmp_path / "annotation.csv"), str(tmp_path / "index.json")
+    rows = make_rows(5000)
+    rows[10]["bbox_width"] = 0
+    rows[3000]["image_width"] = "x"
+    rows.insert(4000, dict(rows[20]))  # 앞쪽 block 의 row 와 중복
+    write_rows(annotation_file, rows)
+    with ValidationIndex(index_file) as index:
+        first = check(annotation_file, index)
+    assert first == check(annotation_file)
+    assert len(index.entries["annotation_blocks"]) > 1
+    problems = first[0]["problems"]
+    assert problems["duplicate rows"] == ["line 4002 : v0_21.png (same row as line 22)"]
+    assert problems["non-positive boxes"][0].startswith("line 12 : ")
+    assert problems["invalid rows"][0].startswith("line 3002 : ")
+
+    # 중간 row 수정 + 추가 : 바뀐 block 만 다시 parse 해도 전체 검사와 같음
+    rows[2500]["image_height"] = 50
+    rows.insert(100, dict(rows[100]))
+    rows.extend(make_rows(300))
+    write_rows(annotation_file, rows)
+    with ValidationIndex(index_file) as index:
+        cached_blocks = set(index.entries["annotation_blocks"])
+        edited = check(annotation_file, index)
+    assert edited == check(annotation_file)
+    assert cached_blocks & set(index.entries["annotation_blocks"])
+    assert edited[0]["counts"]["annotation rows"] == len(rows)
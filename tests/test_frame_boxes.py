@@ -0,0 +1,21 @@
+"""
+    FrameBoxes : frame 번호 -> boxes 조회 (memory 는 frame 번호 크기가 아니라 box 수에 비례)
+"""
+
+from frame_boxes import FrameBoxes
+
+def test_boxes_by_frame():
+    frame_boxes = FrameBoxes.from_pairs([[5, [1, 2, 3, 4]], [3, [0, 0, 1, 1]], [5, [9, 9, 9, 9]]])
+    assert frame_boxes.boxes(5).tolist() == [[1, 2, 3, 4], [9, 9, 9, 9]]  # 같은 frame 안에서는 입력 순서
+    assert frame_boxes.boxes(3).tolist() == [[0, 0, 1, 1]]
+    for frame_num in (-1, 0, 4, 6):
+        assert frame_boxes.boxes(frame_num).shape == (0, 4)
+    assert 5 in frame_boxes and 4 not in frame_boxes
+    assert list(frame_boxes) == [(3, [0, 0, 1, 1]), (5, [1, 2, 3, 4]), (5, [9, 9, 9, 9])]
+
+def test_huge_frame_number():
+    # 잘못된 큰 cur_frame 이 있어도 frame 번호 크기의 table 을 만들지 않음
+    frame_boxes = FrameBoxes.from_pairs([[10, [1, 1, 1, 1]], [10**12, [2, 2, 2, 2]]])
+    assert frame_boxes.nbytes() < 1024
+    assert frame_boxes.boxes(10**12).tolist() == [[2, 2, 2, 2]]
+    assert frame_boxes.boxes(10**12 + 1).shape == (0, 4)
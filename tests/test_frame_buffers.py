@@ -0,0 +1,72 @@
+"""
+    FrameBufferRing : release 된 slot 만 다시 쓰는지, decode loop 가 frame 마다 배열을 새로 할당하지 않는지 확인
+"""
+
+import numpy as np
+import pytest
+
+from conftest import SYNTH_FRAMES
+from image_writer import ImageWriterPool
+from video_frames import FrameBufferRing, FrameReader
+
+class DiscardSink():
+    """ encoding 결과를 저장하지 않는 ImageWriterPool sink """
+    def write(self, name, data):
+        pass
+
+def decode_into(ring, buffer, value):
+    """ cap.read(buffer) 처럼 buffer 가 있으면 그대로, 없으면 새 배열에 씀 """
+    frame = buffer if buffer is not None else np.empty(4, dtype=np.uint8)
+    frame[...] = value
+    ring.store(buffer, frame)
+    return frame
+
+def test_held_slot_is_not_handed_out():
+    ring = FrameBufferRing(2)
+    first = decode_into(ring, ring.acquire(), 1)
+    release_first = ring.retain()
+    second = decode_into(ring, ring.acquire(), 2)
+    assert second is not first
+
+    # first 는 아직 hold 중, second 는 다음 decode 에서 decode loop 의 hold 가 풀림
+    assert ring.acquire() is second
+    third = decode_into(ring, second, 3)
+    assert first[0] == 1 and third is second
+
+    release_first()
+    assert ring.acquire() is first
+    assert ring.allocations == 2
+
+def test_full_ring_decodes_outside():
+    ring = FrameBufferRing(1)
+    decode_into(ring, ring.acquire(), 1)
+    release = ring.retain()
+    outside = decode_into(ring, ring.acquire(), 2)
+    assert outside is not ring.buffers[0]
+    # ring 밖의 frame 은 release 할 것이 없음
+    ring.retain()()
+    release()
+    assert ring.acquire() is ring.buffers[0]
+
+@pytest.mark.parametrize("encode_workers, encode_mode", [(0, "thread"), (2, "thread"), (2, "process")])
+@pytest.mark.parametrize("extract_mode", ["seek", "full"])
+def test_allocations_within_ring(synth_video, extract_mode, encode_workers, encode_mode):
+    with ImageWriterPool(encode_workers, encode_mode, sink=DiscardSink()) as image_writer, \
+         FrameReader(synth_video, [[1, SYNTH_FRAMES]], extract_mode, image_writer.max_pending + 2) as reader:
+        for cur_frame_num, frame in reader:
+            image_writer.submit(f"{cur_frame_num}.jpg", frame, release=reader.retain())
+    assert reader.frames == SYNTH_FRAMES
+    assert reader.buffers.allocations <= reader.buffers.size
+    # encoder 가 모두 release 했으므로 decode loop 의 마지막 hold 만 남음
+    assert sum(reader.buffers.holds) <= 1
+
+def test_buffers_do_not_change_frames(synth_video):
+    """ 반환한 frame 을 retain 하고 있는 동안에는 다음 decode 가 덮어쓰지 않음 """
+    retained = []
+    with FrameReader(synth_video, [[10, 40]], "seek", buffer_count=4) as reader:
+        for cur_frame_num, frame in reader:
+            retained.append((frame, frame.copy(), reader.retain()))
+            if len(retained) > 2:
+                kept, copied, release = retained.pop(0)
+                assert np.array_equal(kept, copied)
+                release()
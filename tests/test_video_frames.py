@@ -0,0 +1,52 @@
+"""
+    seek 추출이 full 추출과 같은 frame (번호, pixel) 을 반환하는지 확인 (aihub_to_*.py 의 --check-seek 과 같은 비교)
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import SYNTH_FRAMES
+from video_frames import SEEK_MIN_GAP, FrameIntervals, iter_event_frames_full, iter_event_frames_seek, merge_frame_ranges
+
+def read_frames(video_file, event_frames, extract_mode, min_gap=SEEK_MIN_GAP):
+    cap = cv2.VideoCapture(video_file)
+    try:
+        if extract_mode == "seek":
+            frames = iter_event_frames_seek(cap, event_frames, min_gap)
+        else:
+            frames = iter_event_frames_full(cap, event_frames)
+        return [(cur_frame_num, frame.copy()) for cur_frame_num, frame in frames]
+    finally:
+        cap.release()
+
+EVENT_FRAMES = {
+    "overlapping": [[30, 45], [10, 20], [15, 32], [80, 90]],
+    "touching": [[10, 20], [21, 25]],
+    "single_frames": [[1, 1], [5, 5], [40, 40], [41, 41], [100, 100]],
+    "far_apart": [[2, 4], [70, 72], [115, 116]],
+    "past_eof": [[110, SYNTH_FRAMES + 50]],
+    "only_past_eof": [[SYNTH_FRAMES + 10, SYNTH_FRAMES + 20]],
+    "empty": [],
+}
+
+def expected_frame_nums(event_frames):
+    return [frame_num for start, end in merge_frame_ranges(event_frames)
+            for frame_num in range(start, min(end, SYNTH_FRAMES) + 1)]
+
+@pytest.mark.parametrize("name", list(EVENT_FRAMES))
+@pytest.mark.parametrize("min_gap", [SEEK_MIN_GAP, 0])  # 0 : 가까운 범위도 grab 대신 seek
+def test_seek_matches_full(synth_video, name, min_gap):
+    event_frames = EVENT_FRAMES[name]
+    seek_frames = read_frames(synth_video, event_frames, "seek", min_gap)
+    full_frames = read_frames(synth_video, event_frames, "full")
+
+    assert [frame_num for frame_num, _ in full_frames] == expected_frame_nums(event_frames)
+    assert [frame_num for frame_num, _ in seek_frames] == [frame_num for frame_num, _ in full_frames]
+    for (frame_num, seek_frame), (_, full_frame) in zip(seek_frames, full_frames):
+        assert np.array_equal(seek_frame, full_frame), f"pixels of frame {frame_num}"
+
+def test_seek_accepts_frame_intervals(synth_video):
+    event_frames = EVENT_FRAMES["overlapping"]
+    assert ([frame_num for frame_num, _ in read_frames(synth_video, FrameIntervals(event_frames), "seek")]
+            == expected_frame_nums(event_frames))
@@ -0,0 +1,44 @@
+"""
+    --shard i/N 실행 : --dry-run 의 예상 저장 frame 수가 실제 실행과 같은지 확인 (--budget 의 frame plan 은 전체 label 로 정함)
+"""
+
+import os
+import re
+import glob
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT_DIR
+from synth_data import make_aihub_dataset
+from work_shards import select_shard
+
+YOLOV8TXT_SCRIPT = os.path.join(ROOT_DIR, "aihub_to_yolo", "aihub_to_yolov8txt.py")
+
+@pytest.fixture(scope="module")
+def synth_dataset(tmp_path_factory):
+    """ 작은 video 6 개의 AIHub 형식 dataset. returns : dataset 폴더 (raw_data/, processed_data/ 의 상위) """
+    root = str(tmp_path_factory.mktemp("synth_shards"))
+    make_aihub_dataset(root, video_count=6, frame_count=90, width=160, height=96)
+    return root
+
+def run_yolov8txt(root, *args):
+    result = subprocess.run([sys.executable, YOLOV8TXT_SCRIPT, "--encode-workers", "0", *args],
+                            cwd=root, capture_output=True, text=True, check=True)
+    return result.stdout
+
+@pytest.mark.parametrize("shard", ["0/2", "1/2"])
+def test_dry_run_matches_sharded_run(synth_dataset, shard):
+    label_files = sorted(glob.glob(os.path.join(synth_dataset, "raw_data/label/*.json")))
+    shard_labels = select_shard(label_files, tuple(map(int, shard.split("/"))))
+    assert 0 < len(shard_labels) < len(label_files)
+
+    dry_run = run_yolov8txt(synth_dataset, "--shard", shard, "--budget", "30", "--dry-run")
+    planned = int(re.search(r"# frames : .*, (\d+) written", dry_run).group(1))
+
+    run_yolov8txt(synth_dataset, "--shard", shard, "--budget", "30")
+    names = [os.path.splitext(os.path.basename(f))[0] for f in shard_labels]
+    written = [image for image in os.listdir(os.path.join(synth_dataset, "processed_data/images"))
+               if image.rsplit("_", 1)[0] in names]
+    assert planned == len(written)
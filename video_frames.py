@@ -0,0 +1,300 @@
+"""
+    video 에서 event 범위(event_frames)에 해당하는 frame 들을 읽어오는 공용 모듈
+    - full : 기존 방식. frame 0부터 순서대로 모든 frame 을 grab 하며, event 범위 frame 만 retrieve(decode 결과 변환) 하여 반환
+    - seek : 각 event 범위 직전으로 이동(seek)한 뒤 범위 안의 frame 만 decode 하여 반환
+    - frame 번호는 기존 코드와 같이 read 직후의 CAP_PROP_POS_FRAMES 값 (1부터 시작)
+    - event 범위 membership 은 병합/정렬된 interval index(FrameIntervals)로 O(log n) 에 확인
+    - buffers(FrameBufferRing) 를 주면 frame 을 미리 할당한 ndarray 에 decode (frame 마다 새 배열을 할당하지 않음)
+"""
+
+import threading
+from bisect import bisect_right
+from functools import partial
+
+import cv2
+import numpy as np
+
+EXTRACT_MODES = ("seek", "full")
+# 다음 event 범위까지 남은 frame 수가 이보다 적으면 seek 대신 grab 으로 건너뜀
+SEEK_MIN_GAP = 30
+
+# event frame ranges 
+
+def merge_frame_ranges(frame_ranges):
+    """
+        [[start, end], ...] (양 끝 포함) 범위들을 정렬하고, 겹치거나 맞닿은 범위는 하나로 병합
+        예 : [[100, 140], [300, 330], [120, 150]] -> [[100, 150], [300, 330]]
+    """
+    merged = []
+    for start, end in sorted(frame_ranges):
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+class FrameIntervals():
+    """
+        병합/정렬된 event 범위에 대한 interval index
+        - frame_num in intervals : O(log n) membership 확인
+        - next_wanted(frame_num) : frame_num 이후 처음으로 필요한 frame 번호 (없으면 None)
+    """
+    def __init__(self, frame_ranges):
+        merged = merge_frame_ranges(frame_ranges)
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def __contains__(self, frame_num):
+        idx = bisect_right(self.starts, frame_num) - 1
+        return idx >= 0 and frame_num <= self.ends[idx]
+
+    def __iter__(self):
+        return (list(frame_range) for frame_range in zip(self.starts, self.ends))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def next_wanted(self, frame_num):
+        idx = bisect_right(self.starts, frame_num) - 1
+        if idx >= 0 and frame_num <= self.ends[idx]:
+            return frame_num
+        if idx + 1 < len(self.starts):
+            return self.starts[idx + 1]
+        return None
+
+    @property
+    def last_frame(self):
+        return self.ends[-1] if self.ends else None
+
+    def frame_count(self):
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+def as_frame_intervals(event_frames):
+    if isinstance(event_frames, FrameIntervals):
+        return event_frames
+    return FrameIntervals(event_frames)
+
+# frame buffers 
+
+def _no_release():
+    pass
+
+class FrameBufferRing():
+    """
+        decode 결과를 받을 ndarray 들을 돌려 씀 (cap.read(buffer) / cap.retrieve(buffer) 는 크기가 맞으면 buffer 에 그대로 씀)
+        - slot 마다 hold 수를 셈. 마지막으로 decode 한 frame 은 다음 decode 까지 decode loop 가 hold 하고,
+          그 뒤에도 frame 을 쓰는 곳 (ImageWriterPool 의 encoding 등) 은 retain() 으로 hold 한 뒤 받은 release 함수를 호출
+        - acquire 는 hold 가 없는 (release 된) slot 만 넘겨줌. 없으면 OpenCV 가 새로 할당한 배열을 ring 에 추가 (최대 size 개),
+          ring 이 가득 찼으면 ring 밖의 배열에 decode (ImageWriterPool 은 max_pending + 2 개면 충분)
+        - release 는 encoder worker thread 에서도 호출되므로 lock 으로 보호
+        - allocations : 새 배열이 할당된 횟수. 처음 몇 frame 이후에는 늘지 않아야 함
+    """
+    def __init__(self, size=4):
+        self.size = size
+        self.buffers = []
+        self.holds = []
+        self.allocations = 0
+        self._next = 0
+        self._current = None  # decode loop 가 hold 중인 slot (마지막으로 decode 한 frame, ring 밖이면 None)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ decode loop 의 이전 hold 를 놓고, 다음 decode 에 사용할 buffer 를 hold (release 된 slot 이 없으면 None : OpenCV 가 새로 할당) """
+        with self._lock:
+            if self._current is not None:
+                self.holds[self._current] -= 1
+                self._current = None
+            for offset in range(len(self.buffers)):
+                idx = (self._next + offset) % len(self.buffers)
+                if self.holds[idx] == 0:
+                    self._next = (idx + 1) % len(self.buffers)
+                    self.holds[idx] = 1
+                    self._current = idx
+                    return self.buffers[idx]
+        return None
+
+    def store(self, buffer, frame):
+        """ decode 결과(frame) 가 buffer 가 아니면 (새로 할당됨) ring 에 넣음 """
+        if frame is buffer:
+            return
+        with self._lock:
+            self.allocations += 1
+            if buffer is not None:
+                # frame 크기가 바뀌어 buffer 를 쓰지 못함 : 같은 slot 을 새 배열로 교체 (hold 는 decode loop 만 가지고 있음)
+                self.buffers[self._current] = frame
+            elif len(self.buffers) < self.size:
+                self.buffers.append(frame)
+                self.holds.append(1)
+                self._current = len(self.buffers) - 1
+
+    def retain(self):
+        """ 마지막으로 decode 한 frame 을 다음 decode 이후에도 쓰기 위해 hold. returns : 다 쓴 뒤 한 번 호출할 release 함수 """
+        with self._lock:
+            if self._current is None:
+                # ring 밖에 할당된 frame 은 다시 쓰지 않으므로 release 할 것이 없음
+                return _no_release
+            self.holds[self._current] += 1
+            return partial(self.release, self._current)
+
+    def release(self, idx):
+        with self._lock:
+            self.holds[idx] -= 1
+
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers)
+
+def _read(cap, buffers):
+    if buffers is None:
+        return cap.read()
+    buffer = buffers.acquire()
+    ret, frame = cap.read(buffer) if buffer is not None else cap.read()
+    if ret:
+        buffers.store(buffer, frame)
+    return ret, frame
+
+def _retrieve(cap, buffers):
+    if buffers is None:
+        return cap.retrieve()
+    buffer = buffers.acquire()
+    ret, frame = cap.retrieve(buffer) if buffer is not None else cap.retrieve()
+    if ret:
+        buffers.store(buffer, frame)
+    return ret, frame
+
+# frame iterators 
+
+def _cur_frame_num(cap):
+    return int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+def iter_event_frames_full(cap, event_frames, buffers=None):
+    intervals = as_frame_intervals(event_frames)
+    last_frame = intervals.last_frame
+    if last_frame is None:
+        return
+    while True:
+        # read = grab + retrieve : 필요 없는 frame 은 retrieve 하지 않음 
+        if not cap.grab():
+            break
+        cur_frame_num = _cur_frame_num(cap)
+        if cur_frame_num in intervals:
+            ret, frame = _retrieve(cap, buffers)
+            if not ret:
+                break
+            yield cur_frame_num, frame
+        # 마지막 event 이후는 읽지 않음 
+        if cur_frame_num >= last_frame:
+            break
+
+def _skip_to(cap, target_pos, min_gap=SEEK_MIN_GAP):
+    """
+        다음 read 가 (target_pos+1)번 frame 을 반환하도록 cap 위치를 target_pos 로 맞춤
+        - seek 후 backend 가 보고하는 위치가 target 을 넘어가면 처음으로 되돌린 뒤 grab 으로 이동
+    """
+    pos = _cur_frame_num(cap)
+    if target_pos - pos > min_gap:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target_pos)
+        pos = _cur_frame_num(cap)
+        if pos > target_pos:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            pos = _cur_frame_num(cap)
+    while pos < target_pos:
+        if not cap.grab():
+            return False
+        pos = _cur_frame_num(cap)
+    return True
+
+def iter_event_frames_seek(cap, event_frames, min_gap=SEEK_MIN_GAP, buffers=None):
+    intervals = as_frame_intervals(event_frames)
+    while True:
+        next_frame_num = intervals.next_wanted(_cur_frame_num(cap) + 1)
+        if next_frame_num is None:
+            return
+        if not _skip_to(cap, next_frame_num - 1, min_gap):
+            return
+        ret, frame = _read(cap, buffers)
+        if not ret:
+            return
+        yield _cur_frame_num(cap), frame
+
+def frames_as_intervals(frame_nums):
+    """ 저장할 frame 번호 목록 (frame sampling plan) -> FrameIntervals (이어진 번호는 한 범위로 병합) """
+    return FrameIntervals([[frame_num, frame_num] for frame_num in frame_nums])
+
+def iter_event_frames(cap, event_frames, extract_mode="seek", buffers=None):
+    """ buffers : FrameBufferRing (반환한 frame 은 다음 decode 에 다시 쓰일 수 있으므로, 계속 쓰려면 buffers.retain() 또는 copy) """
+    if extract_mode == "seek":
+        return iter_event_frames_seek(cap, event_frames, buffers=buffers)
+    elif extract_mode == "full":
+        return iter_event_frames_full(cap, event_frames, buffers)
+    else:
+        raise ValueError(f"unknown extract mode '{extract_mode}' (choose from {EXTRACT_MODES})")
+
+class FrameReader():
+    """
+        video 하나의 event 범위 frame 을 FrameBufferRing 에 decode 하는 reader
+        with FrameReader(video_file, event_frames, "seek", buffer_count=image_writer.max_pending + 2) as reader:
+            for cur_frame_num, frame in reader:
+                image_writer.submit(prefix + f"{cur_frame_num}.png", frame, release=reader.retain())
+        - 반환한 frame 은 다음 decode 에 다시 쓰임. 그 뒤에도 쓰려면 retain() 으로 받은 release 함수를 다 쓴 뒤 호출
+          (ImageWriterPool.submit 의 release 는 encoding 이 끝나면 호출됨)
+        - reader.frames : 반환한 frame 수, reader.buffers.allocations : frame 배열을 새로 할당한 횟수
+    """
+    def __init__(self, video_file, event_frames, extract_mode="seek", buffer_count=4):
+        self.video_file = video_file
+        self.cap = cv2.VideoCapture(video_file)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open '{video_file}' file .. ")
+        self.event_frames = event_frames
+        self.extract_mode = extract_mode
+        self.buffers = FrameBufferRing(buffer_count)
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        for cur_frame_num, frame in iter_event_frames(self.cap, self.event_frames, self.extract_mode, self.buffers):
+            self.frames += 1
+            yield cur_frame_num, frame
+
+    def retain(self):
+        return self.buffers.retain()
+
+    def close(self):
+        self.cap.release()
+
+# check seek extraction
+
+def check_seek_matching(video_file, event_frames):
+    """
+        같은 video 를 full / seek 두 방식으로 동시에 읽어, 반환되는 frame 번호와 pixel 이 모두 같은지 확인
+    """
+    caps = [cv2.VideoCapture(video_file) for _ in EXTRACT_MODES]
+    if not all(cap.isOpened() for cap in caps):
+        raise RuntimeError(f"Cannot open '{video_file}' file .. ")
+    seek_iter, full_iter = [iter_event_frames(cap, event_frames, mode) for cap, mode in zip(caps, EXTRACT_MODES)]
+
+    matched_count, mismatch = 0, None
+    while mismatch is None:
+        seek_item, full_item = next(seek_iter, None), next(full_iter, None)
+        if seek_item is None and full_item is None:
+            break
+        if seek_item is None or full_item is None or seek_item[0] != full_item[0]:
+            mismatch = f"frame number seek {seek_item and seek_item[0]} / full {full_item and full_item[0]}"
+        elif not np.array_equal(seek_item[1], full_item[1]):
+            mismatch = f"pixels of frame {seek_item[0]}"
+        else:
+            matched_count += 1
+    for cap in caps:
+        cap.release()
+
+    if mismatch is not None:
+        print(f"check : seek and full extraction are not matching... ({video_file}, {mismatch})", end="\n.\n.\n")
+        return False
+    print(f"check : seek and full extraction are matching correctly! ({video_file}, {matched_count} frames)", end="\n.\n.\n")
+    return True
@@ -0,0 +1,183 @@
+"""
+    같은 storage 를 쓰는 여러 machine 이 label file 들을 나누어 변환하기 위한 작업 shard (--shard i/N)
+    - label file 이름의 md5 % N == i 인 file 만 처리 (0 <= i < N). 이름만으로 정해지므로 어느 machine 에서 나누어도 같고,
+      label 이 추가 / 삭제되어도 다른 label 의 shard 는 바뀌지 않음
+    - shard 끼리 겹치는 결과 file (annotation csv, build manifest, run report, tar shard index ..) 은 이름에 .shard-<i>-of-<N> 을 붙임
+      (image / txt 는 video 마다 이름이 다르므로 같은 폴더에 씀)
+    - shard 마다 manifest (<base>.shard-<i>-of-<N>.json) 에 처리한 label file 과 label 별 row 수를 기록
+    - merge_work_shards : 모든 shard 의 annotation csv 를 label file 이름 순서 (shard 없이 실행한 것과 같은 순서) 로 streaming merge
+      빠진 shard, 두 shard 에 있는 label, manifest 와 다른 row 수, 서로 다른 label 의 같은 image_name 이 있으면
+      RuntimeError (합친 annotation csv 를 만들지 않음)
+    - 실행 : python work_shards.py processed_data/work_shards_anncsv.json
+"""
+
+import os
+import re
+import csv
+import glob
+import json
+import hashlib
+import argparse
+
+from annotation_writer import ANNOTATION_FIELDS, AnnotationCsvWriter
+from tar_shards import shard_index_file, merge_shard_indexes
+
+MAX_REPORTED = 20  # 출력할 중복 image_name 수
+
+def parse_shard(text):
+    """ "i/N" -> (i, N) (argparse type 으로 사용) """
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"shard must be 'i/N', got '{text}'")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count <= 0 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..N-1, got '{text}'")
+    return index, count
+
+def shard_of(label_file, count):
+    """ label file 이름 (폴더 제외) 의 md5 로 정한 shard 번호 (crc32 는 비슷한 이름끼리 몰리므로 사용하지 않음) """
+    return int.from_bytes(hashlib.md5(os.path.basename(label_file).encode("utf-8")).digest()[:8], "big") % count
+
+def select_shard(label_files, shard):
+    """ shard = (i, N) 에 속하는 label file 만 (순서 유지), shard 가 None 이면 전부 """
+    if shard is None:
+        return list(label_files)
+    index, count = shard
+    return [label_file for label_file in label_files if shard_of(label_file, count) == index]
+
+def shard_file(path, shard):
+    """ processed_data/annotation/annotation.csv, (0, 4) -> processed_data/annotation/annotation.shard-000-of-004.csv """
+    if shard is None:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{shard[0]:03d}-of-{shard[1]:03d}{ext}"
+
+def write_work_shard(manifest_file, shard, label_rows, failed=(), annotation=None, shard_index=None):
+    """
+        shard 하나의 manifest 저장
+        - manifest_file : shard suffix 를 붙이기 전 경로, label_rows : [(label file 이름, row 수 (annotation 이 없으면 결과 file 수))] (label file 순서)
+        - annotation / shard_index : shard suffix 를 붙이기 전의 (합친 결과) 경로
+    """
+    manifest = {
+        "shard": shard[0], "shards": shard[1],
+        "labels": [[label_name, rows] for label_name, rows in label_rows],
+        "failed": sorted(failed),
+        "rows": sum(rows for _, rows in label_rows),
+        "annotation": annotation, "partial_annotation": shard_file(annotation, shard) if annotation else None,
+        "shard_index": shard_index,
+    }
+    output_file = shard_file(manifest_file, shard)
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_file + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(output_file + ".tmp", output_file)
+    print(f"work shard {shard[0]}/{shard[1]} saved! : {output_file} ({len(label_rows)} labels, {manifest['rows']} rows, "
+          f"{len(manifest['failed'])} failed)")
+
+def load_work_shards(manifest_file):
+    """
+        manifest_file (suffix 없는 경로) 의 모든 shard manifest 를 읽고 빠진 shard / 겹치는 label 확인
+        returns : shard 번호 순서의 manifest 목록
+    """
+    base, ext = os.path.splitext(manifest_file)
+    manifests = []
+    for path in sorted(glob.glob(glob.escape(base) + ".shard-*-of-*" + ext)):
+        with open(path, encoding="utf-8") as file:
+            manifests.append(json.load(file))
+    if not manifests:
+        raise RuntimeError(f"no work shard manifest for '{manifest_file}' .. ")
+    shard_counts = set(manifest["shards"] for manifest in manifests)
+    if len(shard_counts) != 1:
+        # 다른 N 으로 실행한 이전 manifest 가 남아 있으면 어느 것을 합칠지 알 수 없음
+        raise RuntimeError(f"work shards of '{manifest_file}' were made with different N {sorted(shard_counts)} .. ")
+    count = shard_counts.pop()
+    found = set(manifest["shard"] for manifest in manifests)
+    missing = [index for index in range(count) if index not in found]
+    if missing:
+        raise RuntimeError(f"missing work shards : {', '.join(f'{index}/{count}' for index in missing)} .. ")
+
+    label_owners = {}
+    for manifest in manifests:
+        for label_name, _ in manifest["labels"]:
+            if label_name in label_owners:
+                raise RuntimeError(f"'{label_name}' is in work shard {label_owners[label_name]} and {manifest['shard']} .. ")
+            label_owners[label_name] = manifest["shard"]
+    return sorted(manifests, key=lambda manifest: manifest["shard"])
+
+def _open_shard_annotation(manifest, fieldnames):
+    annfile = open(manifest["partial_annotation"], newline='')
+    reader = csv.DictReader(annfile)
+    if reader.fieldnames is not None and set(reader.fieldnames) != set(fieldnames):
+        annfile.close()
+        raise RuntimeError(f"'{manifest['partial_annotation']}' has different fields {reader.fieldnames} (expected {list(fieldnames)}) .. ")
+    return annfile, reader
+
+def merge_work_shards(manifest_file, output_file=None, fieldnames=ANNOTATION_FIELDS):
+    """
+        모든 shard 의 annotation csv 를 label file 이름 순서로 output_file (기본 : manifest 의 annotation 경로) 에 합침
+        - shard 별 csv 는 그 shard 의 label 순서로 쓰여 있으므로 shard 마다 앞에서부터 한 번씩만 읽음
+        - tar shard index 도 있으면 video 별 index 를 label file 이름 순서로 다시 합침
+        returns : 합친 row 수
+    """
+    manifests = load_work_shards(manifest_file)
+    for manifest in manifests:
+        if manifest["failed"]:
+            print(f"warning : work shard {manifest['shard']} has {len(manifest['failed'])} failed labels (not in the merge) : "
+                  f"{', '.join(manifest['failed'][:MAX_REPORTED])}")
+
+    row_count = 0
+    if manifests[0]["annotation"] is not None:
+        output_file = output_file or manifests[0]["annotation"]
+        label_order = sorted((label_name, rows, manifest["shard"]) for manifest in manifests for label_name, rows in manifest["labels"])
+        annfiles, readers = {}, {}
+        image_owners, duplicates = {}, []
+        try:
+            for manifest in manifests:
+                annfiles[manifest["shard"]], readers[manifest["shard"]] = _open_shard_annotation(manifest, fieldnames)
+            with AnnotationCsvWriter(output_file, fieldnames) as annotation_writer:
+                for label_name, rows, shard_index in label_order:
+                    reader = readers[shard_index]
+                    for _ in range(rows):
+                        row = next(reader, None)
+                        if row is None:
+                            raise RuntimeError(f"work shard {shard_index} annotation ends before the rows of '{label_name}' .. ")
+                        owner = image_owners.setdefault(row["image_name"], label_name)
+                        if owner != label_name:
+                            duplicates.append(f"{row['image_name']} ({owner}, {label_name})")
+                        annotation_writer.write_row(row)
+                for shard_index, reader in readers.items():
+                    if next(reader, None) is not None:
+                        raise RuntimeError(f"work shard {shard_index} annotation has more rows than its manifest .. ")
+                if duplicates:
+                    for duplicate in duplicates[:MAX_REPORTED]:
+                        print(f"duplicated image_name : {duplicate}")
+                    raise RuntimeError(f"{len(duplicates)} rows have an image_name of another label .. ")
+            row_count = annotation_writer.row_count
+        finally:
+            for annfile in annfiles.values():
+                annfile.close()
+
+    if manifests[0]["shard_index"] is not None:
+        shard_dir = os.path.dirname(manifests[0]["shard_index"])
+        label_names = sorted(label_name for manifest in manifests for label_name, _ in manifest["labels"])
+        merge_shard_indexes([shard_index_file(shard_dir, os.path.splitext(label_name)[0]) for label_name in label_names],
+                            manifests[0]["shard_index"])
+    print(f"work shards merged : {len(manifests)} shards, {sum(len(manifest['labels']) for manifest in manifests)} labels, "
+          f"{row_count} rows")
+    return row_count
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="check and merge the outputs of --shard i/N runs")
+    parser.add_argument("manifest", help="shard suffix 없는 work shard manifest 경로 (예: processed_data/work_shards_anncsv.json)")
+    parser.add_argument("--output", default=None, help="합친 annotation csv 경로 (기본 : shard 없이 실행했을 때의 경로)")
+    parser.add_argument("--columnar", action="store_true", help="합친 annotation csv 옆에 annotation.npy / .index.npy 도 저장")
+    args = parser.parse_args()
+
+    merge_work_shards(args.manifest, args.output)
+    if args.columnar:
+        from annotation_columnar import csv_to_npy
+        csv_to_npy(args.output or load_work_shards(args.manifest)[0]["annotation"])
@@ -0,0 +1,307 @@
+"""
+    aihub_to_anncsv.py / aihub_to_yolov8txt.py 를 실행하기 전에 작업량을 미리 계산하는 dry-run planner
+    - label json (events, annotations 의 frame 번호) 과 video container 정보 (frame 수, fps, 해상도) 만 읽음, frame 은 decode 하지 않음
+      (label_cache 에 유효한 cache 가 있으면 json 대신 cache 에서 읽고, cache 를 새로 쓰지는 않음)
+    - video 별 / 전체 : decode 할 frame 수, 저장할 frame 수, 형식(png / jpg / annotation) 별 예상 bytes, 예상 소요 시간
+    - decode 할 frame 수
+        seek : 저장 범위의 frame + SEEK_MIN_GAP 이하의 간격은 seek 대신 grab 으로 지나가는 frame (seek 횟수는 따로 표시)
+        full : 처음부터 마지막 저장 범위 frame 까지 전부
+    - 저장할 frame 수 : anncsv 는 모든 event frame, yolov8txt 는 DatasetMaker 와 같은 extract_ratio 간격 (또는 --budget frame sampling plan)
+    - 예상 시간 : benchmarks/run_benchmarks.py 결과 json 의 stage 별 시간을 megapixel 당 시간으로 환산 (--calibration 이 없으면 추정하지 않음)
+    - box 수와 event frame 수가 다른 label, event 가 video 끝을 넘는 label 등은 problems 로 표시
+
+    실행 예 :
+        python workload_planner.py --target anncsv
+        python workload_planner.py --target yolov8txt --extract-ratio 0.01 --calibration bench.json --workers 4
+"""
+
+import os
+import glob
+import json
+import argparse
+
+import cv2
+
+from label_stream import load_label_json
+from label_cache import cache_file_for, load_cached_label
+from video_frames import EXTRACT_MODES, SEEK_MIN_GAP, FrameIntervals, merge_frame_ranges, frames_as_intervals
+from frame_sampler import SAMPLING_MODES, build_frame_plan
+from frame_resize import RESIZE_SIDES, make_resizer
+
+RAW_VIDEO_PATH = "raw_data/video/"
+RAW_LABEL_PATH = "raw_data/label/"
+LABEL_CACHE_PATH = "processed_data/label_cache/"
+PLAN_FILE = "processed_data/workload_plan.json"
+TARGETS = {
+    # target : (image 형식, benchmark pipeline 이름)
+    "anncsv": ("png", "aihub_to_anncsv"),
+    "yolov8txt": ("jpg", "aihub_to_yolov8txt"),
+}
+EXTRACT_RATIO = 0.01  # aihub_to_yolov8txt.py 의 extract_ratio
+EVENT_OBJECT_ID = 1  # smoking event
+# calibration 이 없을 때 image 1 pixel 당 bytes (1080p CCTV frame 기준 대략값)
+BYTES_PER_PIXEL = {"png": 1.4, "jpg": 0.2}
+ANNCSV_ROW_BYTES = 100  # annotation.csv 한 줄
+YOLO_LINE_BYTES = 30  # yolo txt 한 줄
+
+# read labels / videos (decode 하지 않음)
+
+def read_label_frames(label_file, label_cache=LABEL_CACHE_PATH):
+    """
+        returns : {"video_name", "frame_size", "event_frames"(병합된 범위), "box_frames"(box 마다 frame 번호)}
+        - box 좌표는 필요 없으므로 frame 번호만 남김
+    """
+    if label_cache is not None:
+        parsed_label = load_cached_label(cache_file_for(label_cache, label_file, "anncsv"), label_file)
+        if parsed_label is not None:
+            return {"video_name": parsed_label["video_name"], "frame_size": parsed_label["frame_size"],
+                    "event_frames": parsed_label["event_frames"], "box_frames": parsed_label["bboxes"].frame_nums.tolist()}
+    raw_label_json = load_label_json(label_file, class_name="smoking")
+    info = raw_label_json["info"]
+    event_frames = merge_frame_ranges([[event["ev_start_frame"], event["ev_end_frame"]]
+                                       for event in raw_label_json["events"] if event["object_id"] == EVENT_OBJECT_ID])
+    return {"video_name": info["filename"], "frame_size": [info["width"], info["height"]],
+            "event_frames": event_frames, "box_frames": [annotation["cur_frame"] for annotation in raw_label_json["annotations"]]}
+
+def read_video_info(video_file):
+    """ container 정보만 읽음. returns : {"frame_count", "fps", "width", "height"}, 열 수 없으면 None """
+    cap = cv2.VideoCapture(video_file)
+    try:
+        if not cap.isOpened():
+            return None
+        return {"frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), "fps": cap.get(cv2.CAP_PROP_FPS),
+                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}
+    finally:
+        cap.release()
+
+# frame counts
+
+def clip_intervals(intervals, frame_count):
+    """ video 의 frame 수를 넘는 범위는 잘라냄 (frame 번호는 1부터) """
+    return FrameIntervals([[max(start, 1), min(end, frame_count)] for start, end in intervals])
+
+def decode_counts(intervals, extract_mode="seek", min_gap=SEEK_MIN_GAP):
+    """
+        video_frames.iter_event_frames 가 지나가는 frame 수
+        returns : (decode 하는 frame 수 (grab 포함), retrieve 하는 frame 수, seek 횟수)
+    """
+    retrieved = intervals.frame_count()
+    if extract_mode == "full":
+        return (intervals.last_frame or 0), retrieved, 0
+    decoded, seeks, pos = 0, 0, 0
+    for start, end in intervals:
+        gap = start - 1 - pos
+        if gap > min_gap:
+            seeks += 1
+        else:
+            decoded += gap
+        decoded += end - start + 1
+        pos = end
+    return decoded, retrieved, seeks
+
+def yolo_written_count(retrieved, box_count, extract_ratio):
+    """ DatasetMaker 와 같은 간격 : extract_step = box 수 // max(1, int(box 수 * extract_ratio)) (최소 1). returns : (저장 수, extract_step) """
+    extract_size = max(1, int(box_count * extract_ratio))
+    extract_step = max(1, box_count // extract_size)
+    return (retrieved + extract_step - 1) // extract_step, extract_step
+
+# calibration
+
+def load_calibration(calibration_file, target):
+    """
+        run_benchmarks.py 결과 json -> {"decode_s_per_mpx", "write_s_per_mpx", "parse_s_per_label", "bytes_per_pixel"}
+        - decode : decode_only stage, write : decode_encode_write stage 에서 decode 시간을 뺀 나머지 (encoding + 저장)
+    """
+    with open(calibration_file) as file:
+        benchmark = json.load(file)
+    config = benchmark["config"]
+    result = benchmark["pipelines"][TARGETS[target][1]]
+    stages = result["stages_s"]
+    mpx = config["width"] * config["height"] / 1e6
+    frames_decoded, frames_written = max(result["frames_decoded"], 1), max(result["frames_written"], 1)
+    return {
+        "decode_s_per_mpx": stages["decode_only"] / (frames_decoded * mpx),
+        "write_s_per_mpx": max(stages["decode_encode_write"] - stages["decode_only"], 0.0) / (frames_written * mpx),
+        "parse_s_per_label": stages.get("parse", 0.0) / max(config["videos"], 1),
+        "bytes_per_pixel": result["bytes_written"] / (frames_written * mpx * 1e6),
+    }
+
+# plan
+
+def plan_video(label_file, target, extract_mode="seek", extract_ratio=EXTRACT_RATIO, frame_nums=None, resizer=None,
+               bytes_per_pixel=None, calibration=None, label_cache=LABEL_CACHE_PATH, video_path=RAW_VIDEO_PATH):
+    """ label file 하나의 작업량. returns : (video plan dict, problems list) """
+    image_format = TARGETS[target][0]
+    label = read_label_frames(label_file, label_cache)
+    video = read_video_info(video_path + label["video_name"])
+    problems = []
+    if video is None:
+        return {"label": os.path.basename(label_file), "video": label["video_name"]}, ["video not found or cannot be opened"]
+    if [video["width"], video["height"]] != list(label["frame_size"]):
+        problems.append(f"label frame size {label['frame_size']} != video {[video['width'], video['height']]}")
+
+    event_intervals = FrameIntervals(label["event_frames"])
+    event_frame_count = event_intervals.frame_count()
+    box_count = len(label["box_frames"])
+    if box_count != event_frame_count:
+        # (box 는 frame 번호로 찾으므로 저장은 맞지만, yolov8txt 의 extract_step 은 box 수로 정해짐)
+        boxes_outside = sum(1 for frame_num in label["box_frames"] if frame_num not in event_intervals)
+        frames_with_box = set(frame_num for frame_num in label["box_frames"] if frame_num in event_intervals)
+        frames_without_box = event_frame_count - len(frames_with_box)
+        problems.append(f"{box_count} boxes for {event_frame_count} event frames "
+                        f"({boxes_outside} boxes outside events, {frames_without_box} event frames without box)")
+    if event_intervals.last_frame is not None and event_intervals.last_frame > video["frame_count"]:
+        problems.append(f"event frame {event_intervals.last_frame} beyond video end ({video['frame_count']} frames)")
+
+    # 저장 범위 : anncsv / yolo extract_ratio 는 모든 event frame, --budget 이면 plan 의 frame
+    wanted = frames_as_intervals(frame_nums) if frame_nums is not None else event_intervals
+    wanted = clip_intervals(wanted, video["frame_count"])
+    decoded, retrieved, seeks = decode_counts(wanted, extract_mode)
+    extract_step = None
+    if target == "anncsv":
+        written = retrieved
+    elif box_count == 0:
+        written = 0
+        problems.append("no boxes : aihub_to_yolov8txt.py skips this label")
+    elif frame_nums is not None:
+        written = retrieved
+    else:
+        written, extract_step = yolo_written_count(retrieved, box_count, extract_ratio)
+
+    frame_size = [video["width"], video["height"]]
+    out_size = resizer.target_size(frame_size) if resizer is not None else frame_size
+    in_mpx, out_mpx = frame_size[0] * frame_size[1] / 1e6, out_size[0] * out_size[1] / 1e6
+    if bytes_per_pixel is None:
+        bytes_per_pixel = calibration["bytes_per_pixel"] if calibration else BYTES_PER_PIXEL[image_format]
+    estimated_bytes = {image_format: int(written * out_mpx * 1e6 * bytes_per_pixel)}
+    if target == "anncsv":
+        estimated_bytes["annotation.csv"] = box_count * ANNCSV_ROW_BYTES
+    else:
+        # 저장하는 frame 의 box 수는 event frame 중 저장하는 비율에 비례한다고 봄
+        estimated_bytes["txt"] = int(box_count * min(written / max(event_frame_count, 1), 1.0)) * YOLO_LINE_BYTES
+
+    plan = {
+        "label": os.path.basename(label_file), "video": label["video_name"],
+        "frame_count": video["frame_count"], "fps": video["fps"], "frame_size": frame_size, "output_size": out_size,
+        "event_frames": event_frame_count, "boxes": box_count,
+        "frames_decoded": decoded, "frames_retrieved": retrieved, "seeks": seeks, "frames_written": written,
+        "extract_step": extract_step, "bytes": estimated_bytes,
+        "video_seconds": video["frame_count"] / video["fps"] if video["fps"] else None,
+    }
+    if calibration is not None:
+        plan["predicted_s"] = (calibration["parse_s_per_label"] + decoded * in_mpx * calibration["decode_s_per_mpx"]
+                               + written * out_mpx * calibration["write_s_per_mpx"])
+    return plan, problems
+
+def plan_workload(label_files, target, extract_mode="seek", extract_ratio=EXTRACT_RATIO, budget=None, sampling="uniform",
+                  resizer=None, bytes_per_pixel=None, calibration_file=None, workers=1, label_cache=LABEL_CACHE_PATH,
+                  video_path=RAW_VIDEO_PATH, frame_plan=None):
+    """
+        returns : {"target", "videos": [video plan], "problems": {label: [..]}, "total": {..}}
+        - frame_plan : 이미 만든 frame sampling plan (--shard 이면 전체 label 로 만든 plan 에서 label_files 몫만 사용),
+          없으면 budget 이 있을 때 label_files 로 만듦
+    """
+    if target not in TARGETS:
+        raise ValueError(f"unknown target '{target}' (choose from {tuple(TARGETS)})")
+    calibration = load_calibration(calibration_file, target) if calibration_file else None
+    if frame_plan is None and budget is not None and target == "yolov8txt":
+        frame_plan = build_frame_plan(label_files, budget, sampling)
+
+    videos, problems = [], {}
+    for label_file in label_files:
+        key = os.path.basename(label_file)
+        video_plan, video_problems = plan_video(label_file, target, extract_mode, extract_ratio,
+                                                frame_plan[key] if frame_plan is not None else None, resizer,
+                                                bytes_per_pixel, calibration, label_cache, video_path)
+        videos.append(video_plan)
+        if video_problems:
+            problems[key] = video_problems
+
+    total = {name: sum(video.get(name, 0) for video in videos)
+             for name in ("frames_decoded", "frames_retrieved", "seeks", "frames_written", "event_frames", "boxes")}
+    total["bytes"] = {}
+    for video in videos:
+        for name, size in video.get("bytes", {}).items():
+            total["bytes"][name] = total["bytes"].get(name, 0) + size
+    if calibration is not None:
+        # label file 단위 process 병렬 (--workers) 은 이상적으로 나누어진다고 봄
+        total["predicted_s"] = sum(video.get("predicted_s", 0.0) for video in videos) / max(workers, 1)
+    return {"target": target, "extract_mode": extract_mode, "workers": workers, "calibration": calibration,
+            "videos": videos, "problems": problems, "total": total}
+
+# report
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def _format_seconds(seconds):
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h {rest // 60:02d}m {rest % 60:02d}s"
+
+def print_workload(workload, show_videos=True):
+    if show_videos:
+        print(f"{'label':<50} {'frames':>8} {'decode':>8} {'seeks':>6} {'write':>8} {'bytes':>10} {'time':>12}")
+        for video in workload["videos"]:
+            if "frames_decoded" not in video:
+                print(f"{video['label']:<50} (video not found)")
+                continue
+            predicted = _format_seconds(video["predicted_s"]) if "predicted_s" in video else "-"
+            print(f"{video['label']:<50} {video['frame_count']:>8} {video['frames_decoded']:>8} {video['seeks']:>6} "
+                  f"{video['frames_written']:>8} {_format_bytes(sum(video['bytes'].values())):>10} {predicted:>12}")
+    total = workload["total"]
+    print(f"## {workload['target']} ({workload['extract_mode']}) : {len(workload['videos'])} videos")
+    print(f"# frames : {total['frames_decoded']} decoded ({total['frames_retrieved']} retrieved, {total['seeks']} seeks), "
+          f"{total['frames_written']} written")
+    print("# output : " + ", ".join(f"{name} {_format_bytes(size)}" for name, size in total["bytes"].items()))
+    if "predicted_s" in total:
+        print(f"# predicted time : {_format_seconds(total['predicted_s'])} (workers {workload['workers']})")
+    else:
+        print("# predicted time : - (benchmark 결과를 --calibration 으로 지정하면 추정)")
+    if workload["problems"]:
+        print(f"# problems : {len(workload['problems'])} labels")
+        for label, problems in workload["problems"].items():
+            for problem in problems:
+                print(f"  {label} : {problem}")
+
+def save_workload(workload, plan_file=PLAN_FILE):
+    plan_dir = os.path.dirname(plan_file)
+    if plan_dir:
+        os.makedirs(plan_dir, exist_ok=True)
+    with open(plan_file, "w", encoding="utf-8") as file:
+        json.dump(workload, file, indent=2)
+    print(f"workload plan saved : {plan_file}")
+
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="estimate frames, output bytes and time of an AIHub extraction run without decoding")
+    parser.add_argument("--target", choices=list(TARGETS), default="anncsv", help="실행할 변환 script")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default="seek", help="seek : event 범위만 decode / full : 모든 frame decode")
+    parser.add_argument("--extract-ratio", type=float, default=EXTRACT_RATIO, help="yolov8txt 의 extract_ratio")
+    parser.add_argument("--budget", type=int, default=None, help="yolov8txt 의 --budget (frame sampling plan)")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="uniform", help="yolov8txt 의 --sampling")
+    parser.add_argument("--resize", type=int, default=None, help="변환 script 의 --resize")
+    parser.add_argument("--resize-side", choices=RESIZE_SIDES, default="short", help="변환 script 의 --resize-side")
+    parser.add_argument("--workers", type=int, default=1, help="변환 script 의 --workers (예상 시간을 나눔)")
+    parser.add_argument("--calibration", default=None, help="benchmarks/run_benchmarks.py 결과 json (예상 시간, bytes/pixel)")
+    parser.add_argument("--bytes-per-pixel", type=float, default=None, help="image 1 pixel 당 bytes (calibration / 기본값 대신)")
+    parser.add_argument("--raw-label", default=RAW_LABEL_PATH, help="raw json label 폴더")
+    parser.add_argument("--raw-video", default=RAW_VIDEO_PATH, help="raw mp4 video 폴더")
+    parser.add_argument("--no-label-cache", action="store_true", help="label cache 를 보지 않고 항상 json 을 parse")
+    parser.add_argument("--out", default=PLAN_FILE, help="video 별 작업량을 담은 json 경로")
+    parser.add_argument("--summary", action="store_true", help="video 별 표 없이 합계만 출력")
+    args = parser.parse_args()
+
+    label_files = sorted(glob.glob(os.path.join(args.raw_label, "*.json")))
+    workload = plan_workload(label_files, args.target, args.extract_mode, args.extract_ratio, args.budget, args.sampling,
+                             make_resizer(args.resize, args.resize_side), args.bytes_per_pixel, args.calibration,
+                             args.workers, None if args.no_label_cache else LABEL_CACHE_PATH,
+                             os.path.join(args.raw_video, ""))
+    print_workload(workload, show_videos=not args.summary)
+    save_workload(workload, args.out)
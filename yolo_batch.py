@@ -0,0 +1,118 @@
+"""
+    YOLOv8 txt label -> dino finetuning annotation row 일괄 변환 엔진
+    - 모든 label file 의 모든 줄을 읽어 NumPy 배열로 모은 뒤, 상대 xywh(center) -> 절대 xywh(좌상단) 변환을 한 번에 계산
+    - object(줄) 하나당 annotation row 하나
+    - class id -> label name 은 class table(dict) 로 변환, table 에 없는 class / 5개 값이 아닌 줄은 건너뛰고 개수만 기록
+    - 계산 순서와 int() 버림 방식은 bbox_convert 와 같으므로 같은 입력에 대해 같은 값
+    - iter_label_chunks : label file 을 chunk_files 개씩 나누어 변환 (row 를 chunk 단위로 writer 에 넘겨 전체를 메모리에 모으지 않음)
+"""
+
+import os
+
+import numpy as np
+
+from image_size import probe_image_size
+from annotation_writer import ANNOTATION_FIELDS
+
+CHUNK_FILES = 20000
+STATS_KEYS = ("labels", "objects", "missing_images", "skipped_lines", "unknown_class")
+
+def scan_images(images_path):
+    """ returns : {image 이름: os.DirEntry} """
+    with os.scandir(os.path.abspath(images_path)) as entries:
+        return {entry.name: entry for entry in entries}
+
+def read_label_files(label_files):
+    """
+        returns : file_indices (n,), class_ids (n,), boxes (n, 4) [xc_r, yc_r, w_r, h_r], skipped line 수
+    """
+    file_indices, tokens = [], []
+    skipped_count = 0
+    for file_idx, label_file in enumerate(label_files):
+        with open(label_file, 'r') as f:
+            for line in f.read().splitlines():
+                values = line.split()
+                if len(values) == 5:
+                    file_indices.append(file_idx)
+                    tokens.extend(values)
+                elif values:
+                    skipped_count += 1
+    table = np.array(tokens, dtype=np.float64).reshape(-1, 5)
+    return np.array(file_indices, dtype=np.int64), table[:, 0].astype(np.int64), table[:, 1:], skipped_count
+
+def convert_boxes(boxes_relative, image_sizes):
+    """
+        boxes_relative (n, 4) [xc_r, yc_r, w_r, h_r], image_sizes (n, 2) [width, height]
+        -> (n, 4) int [x1, y1, w, h]
+    """
+    image_width, image_height = image_sizes[:, 0], image_sizes[:, 1]
+    xc, yc = boxes_relative[:, 0] * image_width, boxes_relative[:, 1] * image_height
+    w, h = boxes_relative[:, 2] * image_width, boxes_relative[:, 3] * image_height
+    x1, y1 = xc - w/2, yc - h/2
+    return np.stack([x1, y1, w, h], axis=1).astype(np.int64)
+
+def convert_label_files(label_files, images_path, class_names, size_cache=None, image_ext=".jpg", image_entries=None):
+    """
+        label_files 전체를 annotation row(dict) 목록으로 변환
+        - class_names : {class_id: label_name}
+        - image_entries : scan_images 결과 (여러 번 나누어 부를 때 다시 scan 하지 않도록)
+        - returns : rows, stats {"labels", "objects", "missing_images", "skipped_lines", "unknown_class"}
+    """
+    # image 폴더는 한 번만 scan (file 마다 exists/stat 호출하지 않음) 
+    if image_entries is None:
+        image_entries = scan_images(images_path)
+
+    image_names, image_sizes, found_files = [], [], []
+    missing_count = 0
+    for label_file in label_files:
+        image_name = os.path.splitext(os.path.basename(label_file))[0] + image_ext
+        entry = image_entries.get(image_name)
+        if entry is None:
+            missing_count += 1
+            continue
+        image_names.append(image_name)
+        if size_cache is not None:
+            image_sizes.append(size_cache.get_size(entry.path, entry.stat()))
+        else:
+            image_sizes.append(probe_image_size(entry.path))
+        found_files.append(label_file)
+
+    file_indices, class_ids, boxes_relative, skipped_count = read_label_files(found_files)
+    known = np.isin(class_ids, np.array(list(class_names), dtype=np.int64))
+    file_indices, class_ids, boxes_relative = file_indices[known], class_ids[known], boxes_relative[known]
+    row_image_sizes = np.array(image_sizes, dtype=np.int64).reshape(-1, 2)[file_indices]
+    boxes = convert_boxes(boxes_relative, row_image_sizes)
+
+    rows = []
+    for file_idx, class_id, (bbox_x, bbox_y, bbox_width, bbox_height), (image_width, image_height) in zip(
+            file_indices.tolist(), class_ids.tolist(), boxes.tolist(), row_image_sizes.tolist()):
+        rows.append({
+            "label_name": class_names[class_id],
+            "bbox_x": bbox_x,
+            "bbox_y": bbox_y,
+            "bbox_width": bbox_width,
+            "bbox_height": bbox_height,
+            "image_name": image_names[file_idx],
+            "image_width": image_width,
+            "image_height": image_height
+        })
+    stats = {
+        "labels": len(label_files),
+        "objects": len(rows),
+        "missing_images": missing_count,
+        "skipped_lines": skipped_count,
+        "unknown_class": int((~known).sum())
+    }
+    return rows, stats
+
+def iter_label_chunks(label_files, images_path, class_names, size_cache=None, image_ext=".jpg", chunk_files=CHUNK_FILES):
+    """ label_files 를 chunk_files 개씩 변환. yields : (rows, stats) """
+    image_entries = scan_images(images_path)
+    for start in range(0, len(label_files), chunk_files):
+        yield convert_label_files(label_files[start:start + chunk_files], images_path, class_names,
+                                  size_cache, image_ext, image_entries)
+
+def add_stats(total_stats, stats):
+    for key in STATS_KEYS:
+        total_stats[key] = total_stats.get(key, 0) + stats[key]
+    return total_stats
@@ -1,93 +1,66 @@
 '''
     roboflow knife dataset 을 dino finetuning dataset 형식에 맞게 수정
-    - [YOLOv8 PyTorch TXT (예: 1 0.716797 0.395833 0.147461 0.279167)] format annotation 을 
-    - dino finetuning csv format, 단일 파일 annotation.csv로 변환 
+    - [YOLOv8 PyTorch TXT (예: 1 0.716797 0.395833 0.147461 0.279167)] format annotation 을
+    - dino finetuning csv format, 단일 파일 annotation.csv로 변환
+    - 변환은 yolo_batch.convert_label_files (aihub_to_yolo/yolotxt_to_anncsv.py 는 경로와 class 이름만 바꿔 main 을 사용)
 '''
 
-import os, glob 
-import csv
-from PIL import Image 
+import os, glob
+import argparse
+from collections import Counter
+from image_size import ImageSizeCache
+from yolo_batch import iter_label_chunks, add_stats
+from annotation_columnar import csv_to_npy
+from annotation_writer import AnnotationCsvWriter
+from work_shards import parse_shard, select_shard, shard_file, write_work_shard
 
 RAW_IMAGES_PATH = "raw_data/images/"
 RAW_LABEL_PATH = "raw_data/labels/"
 PROCESSED_ANNOTATION_PATH = "processed_annotation/"
+IMAGE_SIZE_CACHE_FILE = PROCESSED_ANNOTATION_PATH + "image_size_cache.json"
+WORK_SHARD_FILE = PROCESSED_ANNOTATION_PATH + "work_shards.json"
 PROCESSED_ANNOTATION_NAME = "annotation.csv"
+CLASS_NAMES = {0: "knife"}  # class id -> label name
 
-def bbox_convert(bbox_xyCwh_relative, image_size):
-    xc_r, yc_r, w_r, h_r = bbox_xyCwh_relative
-    image_width, image_height = image_size
-    xc, yc, w, h = xc_r * image_width, yc_r * image_height, w_r * image_width, h_r * image_height
-    x1, y1 = xc-w/2, yc-h/2
-    bbox_xy1wh = [x1, y1, w, h]
-    bbox_xy1wh = [int(item) for item in bbox_xy1wh]
-    return bbox_xy1wh
+def save_annotation(annotations, append=False):
+    with AnnotationCsvWriter(PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME, append=append) as annotation_writer:
+        annotation_writer.write_rows(annotations)
 
-def read_label_txt(label_file, image_size):
-    with open(label_file, 'r') as f:
-        content = f.readline().strip()
-        values = content.split()
-        
-        if len(values)!=5:
-            label_dict = {
-                "class_id": 5,  # means not target class 
-                "bbox_xywh": [0.0, 0.0, 0.0, 0.0]
-            }
-            return label_dict
-        
-        bbox_xyCwh_relative = [float(values[1]), float(values[2]), float(values[3]), float(values[4])]
-        bbox_xy1wh = bbox_convert(bbox_xyCwh_relative, image_size)
-        
-        label_dict = {
-            "class_id": int(values[0]),
-            "bbox_xywh": bbox_xy1wh
-        }
-        
-    return label_dict
+def main(raw_images_path=RAW_IMAGES_PATH, raw_label_path=RAW_LABEL_PATH, annotation_path=PROCESSED_ANNOTATION_PATH,
+         annotation_name=PROCESSED_ANNOTATION_NAME, class_names=CLASS_NAMES):
+    parser = argparse.ArgumentParser(description="yolov8 txt label to dino annotation.csv")
+    parser.add_argument("--columnar", action="store_true",
+                        help="annotation.csv 옆에 memory-map 으로 읽을 수 있는 .npy / .index.npy 도 저장")
+    parser.add_argument("--append", action="store_true",
+                        help="기존 annotation csv 를 지우지 않고 그 뒤에 이어서 씀")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="i/N : label file 이름의 hash 로 나눈 N 개 중 i 번째 (0 부터) 만 변환. 여러 machine 의 결과는 python work_shards.py 로 합침")
+    args = parser.parse_args()
+    if args.shard is not None and args.append:
+        parser.error("--append can not be used with --shard (merge the shards with work_shards.py)")
+    if args.shard is not None and args.columnar:
+        parser.error("--columnar can not be used with --shard (use python work_shards.py --columnar after all shards finish)")
 
-def check_matching_image(label_file):
-    file_name = os.path.splitext(os.path.basename(label_file))[0]
-    image_name = file_name + ".jpg"
-    image_file = RAW_IMAGES_PATH + image_name
-    image_exists = os.path.exists(image_file) 
-    with Image.open(image_file) as img:
-        image_width, image_height = img.size
-    return image_name, image_exists, (image_width, image_height)
-
-def proc_a_label(label_file):
-    image_name, image_exists, image_size = check_matching_image(label_file)
-    if not image_exists:  
-        pass 
-    
-    label_dict = read_label_txt(label_file, image_size)
-    if label_dict["class_id"] != 0:  
-        pass
-    
-    annDict = {
-        "label_name": "knife",
-        "bbox_x": label_dict["bbox_xywh"][0],
-        "bbox_y": label_dict["bbox_xywh"][1],
-        "bbox_width": label_dict["bbox_xywh"][2],
-        "bbox_height": label_dict["bbox_xywh"][3],
-        "image_name": image_name,
-        "image_width": image_size[0],
-        "image_height": image_size[1]
-    }
-
-    return annDict
-
-def save_annotation(annotations):
-    output_annotation_filename = PROCESSED_ANNOTATION_PATH + PROCESSED_ANNOTATION_NAME
-    with open(output_annotation_filename, mode='w', newline='') as outputfile:
-        writer = csv.DictWriter(outputfile, fieldnames=['label_name', 'bbox_x', 'bbox_y', 'bbox_width', 'bbox_height', 'image_name', 'image_width', 'image_height'])
-        writer.writeheader() 
-        for row in annotations:
-            writer.writerow(row) 
-    print(f"annotation saved! : {output_annotation_filename}") 
+    # label file 을 chunk 단위로 변환해서 바로 씀 (object 하나당 annotation row 하나)
+    annotation_file = annotation_path + annotation_name
+    label_files = select_shard(sorted(glob.glob(raw_label_path + "*.txt")), args.shard)
+    stats, image_rows = {}, Counter()
+    os.makedirs(annotation_path, exist_ok=True)
+    with ImageSizeCache(shard_file(annotation_path + os.path.basename(IMAGE_SIZE_CACHE_FILE), args.shard)) as size_cache, \
+         AnnotationCsvWriter(shard_file(annotation_file, args.shard), append=args.append) as annotation_writer:
+        for rows, chunk_stats in iter_label_chunks(label_files, raw_images_path, class_names, size_cache):
+            annotation_writer.write_rows(rows)
+            add_stats(stats, chunk_stats)
+            image_rows.update(row["image_name"] for row in rows)
+    print(f"labels : {stats.get('labels', 0)}, objects : {stats.get('objects', 0)}, missing images : {stats.get('missing_images', 0)}, "
+          f"skipped lines : {stats.get('skipped_lines', 0)}, unknown class objects : {stats.get('unknown_class', 0)}")
+    if args.shard is not None:
+        # label 의 row 는 image 이름 (label 이름 + .jpg) 으로 구분
+        write_work_shard(annotation_path + os.path.basename(WORK_SHARD_FILE), args.shard,
+                         [(os.path.basename(f), image_rows[os.path.splitext(os.path.basename(f))[0] + ".jpg"]) for f in label_files],
+                         annotation=annotation_file)
+    elif args.columnar:
+        csv_to_npy(annotation_file)
 
 if __name__ == "__main__":
-    annotations = []
-    label_files = glob.glob(RAW_LABEL_PATH + "*.txt")
-    for idx, label_file in enumerate(label_files):
-        annDict = proc_a_label(label_file)
-        annotations.append(annDict)
-    save_annotation(annotations)
+    main()